@@ -62,6 +62,13 @@ ext_modules = LazyCythonizingList([
     ('zipline.assets._assets', ['zipline/assets/_assets.pyx']),
     ('zipline.lib.adjusted_array', ['zipline/lib/adjusted_array.pyx']),
     ('zipline.lib.adjustment', ['zipline/lib/adjustment.pyx']),
+    ('zipline.lib.rank', ['zipline/lib/rank.pyx']),
+    ('zipline.lib.rolling', ['zipline/lib/rolling.pyx']),
+    ('zipline.lib._float32window', ['zipline/lib/_float32window.pyx']),
+    ('zipline.lib._float64window', ['zipline/lib/_float64window.pyx']),
+    ('zipline.lib._int64window', ['zipline/lib/_int64window.pyx']),
+    ('zipline.lib._uint32window', ['zipline/lib/_uint32window.pyx']),
+    ('zipline.lib._uint8window', ['zipline/lib/_uint8window.pyx']),
     (
         'zipline.data.ffc.loaders._us_equity_pricing',
         ['zipline/data/ffc/loaders/_us_equity_pricing.pyx']
@@ -1,20 +1,33 @@
 """
 Tests for chunked adjustments.
 """
+from itertools import chain
 from unittest import TestCase
 
 from nose_parameterized import parameterized
 from numpy import (
     arange,
     array,
+    datetime64,
+    float32,
+    float64,
     full,
+    int64,
+    may_share_memory,
+    nan,
+    uint32,
 )
 from numpy.testing import assert_array_equal
 from six.moves import zip_longest
 
 from zipline.lib.adjustment import (
+    BooleanOverwrite,
+    Datetime64Overwrite,
+    Float64Add,
     Float64Multiply,
     Float64Overwrite,
+    Int64Overwrite,
+    PackedAdjustments,
 )
 from zipline.lib.adjusted_array import (
     adjusted_array,
@@ -86,6 +99,7 @@ def _gen_multiplicative_adjustment_cases(dtype):
     """
     adjustment_type = {
         float: Float64Multiply,
+        int: Float64Multiply,
     }[dtype]
 
     nrows, ncols = 6, 3
@@ -153,6 +167,7 @@ def _gen_overwrite_adjustment_cases(dtype):
 
     adjustment_type = {
         float: Float64Overwrite,
+        int: Int64Overwrite,
     }[dtype]
 
     nrows, ncols = 6, 3
@@ -242,7 +257,12 @@ def _gen_expectations(baseline, adjustments, buffer_as_of, nrows):
 
 class AdjustedArrayTestCase(TestCase):
 
-    @parameterized.expand(_gen_unadjusted_cases(float))
+    @parameterized.expand(
+        chain(
+            _gen_unadjusted_cases(float),
+            _gen_unadjusted_cases(int),
+        )
+    )
     def test_no_adjustments(self,
                             name,
                             data,
@@ -259,7 +279,12 @@ class AdjustedArrayTestCase(TestCase):
             for yielded, expected_yield in zip_longest(window_iter, expected):
                 assert_array_equal(yielded, expected_yield)
 
-    @parameterized.expand(_gen_multiplicative_adjustment_cases(float))
+    @parameterized.expand(
+        chain(
+            _gen_multiplicative_adjustment_cases(float),
+            _gen_multiplicative_adjustment_cases(int),
+        )
+    )
     def test_multiplicative_adjustments(self,
                                         name,
                                         data,
@@ -276,7 +301,12 @@ class AdjustedArrayTestCase(TestCase):
             for yielded, expected_yield in zip_longest(window_iter, expected):
                 assert_array_equal(yielded, expected_yield)
 
-    @parameterized.expand(_gen_overwrite_adjustment_cases(float))
+    @parameterized.expand(
+        chain(
+            _gen_overwrite_adjustment_cases(float),
+            _gen_overwrite_adjustment_cases(int),
+        )
+    )
     def test_overwrite_adjustment_cases(self,
                                         name,
                                         data,
@@ -293,6 +323,212 @@ class AdjustedArrayTestCase(TestCase):
             for yielded, expected_yield in zip_longest(window_iter, expected):
                 assert_array_equal(yielded, expected_yield)
 
+    @parameterized.expand(
+        list(_gen_multiplicative_adjustment_cases(float)) +
+        list(_gen_overwrite_adjustment_cases(float))
+    )
+    def test_block_reads(self, name, data, lookback, adjustments, expected):
+        array = adjusted_array(
+            data,
+            NOMASK,
+            adjustments,
+        )
+        window_iter = array.traverse(lookback)
+        yielded = []
+        block_length = window_iter.block_length()
+        while block_length:
+            block = window_iter.next_block(block_length)
+            self.assertEqual(block.shape[:2], (block_length, lookback))
+            # Copy each window, since the block is a view over data that's
+            # mutated by later adjustments.
+            yielded.extend(window.copy() for window in block)
+            block_length = window_iter.block_length()
+
+        for window, expected_yield in zip_longest(yielded, expected):
+            assert_array_equal(window, expected_yield)
+
+    def test_bad_block_length(self):
+        data = arange(30, dtype=float).reshape(6, 5)
+        window_iter = adjusted_array(data, NOMASK, {}).traverse(3)
+        self.assertEqual(window_iter.block_length(), 4)
+
+        with self.assertRaises(ValueError):
+            window_iter.next_block(0)
+        with self.assertRaises(ValueError):
+            window_iter.next_block(5)
+
+        block = window_iter.next_block(4)
+        assert_array_equal(block[-1], data[3:])
+        with self.assertRaises(ValueError):
+            block[0, 0, 0] = 5.0
+        self.assertEqual(window_iter.block_length(), 0)
+
+    def test_windows_share_data_until_adjusted(self):
+        data = arange(30, dtype=float).reshape(6, 5)
+        array = adjusted_array(
+            data,
+            NOMASK,
+            {3: [Float64Multiply(0, 2, 1, 2.0)]},
+        )
+        first, second = array.traverse(2), array.traverse(2)
+
+        # Until an adjustment is applied, windows are views of the shared
+        # data.
+        for window_iter in first, second:
+            for _ in range(2):
+                self.assertTrue(
+                    may_share_memory(next(window_iter), array.data)
+                )
+
+        # Adjusting one iterator's copy doesn't affect the other iterator or
+        # the shared data.
+        adjusted = next(first)
+        self.assertFalse(may_share_memory(adjusted, array.data))
+        assert_array_equal(adjusted, [[10, 22, 12, 13, 14],
+                                      [15, 16, 17, 18, 19]])
+        assert_array_equal(array.data, data)
+        assert_array_equal(next(second), adjusted)
+
+    def test_packed_adjustments(self):
+        data = arange(60, dtype=float).reshape(10, 6)
+        adjustments = {
+            2: [Float64Multiply(0, 1, 0, 2.0), Float64Add(1, 1, 0, 3.0)],
+            5: [Float64Overwrite(2, 4, 3, 7.0)],
+            8: [Float64Add(0, 7, 5, -1.0), Float64Multiply(3, 6, 3, 0.5)],
+        }
+        packed = PackedAdjustments(adjustments)
+        self.assertEqual(len(packed), 5)
+        assert_array_equal(packed.apply_idxs, [2, 2, 5, 8, 8])
+
+        expected = data.copy()
+        for apply_idx in sorted(adjustments):
+            for adjustment in adjustments[apply_idx]:
+                adjustment.mutate(expected, 2)
+
+        result = data.copy()
+        # Apply adjustments known before row 6, then the rest.
+        position = packed.apply(result, 0, 6, 2)
+        self.assertEqual(position, 3)
+        self.assertEqual(packed.apply(result, position, 10, 2), 5)
+
+        assert_array_equal(result, expected)
+        # Rows before min_row are untouched.
+        assert_array_equal(result[:2], data[:2])
+
+    def test_packed_adjustments_out_of_bounds(self):
+        data = arange(9, dtype=float).reshape(3, 3)
+        for adjustment in (Float64Add(0, 3, 0, 1.0),
+                           Float64Add(0, 1, 3, 1.0)):
+            packed = PackedAdjustments({1: [adjustment]})
+            with self.assertRaises(IndexError):
+                packed.apply(data, 0, 3, 0)
+
+    def test_integral_arrays(self):
+        data = arange(30, dtype=uint32).reshape(6, 5)
+        mask = full((6, 5), True, dtype=bool)
+        mask[0, 0] = False
+        array = adjusted_array(
+            data.copy(),
+            mask,
+            {3: [Float64Multiply(0, 2, 1, 0.5)]},
+        )
+        self.assertEqual(array.dtype, uint32)
+
+        expected = data.copy()
+        expected[0, 0] = 0
+        windows = list(array.traverse(3))
+        self.assertEqual(windows[0].dtype, uint32)
+        assert_array_equal(windows[0], expected[:3])
+        # Adjusted values are rounded to the nearest integer, with halves
+        # rounded away from zero.
+        expected[:3, 1] = [1, 3, 6]
+        assert_array_equal(windows[1], expected[1:4])
+
+        array = adjusted_array(data.astype(int64), NOMASK, {})
+        self.assertEqual(array.dtype, int64)
+
+    def test_integral_adjustments_out_of_range(self):
+        data = arange(6, dtype=uint32).reshape(2, 3)
+        cases = [
+            (uint32, Float64Multiply(0, 0, 1, -1.0)),
+            (uint32, Float64Multiply(0, 0, 1, 2.0 ** 32)),
+            (uint32, Float64Add(0, 0, 1, nan)),
+            (uint32, Float64Overwrite(0, 0, 1, nan)),
+            (int64, Float64Multiply(0, 0, 1, 2.0 ** 63)),
+        ]
+        for dtype, adjustment in cases:
+            packed = PackedAdjustments({1: [adjustment]})
+            with self.assertRaises(ValueError):
+                packed.apply(data.astype(dtype), 0, 2, 0)
+
+    def test_float32_arrays(self):
+        data = arange(30, dtype=float32).reshape(6, 5)
+        adjustments = {3: [Float64Multiply(0, 2, 1, 0.5)]}
+        array = adjusted_array(data.copy(), NOMASK, adjustments)
+        self.assertEqual(array.dtype, float32)
+
+        expected = list(adjusted_array(
+            data.astype(float64),
+            NOMASK,
+            adjustments,
+        ).traverse(3))
+
+        converted = adjusted_array(
+            data.astype(float64),
+            NOMASK,
+            adjustments,
+        ).astype(float32)
+        for array in array, converted:
+            windows = list(array.traverse(3))
+            self.assertEqual(windows[0].dtype, float32)
+            for window, expected_window in zip_longest(windows, expected):
+                assert_array_equal(window, expected_window)
+
+        self.assertIs(converted.astype(float32), converted)
+        with self.assertRaises(TypeError):
+            converted.astype(int64)
+
+    def test_bool_arrays(self):
+        data = arange(18).reshape(6, 3) % 2 == 0
+        mask = full((6, 3), True, dtype=bool)
+        mask[1, 0] = False
+        array = adjusted_array(
+            data.copy(),
+            mask,
+            {2: [BooleanOverwrite(0, 1, 2, True)]},
+        )
+
+        expected = data.copy()
+        expected[1, 0] = False
+        windows = list(array.traverse(2))
+        self.assertEqual(windows[0].dtype, bool)
+        assert_array_equal(windows[0], expected[:2])
+        expected[:2, 2] = True
+        assert_array_equal(windows[1], expected[1:3])
+
+        # Only overwrites make sense for bools.
+        with self.assertRaises(TypeError):
+            adjusted_array(data, NOMASK, {2: [Float64Add(0, 1, 2, 1.0)]})
+
+    def test_datetime_arrays(self):
+        data = arange(12).reshape(4, 3).astype('datetime64[D]')
+        mask = full((4, 3), True, dtype=bool)
+        mask[0, 1] = False
+        new_value = datetime64('2014-01-01', 'ns')
+        array = adjusted_array(
+            data.copy(),
+            mask,
+            {2: [Datetime64Overwrite(0, 1, 0, new_value)]},
+        )
+
+        expected = data.astype('datetime64[ns]')
+        expected[0, 1] = datetime64('NaT', 'ns')
+        windows = list(array.traverse(2))
+        self.assertEqual(windows[0].dtype, expected.dtype)
+        assert_array_equal(windows[0], expected[:2])
+        expected[:2, 0] = new_value
+        assert_array_equal(windows[1], expected[1:3])
+
     def test_invalid_lookback(self):
 
         data = arange(30, dtype=float).reshape(6, 5)
@@ -316,6 +552,36 @@ class AdjustedArrayTestCase(TestCase):
             with self.assertRaises(ValueError):
                 frame[0, 0] = 5.0
 
+    def test_masked_views_are_copied(self):
+        base = arange(30, dtype=uint32).reshape(6, 5)
+        mask = full((5, 3), True, dtype=bool)
+        mask[0, 0] = False
+
+        # Views are filled in a copy, so that our caller's buffer is left
+        # alone.
+        view = base[1:, 1:4]
+        array = adjusted_array(view, mask, {})
+        self.assertFalse(may_share_memory(array.data, base))
+        self.assertEqual(array.data[0, 0], 0)
+        self.assertEqual(base[1, 1], 6)
+
+        # Views with nothing to fill are used as is.
+        array = adjusted_array(view, full((5, 3), True, dtype=bool), {})
+        self.assertTrue(may_share_memory(array.data, base))
+
+        # Arrays that own their memory are filled in place.
+        data = view.copy()
+        array = adjusted_array(data, mask, {})
+        self.assertTrue(may_share_memory(array.data, data))
+        self.assertEqual(data[0, 0], 0)
+
+    def test_read_only_input(self):
+        data = arange(30, dtype=float).reshape(6, 5)
+        data.flags.writeable = False
+        array = adjusted_array(data, NOMASK, {})
+        self.assertFalse(may_share_memory(array.data, data))
+        assert_array_equal(next(array.traverse(6)), data)
+
     def test_bad_input(self):
         msg = "Mask shape \(2, 3\) != data shape \(5, 5\)"
         data = arange(25).reshape(5, 5)
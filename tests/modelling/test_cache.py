@@ -0,0 +1,164 @@
+"""
+Tests for the persistent term output cache.
+"""
+from os import listdir
+from unittest import TestCase
+
+from numpy import arange, float64
+from numpy.testing import assert_array_equal
+from pandas import date_range
+from testfixtures import TempDirectory
+
+from zipline.data.equities import USEquityPricing
+from zipline.modelling.cache import (
+    term_key,
+    TermOutputCache,
+    UncacheableTerm,
+)
+from zipline.modelling.factor import CustomFactor
+from zipline.modelling.factor.technical import SimpleMovingAverage
+
+
+class TermOutputCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.dir_ = TempDirectory()
+        self.dates = date_range('2014-01-01', '2014-01-31', tz='UTC')
+        self.assets = arange(1, 6)
+        self.values = arange(
+            len(self.dates) * len(self.assets),
+            dtype=float64,
+        ).reshape(len(self.dates), len(self.assets))
+        self.term = SimpleMovingAverage(
+            inputs=[USEquityPricing.close],
+            window_length=10,
+        )
+
+    def tearDown(self):
+        self.dir_.cleanup()
+
+    def test_term_key(self):
+        other = SimpleMovingAverage(
+            inputs=[USEquityPricing.close],
+            window_length=5,
+        )
+        self.assertEqual(
+            term_key(self.term, 'v1'),
+            term_key(self.term, 'v1'),
+        )
+        self.assertNotEqual(term_key(self.term, 'v1'), term_key(other, 'v1'))
+        self.assertNotEqual(
+            term_key(self.term, 'v1'),
+            term_key(self.term, 'v2'),
+        )
+
+    def test_term_key_compute_code(self):
+
+        def make_factor(source):
+            namespace = {'CustomFactor': CustomFactor}
+            exec(source, namespace)
+            return namespace['Scaled'](
+                inputs=[USEquityPricing.close],
+                window_length=5,
+            )
+
+        source = (
+            "class Scaled(CustomFactor):\n"
+            "    def compute(self, today, assets, out, closes):\n"
+            "        out[:] = closes[-1] * %s\n"
+        )
+        doubled = make_factor(source % 2)
+        self.assertEqual(
+            term_key(doubled, 'v1'),
+            term_key(make_factor(source % 2), 'v1'),
+        )
+        # Changing a constant doesn't change the bytecode of compute.
+        self.assertNotEqual(
+            term_key(doubled, 'v1'),
+            term_key(make_factor(source % 3), 'v1'),
+        )
+        versioned = make_factor(source % 2 + "    cache_version = 1\n")
+        self.assertNotEqual(
+            term_key(doubled, 'v1'),
+            term_key(versioned, 'v1'),
+        )
+
+    def test_uncacheable_compute(self):
+        scale = 2
+
+        class Scaled(CustomFactor):
+            def compute(self, today, assets, out, closes):
+                out[:] = closes[-1] * scale
+
+        term = Scaled(inputs=[USEquityPricing.close], window_length=5)
+        with self.assertRaises(UncacheableTerm):
+            term_key(term, 'v1')
+
+        cache = TermOutputCache(self.dir_.path, 1 << 20)
+        cache.put(term, 'v1', self.dates, self.assets, self.values)
+        self.assertEqual(listdir(self.dir_.path), [])
+        self.assertIsNone(cache.get(term, 'v1', self.dates, self.assets))
+
+    def test_round_trip(self):
+        cache = TermOutputCache(self.dir_.path, 1 << 20)
+        cache.put(self.term, 'v1', self.dates, self.assets, self.values)
+
+        result = cache.get(self.term, 'v1', self.dates, self.assets)
+        assert_array_equal(result, self.values)
+
+        # Contiguous date ranges and subsets of assets are served from the
+        # same entry.
+        result = cache.get(self.term, 'v1', self.dates[5:10], [2, 4])
+        assert_array_equal(result, self.values[5:10, [1, 3]])
+
+    def test_misses(self):
+        cache = TermOutputCache(self.dir_.path, 1 << 20)
+        self.assertIsNone(
+            cache.get(self.term, 'v1', self.dates, self.assets)
+        )
+
+        cache.put(self.term, 'v1', self.dates, self.assets, self.values)
+        # Different data version.
+        self.assertIsNone(
+            cache.get(self.term, 'v2', self.dates, self.assets)
+        )
+        # Dates outside the stored range.
+        self.assertIsNone(
+            cache.get(
+                self.term,
+                'v1',
+                date_range('2014-01-20', '2014-02-10', tz='UTC'),
+                self.assets,
+            )
+        )
+        # Assets not in the stored entry.
+        self.assertIsNone(
+            cache.get(self.term, 'v1', self.dates, [1, 6])
+        )
+
+    def test_eviction(self):
+        # Room for one entry but not two.
+        cache = TermOutputCache(self.dir_.path, self.values.nbytes + 1024)
+        other = SimpleMovingAverage(
+            inputs=[USEquityPricing.close],
+            window_length=5,
+        )
+        cache.put(self.term, 'v1', self.dates, self.assets, self.values)
+        cache.put(other, 'v1', self.dates, self.assets, self.values)
+
+        self.assertIsNone(
+            cache.get(self.term, 'v1', self.dates, self.assets)
+        )
+        assert_array_equal(
+            cache.get(other, 'v1', self.dates, self.assets),
+            self.values,
+        )
+
+    def test_skip_oversized(self):
+        cache = TermOutputCache(self.dir_.path, 16)
+        cache.put(self.term, 'v1', self.dates, self.assets, self.values)
+        self.assertEqual(listdir(self.dir_.path), [])
+
+    def test_bad_max_bytes(self):
+        with self.assertRaises(ValueError):
+            TermOutputCache(self.dir_.path, -1)
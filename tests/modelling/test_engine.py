@@ -2,14 +2,36 @@
 Tests for SimpleFFCEngine
 """
 from __future__ import division
+from itertools import chain
+import json
 from unittest import TestCase
 
+from networkx import (
+    get_node_attributes,
+    topological_sort,
+)
 from numpy import (
+    arange,
+    argmax,
+    array,
+    clip,
+    diff,
+    float16,
+    float32,
+    float64,
+    fmax,
     full,
+    inf,
     isnan,
     nan,
+    nanmax,
+    nanmean,
+    nansum,
+)
+from numpy.testing import (
+    assert_allclose,
+    assert_array_equal,
 )
-from numpy.testing import assert_array_equal
 from pandas import (
     DataFrame,
     date_range,
@@ -19,6 +41,7 @@ from pandas import (
     Series,
 )
 from pandas.util.testing import assert_frame_equal
+from six import iteritems
 from testfixtures import TempDirectory
 
 from zipline.assets import AssetFinder
@@ -38,12 +61,26 @@ from zipline.data.ffc.loaders.us_equity_pricing import (
     USEquityPricingLoader,
 )
 from zipline.finance.trading import TradingEnvironment
-from zipline.modelling.engine import SimpleFFCEngine
-from zipline.modelling.factor import TestingFactor
+from zipline.modelling.cache import TermOutputCache
+from zipline.modelling.engine import (
+    build_dependency_graph,
+    screened_terms,
+    shared_window_groups,
+    SimpleFFCEngine,
+)
+from zipline.modelling.profile import TermProfiler
+from zipline.modelling.factor import (
+    CustomBlockFactor,
+    CustomFactor,
+    TestingFactor,
+)
 from zipline.modelling.factor.technical import (
     MaxDrawdown,
+    RSI,
     SimpleMovingAverage,
+    VWAP,
 )
+from zipline.utils.control_flow import ignore_nanwarnings
 from zipline.utils.lazyval import lazyval
 from zipline.utils.test_utils import (
     make_rotating_asset_info,
@@ -61,6 +98,20 @@ class RollingSumDifference(TestingFactor):
         return (open - close).sum(axis=0)
 
 
+class RecordingLoader(ConstantLoader):
+    """
+    ConstantLoader that records the columns requested by each call to
+    load_adjusted_array.
+    """
+    def __init__(self, *args, **kwargs):
+        super(RecordingLoader, self).__init__(*args, **kwargs)
+        self.load_calls = []
+
+    def load_adjusted_array(self, columns, mask):
+        self.load_calls.append((list(columns), len(mask)))
+        return super(RecordingLoader, self).load_adjusted_array(columns, mask)
+
+
 class ConstantInputTestCase(TestCase):
 
     def setUp(self):
@@ -97,6 +148,36 @@ class ConstantInputTestCase(TestCase):
         with self.assertRaisesRegexp(ValueError, msg):
             engine.factor_matrix({}, self.dates[2], self.dates[2])
 
+    def test_bad_chunksize(self):
+        for chunksize in (0, -1):
+            with self.assertRaises(ValueError):
+                SimpleFFCEngine(
+                    self.loader,
+                    self.dates,
+                    self.asset_finder,
+                    chunksize=chunksize,
+                )
+
+    def test_bad_num_threads(self):
+        for num_threads in (0, -1):
+            with self.assertRaises(ValueError):
+                SimpleFFCEngine(
+                    self.loader,
+                    self.dates,
+                    self.asset_finder,
+                    num_threads=num_threads,
+                )
+
+    def test_bad_precision(self):
+        for precision in (float16, 'int64'):
+            with self.assertRaises(ValueError):
+                SimpleFFCEngine(
+                    self.loader,
+                    self.dates,
+                    self.asset_finder,
+                    precision=precision,
+                )
+
     def test_single_factor(self):
         loader = self.loader
         engine = SimpleFFCEngine(loader, self.dates, self.asset_finder)
@@ -149,6 +230,296 @@ class ConstantInputTestCase(TestCase):
             full(shape, -2 * high_factor.window_length),
         )
 
+    def test_atomic_terms_loaded_by_dataset(self):
+        loader = RecordingLoader(
+            constants=self.constants,
+            dates=self.dates,
+            assets=self.assets,
+        )
+        engine = SimpleFFCEngine(loader, self.dates, self.asset_finder)
+        dates = self.dates[10:15]
+        open, close = USEquityPricing.open, USEquityPricing.close
+        high, low = USEquityPricing.high, USEquityPricing.low
+
+        engine.factor_matrix(
+            {
+                'short': RollingSumDifference(inputs=[open, close]),
+                'long': RollingSumDifference(
+                    inputs=[high, low],
+                    window_length=5,
+                ),
+            },
+            dates[0],
+            dates[-1],
+        )
+
+        # Columns needing the same number of extra rows are loaded together.
+        calls = sorted(
+            (sorted(column.name for column in columns), nrows)
+            for columns, nrows in loader.load_calls
+        )
+        self.assertEqual(
+            calls,
+            [
+                (['close', 'open'], len(dates) + 2),
+                (['high', 'low'], len(dates) + 4),
+            ],
+        )
+
+    def test_shared_window_groups(self):
+        open, close = USEquityPricing.open, USEquityPricing.close
+        high, low = USEquityPricing.high, USEquityPricing.low
+
+        open_close = RollingSumDifference(inputs=[open, close])
+        close_low = RollingSumDifference(inputs=[close, low])
+        low_high = RollingSumDifference(inputs=[low, high])
+        # Same inputs as open_close, but a different window length.
+        long_open_close = RollingSumDifference(
+            inputs=[open, close],
+            window_length=5,
+        )
+        terms = [open_close, close_low, low_high, long_open_close]
+
+        group = (open_close, close_low, low_high)
+        self.assertEqual(
+            shared_window_groups(terms),
+            {open_close: group, close_low: group, low_high: group},
+        )
+
+        graph = build_dependency_graph(terms)
+        ordered = topological_sort(graph)
+        tasks = SimpleFFCEngine._plan_tasks(
+            ordered,
+            get_node_attributes(graph, 'extra_rows'),
+        )
+        self.assertIn(group, tasks)
+        self.assertIn((long_open_close,), tasks)
+
+        # Every input of the group is loaded before the group is computed.
+        group_idx = tasks.index(group)
+        loaded = {
+            term for term in chain.from_iterable(tasks[:group_idx])
+            if term.atomic
+        }
+        self.assertEqual(loaded, {open, close, high, low})
+
+    def test_screened_terms(self):
+        open, close = USEquityPricing.open, USEquityPricing.close
+
+        screen_input = SimpleMovingAverage(inputs=[close], window_length=2)
+        screen = screen_input.top(2)
+        sma = SimpleMovingAverage(inputs=[open], window_length=3)
+        difference = sma - screen_input
+        # Ranks depend on every asset, so neither they nor their inputs can
+        # be screened.
+        ranked = SimpleMovingAverage(inputs=[open], window_length=2).rank()
+        # Custom factors aren't assumed to be assetwise.
+        custom = RollingSumDifference()
+
+        outputs = [screen, sma, difference, ranked, custom]
+        graph = build_dependency_graph(outputs)
+        self.assertEqual(screened_terms(graph, outputs), {sma, difference})
+
+        # Without screens, nothing is screened.
+        outputs = [sma, difference, ranked, custom]
+        graph = build_dependency_graph(outputs)
+        self.assertEqual(screened_terms(graph, outputs), set())
+
+    def test_intermediates_released(self):
+        engine = SimpleFFCEngine(self.loader, self.dates, self.asset_finder)
+        high, low = USEquityPricing.high, USEquityPricing.low
+        open, close = USEquityPricing.open, USEquityPricing.close
+
+        high_minus_low = RollingSumDifference(inputs=[high, low])
+        open_minus_close = RollingSumDifference(inputs=[open, close])
+        avg = (high_minus_low + open_minus_close) / 2
+
+        # high_minus_low is both an intermediate and a requested output, so
+        # it should survive until the end of the computation.
+        outputs = [high_minus_low, avg]
+        graph = build_dependency_graph(outputs)
+        mask = DataFrame(True, index=self.dates[10:17], columns=self.assets)
+
+        workspace = engine.compute_chunk(graph, mask, outputs)
+        self.assertEqual(set(workspace), set(outputs))
+
+    def test_compute_chunk_legacy_signature(self):
+        engine = SimpleFFCEngine(self.loader, self.dates, self.asset_finder)
+        high, low = USEquityPricing.high, USEquityPricing.low
+        open, close = USEquityPricing.open, USEquityPricing.close
+        high_minus_low = RollingSumDifference(inputs=[high, low])
+        open_minus_close = RollingSumDifference(inputs=[open, close])
+        avg = (high_minus_low + open_minus_close) / 2
+
+        graph = build_dependency_graph([avg])
+        mask = DataFrame(True, index=self.dates[10:17], columns=self.assets)
+        expected = engine.compute_chunk(graph, mask, [avg])
+
+        # The old signature retains every term.
+        ordered_terms = list(topological_sort(graph))
+        workspace = engine.compute_chunk(
+            ordered_terms,
+            get_node_attributes(graph, 'extra_rows'),
+            mask,
+        )
+        self.assertEqual(set(workspace), set(ordered_terms))
+        assert_array_equal(workspace[avg], expected[avg])
+
+    def test_cached_terms_not_recomputed(self):
+        tmp = TempDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        loader = RecordingLoader(
+            constants=self.constants,
+            dates=self.dates,
+            assets=self.assets,
+        )
+        loader.data_version = 'v1'
+        engine = SimpleFFCEngine(
+            loader,
+            self.dates,
+            self.asset_finder,
+            cache=TermOutputCache(tmp.path, 1 << 20),
+        )
+        high, low = USEquityPricing.high, USEquityPricing.low
+        high_minus_low = RollingSumDifference(inputs=[high, low])
+        terms = {'high_low': high_minus_low, 'rank': high_minus_low.rank()}
+        dates = self.dates[10:15]
+
+        uncached = SimpleFFCEngine(self.loader, self.dates, self.asset_finder)
+        expected = uncached.factor_matrix(terms, dates[0], dates[-1])
+        expected_subrange = uncached.factor_matrix(terms, dates[1], dates[3])
+
+        assert_frame_equal(
+            engine.factor_matrix(terms, dates[0], dates[-1]),
+            expected,
+        )
+        self.assertTrue(loader.load_calls)
+
+        # Every term is now cached, so nothing should be loaded, including
+        # when we ask for a sub-range of the cached dates.
+        del loader.load_calls[:]
+        assert_frame_equal(
+            engine.factor_matrix(terms, dates[0], dates[-1]),
+            expected,
+        )
+        assert_frame_equal(
+            engine.factor_matrix(terms, dates[1], dates[3]),
+            expected_subrange,
+        )
+        self.assertEqual(loader.load_calls, [])
+
+        # A new data version invalidates the cache.
+        loader.data_version = 'v2'
+        engine.factor_matrix(terms, dates[0], dates[-1])
+        self.assertTrue(loader.load_calls)
+
+    def test_parallel_compute(self):
+        high, low = USEquityPricing.high, USEquityPricing.low
+        open, close = USEquityPricing.open, USEquityPricing.close
+        high_minus_low = RollingSumDifference(inputs=[high, low])
+        open_minus_close = RollingSumDifference(inputs=[open, close])
+        terms = {
+            'high_low': high_minus_low,
+            'open_close': open_minus_close,
+            'long': RollingSumDifference(window_length=5),
+            'avg': (high_minus_low + open_minus_close) / 2,
+            'rank': open_minus_close.rank(),
+        }
+        dates = self.dates[10:15]
+
+        serial = SimpleFFCEngine(self.loader, self.dates, self.asset_finder)
+        expected = serial.factor_matrix(terms, dates[0], dates[-1])
+
+        for num_threads in (1, 4):
+            engine = SimpleFFCEngine(
+                self.loader,
+                self.dates,
+                self.asset_finder,
+                num_threads=num_threads,
+            )
+            result = engine.factor_matrix(terms, dates[0], dates[-1])
+            assert_frame_equal(result.sort_index(axis=1),
+                               expected.sort_index(axis=1))
+
+    def test_parallel_compute_error(self):
+        class Broken(TestingFactor):
+            window_length = 2
+            inputs = [USEquityPricing.close]
+
+            def from_windows(self, close):
+                raise ZeroDivisionError()
+
+        engine = SimpleFFCEngine(
+            self.loader,
+            self.dates,
+            self.asset_finder,
+            num_threads=2,
+        )
+        with self.assertRaises(ZeroDivisionError):
+            engine.factor_matrix(
+                {'broken': Broken(), 'ok': RollingSumDifference()},
+                self.dates[10],
+                self.dates[15],
+            )
+
+    def test_profiler(self):
+        high, low = USEquityPricing.high, USEquityPricing.low
+        high_minus_low = RollingSumDifference(inputs=[high, low])
+        ranked = high_minus_low.rank()
+        terms = {'high_low': high_minus_low, 'rank': ranked}
+        dates = self.dates[10:15]
+
+        for num_threads in (None, 2):
+            profiler = TermProfiler()
+            engine = SimpleFFCEngine(
+                self.loader,
+                self.dates,
+                self.asset_finder,
+                chunksize=3,
+                num_threads=num_threads,
+                profiler=profiler,
+            )
+            engine.factor_matrix(terms, dates[0], dates[-1])
+
+            report = profiler.report()
+            self.assertEqual(
+                set(report.index),
+                {high, low, high_minus_low, ranked},
+            )
+            # Every term is computed once per chunk.
+            self.assertTrue((report['executions'] == 2).all())
+            self.assertTrue((report['wall_time'] >= 0).all())
+
+            for column in high, low:
+                self.assertEqual(report.loc[column, 'compute_time'], 0)
+                self.assertEqual(report.loc[column, 'extra_rows'], 2)
+            for term in high_minus_low, ranked:
+                self.assertEqual(report.loc[term, 'load_time'], 0)
+                self.assertEqual(report.loc[term, 'extra_rows'], 0)
+
+            # The first chunk computes 3 days of 3 assets in float64.
+            self.assertEqual(report.loc[ranked, 'output_bytes'], 3 * 3 * 8)
+            self.assertGreaterEqual(
+                report.loc[ranked, 'peak_workspace_bytes'],
+                2 * 3 * 3 * 8,
+            )
+
+            timeline = profiler.timeline()
+            self.assertEqual(len(timeline), 8)
+            self.assertTrue((timeline['end'] >= timeline['start']).all())
+
+            tmp = TempDirectory()
+            self.addCleanup(tmp.cleanup)
+            path = tmp.getpath('timeline.json')
+            profiler.write_timeline(path)
+            with open(path) as f:
+                events = json.load(f)['traceEvents']
+            self.assertEqual(len(events), 8)
+
+            profiler.reset()
+            self.assertEqual(len(profiler.report()), 0)
+
     def test_numeric_factor(self):
         constants = self.constants
         loader = self.loader
@@ -235,6 +606,363 @@ class FrameInputTestCase(TestCase):
         return DataFrame(data, columns=self.assets, index=self.dates)
 
     def test_compute_with_adjustments(self):
+        self.check_compute_with_adjustments(chunksize=None)
+
+    def test_chunked_compute_with_adjustments(self):
+        # Chunk boundaries shouldn't affect results, even when adjustments
+        # apply to dates falling in earlier chunks.
+        for chunksize in (1, 4):
+            self.check_compute_with_adjustments(chunksize=chunksize)
+
+    def make_adjusted_loader(self):
+        """
+        Make a loader for USEquityPricing.low and USEquityPricing.high where
+        highs have adjustments applied on two dates.
+        """
+        dates, assets = self.dates, self.assets
+        low, high = USEquityPricing.low, USEquityPricing.high
+        adjustments = DataFrame.from_records(
+            [
+                dict(
+                    kind=MULTIPLY,
+                    sid=assets[1],
+                    value=2.0,
+                    start_date=None,
+                    end_date=dates[9],
+                    apply_date=dates[10],
+                ),
+                dict(
+                    kind=MULTIPLY,
+                    sid=assets[2],
+                    value=3.0,
+                    start_date=None,
+                    end_date=dates[12],
+                    apply_date=dates[13],
+                ),
+            ]
+        )
+        high_base = DataFrame(
+            arange(len(dates) * len(assets), dtype=float).reshape(
+                len(dates),
+                len(assets),
+            ),
+            index=dates,
+            columns=assets,
+        )
+        return MultiColumnLoader({
+            low: DataFrameFFCLoader(low, DataFrame(self.make_frame(30.0))),
+            high: DataFrameFFCLoader(high, high_base, adjustments),
+        })
+
+    def test_block_factor_with_adjustments(self):
+        dates = self.dates
+        loader = self.make_adjusted_loader()
+
+        class BlockMean(CustomBlockFactor):
+            def compute(self, dates, assets, out, data):
+                self.block_lengths.append(len(dates))
+                out[:] = data.mean(axis=1)
+
+        for window_length in range(1, 5):
+            block_mean = BlockMean(
+                inputs=[USEquityPricing.high],
+                window_length=window_length,
+            )
+            block_mean.block_lengths = []
+            sma = SimpleMovingAverage(
+                inputs=[USEquityPricing.high],
+                window_length=window_length,
+            )
+            for chunksize in (None, 4):
+                engine = SimpleFFCEngine(
+                    loader,
+                    self.dates,
+                    self.asset_finder,
+                    chunksize=chunksize,
+                )
+                results = engine.factor_matrix(
+                    {'block': block_mean, 'sma': sma},
+                    dates[5],
+                    dates[-1],
+                )
+                assert_array_equal(
+                    results['block'].values,
+                    results['sma'].values,
+                )
+
+            # Dates between adjustments should have been computed together.
+            self.assertGreater(max(block_mean.block_lengths), 1)
+
+    def test_rolling_technical_factors_with_adjustments(self):
+        self.check_rolling_technical_factors(self.make_adjusted_loader())
+
+    def test_rolling_technical_factors_with_gaps(self):
+        # Flat prices, NaN gaps and zero weights following valid rows.  The
+        # incremental kernels remove the earlier values from their running
+        # sums, which must then be exactly 0 rather than rounding errors.
+        # Prices span several orders of magnitude so that those sums aren't
+        # computed exactly.
+        prices = array([
+            [0.5, 2.3, 88.4], [120.3, 140.2, 0.4], [3.7, 0.8, 512.6],
+            [987.1, 56.1, 6.1], [0.2, 601.7, 99.7], [45.6, 9.4, 0.3],
+            [1.1, nan, 27.7], [310.9, nan, 27.7], [62.9, nan, nan],
+            [7.3, nan, 27.7], [7.3, nan, 27.7], [7.3, nan, nan],
+            [7.3, nan, 27.7], [7.3, 12.2, 27.7], [7.3, 480.3, 27.7],
+            [7.3, 0.6, 0.7], [52.1, 75.5, 144.6], [0.9, 3.3, nan],
+            [230.4, 210.8, 5.8], [15.5, 1.9, 301.2],
+        ])
+        weights = array([
+            [1200.5, 5.1, 310.4], [3.7, 730.2, 0.6], [45000.2, 18.8, 8800.2],
+            [0.9, 2600.4, 47.3], [870.3, 0.7, 1.9], [12.6, 95.3, 0.0],
+            [0.02, 410.6, 0.0], [5310.8, 3.3, 0.0], [nan, 7700.1, 0.0],
+            [nan, 64.2, 0.0], [nan, 0.5, 0.0], [nan, 1290.9, 0.0],
+            [nan, 22.4, 620.5], [nan, 380.8, 3.4], [nan, 9.9, 90.1],
+            [33.3, 4410.3, 0.0], [2.1, 0.8, 2150.7], [910.4, 57.7, 11.2],
+            [75.0, 830.1, 0.3], [1.6, 6.6, 740.8],
+        ])
+        low, high = USEquityPricing.low, USEquityPricing.high
+        loader = MultiColumnLoader({
+            low: DataFrameFFCLoader(low, self.make_frame(weights)),
+            high: DataFrameFFCLoader(high, self.make_frame(prices)),
+        })
+        self.check_rolling_technical_factors(loader)
+
+    def check_rolling_technical_factors(self, loader):
+        """
+        Check that the technical factors computed by incremental kernels
+        match naive implementations, using USEquityPricing.high as prices and
+        USEquityPricing.low as weights.
+        """
+        dates = self.dates
+        low, high = USEquityPricing.low, USEquityPricing.high
+
+        class NaiveRSI(CustomFactor):
+            ctx = ignore_nanwarnings()
+
+            def compute(self, today, assets, out, closes):
+                diffs = diff(closes, axis=0)
+                ups = nanmean(clip(diffs, 0, inf), axis=0)
+                downs = nanmean(clip(diffs, -inf, 0), axis=0)
+                out[:] = 100 - (100 / (1 + (ups / downs)))
+
+        class NaiveVWAP(CustomFactor):
+            def compute(self, today, assets, out, base, weight):
+                out[:] = nansum(base * weight, axis=0) / nansum(weight, axis=0)
+
+        class NaiveMaxDrawdown(CustomFactor):
+            ctx = ignore_nanwarnings()
+
+            def compute(self, today, assets, out, data):
+                drawdowns = fmax.accumulate(data, axis=0) - data
+                drawdowns[isnan(drawdowns)] = -inf
+                drawdown_ends = argmax(drawdowns, axis=0)
+                for i, end in enumerate(drawdown_ends):
+                    peak = nanmax(data[:end + 1, i])
+                    out[i] = (peak - data[end, i]) / data[end, i]
+
+        for window_length in range(1, 6):
+            terms = {
+                'drawdown': MaxDrawdown(
+                    inputs=[high],
+                    window_length=window_length,
+                ),
+                'naive_drawdown': NaiveMaxDrawdown(
+                    inputs=[high],
+                    window_length=window_length,
+                ),
+                'rsi': RSI(inputs=[high], window_length=window_length),
+                'naive_rsi': NaiveRSI(
+                    inputs=[high],
+                    window_length=window_length,
+                ),
+                'vwap': VWAP(inputs=[high, low], window_length=window_length),
+                'naive_vwap': NaiveVWAP(
+                    inputs=[high, low],
+                    window_length=window_length,
+                ),
+            }
+            for chunksize in (None, 4):
+                engine = SimpleFFCEngine(
+                    loader,
+                    dates,
+                    self.asset_finder,
+                    chunksize=chunksize,
+                )
+                results = engine.factor_matrix(terms, dates[5], dates[-1])
+                for name in 'drawdown', 'rsi', 'vwap':
+                    assert_allclose(
+                        results[name].values,
+                        results['naive_' + name].values,
+                    )
+
+    def test_screen_pushdown(self):
+        dates = self.dates
+        low, high = USEquityPricing.low, USEquityPricing.high
+        loader = self.make_adjusted_loader()
+
+        loads = []
+        load_adjusted_array = loader.load_adjusted_array
+
+        def recording_load(columns, mask):
+            loads.append((set(columns), list(mask.columns)))
+            return load_adjusted_array(columns, mask)
+        loader.load_adjusted_array = recording_load
+
+        high_sma = SimpleMovingAverage(inputs=[high], window_length=3)
+        low_sma = SimpleMovingAverage(inputs=[low], window_length=4)
+        unscreened = {
+            'high_sma': high_sma,
+            'low_sma': low_sma,
+            'sum': low_sma + high_sma,
+            'rank': SimpleMovingAverage(inputs=[low], window_length=2).rank(),
+        }
+        terms = dict(unscreened, top=high_sma.top(1))
+
+        for chunksize in (None, 4):
+            engine = SimpleFFCEngine(
+                loader,
+                dates,
+                self.asset_finder,
+                chunksize=chunksize,
+            )
+            expected = engine.factor_matrix(unscreened, dates[5], dates[-1])
+
+            del loads[:]
+            results = engine.factor_matrix(terms, dates[5], dates[-1])
+
+            # One asset passes on each date.
+            self.assertEqual(len(results), len(dates) - 5)
+            assert_frame_equal(
+                results,
+                expected.reindex(results.index)[results.columns],
+            )
+
+            # Lows for low_sma are only loaded for assets passing the screen
+            # in each chunk.
+            passed = results.index.get_level_values(1).unique()
+            self.assertLess(len(passed), len(self.assets))
+            screened_loads = [
+                assets for columns, assets in loads
+                if columns == {low} and len(assets) < len(self.assets)
+            ]
+            self.assertTrue(screened_loads)
+            for assets in screened_loads:
+                self.assertTrue(set(assets) <= set(passed))
+
+    def test_float32_precision(self):
+        dates = self.dates
+        loader = self.make_adjusted_loader()
+        low, high = USEquityPricing.low, USEquityPricing.high
+
+        class PreciseSMA(SimpleMovingAverage):
+            needs_float64 = True
+
+        def compute(terms, precision):
+            engine = SimpleFFCEngine(
+                loader,
+                dates,
+                self.asset_finder,
+                precision=precision,
+            )
+            return engine.factor_matrix(terms, dates[5], dates[-1])
+
+        terms = {
+            'high': SimpleMovingAverage(inputs=[high], window_length=3),
+            'low': SimpleMovingAverage(inputs=[low], window_length=3),
+        }
+        expected = compute(terms, float64)
+        results = compute(terms, float32)
+        for name in terms:
+            self.assertEqual(results[name].dtype, float32)
+            assert_allclose(
+                results[name].values,
+                expected[name].values,
+                rtol=1e-6,
+            )
+
+        # Terms that need float64 are computed from float64 inputs.
+        results = compute(
+            {
+                'high': PreciseSMA(inputs=[high], window_length=3),
+                'low': terms['low'],
+            },
+            float32,
+        )
+        self.assertEqual(results['high'].dtype, float64)
+        assert_array_equal(results['high'].values, expected['high'].values)
+        self.assertEqual(results['low'].dtype, float32)
+
+    def test_shared_windows_with_adjustments(self):
+        dates = self.dates
+        loader = self.make_adjusted_loader()
+        low, high = USEquityPricing.low, USEquityPricing.high
+
+        class BlockMean(CustomBlockFactor):
+            def compute(self, dates, assets, out, data):
+                out[:] = data.mean(axis=1)
+
+        # All of these read high with the same window length, so they're
+        # computed together from shared window iterators.
+        terms = {
+            'sma': SimpleMovingAverage(inputs=[high], window_length=3),
+            'block': BlockMean(inputs=[high], window_length=3),
+            'diff': RollingSumDifference(inputs=[high, low]),
+            'rank': RollingSumDifference(inputs=[low, high]).rank(),
+        }
+        for chunksize in (None, 4):
+            engine = SimpleFFCEngine(
+                loader,
+                self.dates,
+                self.asset_finder,
+                chunksize=chunksize,
+            )
+            results = engine.factor_matrix(terms, dates[5], dates[-1])
+            for name, term in iteritems(terms):
+                expected = engine.factor_matrix(
+                    {name: term},
+                    dates[5],
+                    dates[-1],
+                )
+                assert_frame_equal(results[[name]], expected)
+
+            rows = engine.stream_factor_matrix(terms, dates[5], dates[-1])
+            for date, frame in rows:
+                assert_frame_equal(
+                    frame,
+                    results.loc[date],
+                    check_names=False,
+                )
+
+    def test_stream_with_adjustments(self):
+        dates = self.dates
+        low, high = USEquityPricing.low, USEquityPricing.high
+        loader = self.make_adjusted_loader()
+        terms = {
+            'low': SimpleMovingAverage(inputs=[low], window_length=3),
+            'high': SimpleMovingAverage(inputs=[high], window_length=4),
+        }
+
+        for chunksize in (None, 1, 4):
+            engine = SimpleFFCEngine(
+                loader,
+                self.dates,
+                self.asset_finder,
+                chunksize=chunksize,
+            )
+            expected = engine.factor_matrix(terms, dates[5], dates[-1])
+            rows = list(
+                engine.stream_factor_matrix(terms, dates[5], dates[-1])
+            )
+
+            self.assertEqual([date for date, _ in rows], list(dates[5:]))
+            for date, frame in rows:
+                assert_frame_equal(
+                    frame,
+                    expected.loc[date],
+                    check_names=False,
+                )
+
+    def check_compute_with_adjustments(self, chunksize):
         dates, assets = self.dates, self.assets
         low, high = USEquityPricing.low, USEquityPricing.high
         apply_idxs = [3, 10, 16]
@@ -282,7 +1010,12 @@ class FrameInputTestCase(TestCase):
         high_loader = DataFrameFFCLoader(high, high_base, adjustments)
         loader = MultiColumnLoader({low: low_loader, high: high_loader})
 
-        engine = SimpleFFCEngine(loader, self.dates, self.asset_finder)
+        engine = SimpleFFCEngine(
+            loader,
+            self.dates,
+            self.asset_finder,
+            chunksize=chunksize,
+        )
 
         for window_length in range(1, 4):
             low_mavg = SimpleMovingAverage(
@@ -392,6 +1125,89 @@ class SyntheticBcolzTestCase(TestCase):
             ),
         )
 
+    def test_chunked_SMA(self):
+        dates = self.all_dates
+        window_length = 5
+        SMA = SimpleMovingAverage(
+            inputs=(USEquityPricing.close,),
+            window_length=window_length,
+        )
+        terms = {'sma': SMA}
+        start_date, end_date = dates[window_length], dates[-1]
+
+        expected = SimpleFFCEngine(
+            self.ffc_loader,
+            self.env.trading_days,
+            self.finder,
+        ).factor_matrix(terms, start_date, end_date)
+
+        for chunksize in (1, 3, 7, len(dates)):
+            engine = SimpleFFCEngine(
+                self.ffc_loader,
+                self.env.trading_days,
+                self.finder,
+                chunksize=chunksize,
+            )
+            result = engine.factor_matrix(terms, start_date, end_date)
+            assert_frame_equal(
+                result['sma'].unstack(),
+                expected['sma'].unstack(),
+            )
+
+    def test_factor_arrays(self):
+        engine = SimpleFFCEngine(
+            self.ffc_loader,
+            self.env.trading_days,
+            self.finder,
+        )
+        dates = self.all_dates
+        SMA = SimpleMovingAverage(
+            inputs=(USEquityPricing.close,),
+            window_length=5,
+        )
+        # Only keep the top half of assets on each day, so that the output
+        # skips some date/asset pairs.
+        terms = {'sma': SMA, 'top': SMA.percentile_between(50, 100)}
+
+        expected = engine.factor_matrix(terms, dates[5], dates[-1])
+        result_dates, result_assets, result_factors = engine.factor_arrays(
+            terms,
+            dates[5],
+            dates[-1],
+        )
+        self.assertEqual(set(result_factors), {'sma'})
+        assert_array_equal(
+            result_dates,
+            expected.index.get_level_values(0).values,
+        )
+        assert_array_equal(
+            result_assets,
+            expected.index.get_level_values(1).values,
+        )
+        assert_array_equal(result_factors['sma'], expected['sma'].values)
+
+    def test_stream_factor_matrix(self):
+        engine = SimpleFFCEngine(
+            self.ffc_loader,
+            self.env.trading_days,
+            self.finder,
+        )
+        dates = self.all_dates
+        SMA = SimpleMovingAverage(
+            inputs=(USEquityPricing.close,),
+            window_length=5,
+        )
+        terms = {'sma': SMA, 'top': SMA.percentile_between(50, 100)}
+
+        expected = engine.factor_matrix(terms, dates[5], dates[-1])
+        rows = engine.stream_factor_matrix(terms, dates[5], dates[-1])
+        for date, frame in rows:
+            assert_frame_equal(
+                frame,
+                expected.loc[date],
+                check_names=False,
+            )
+
     def test_drawdown(self):
         # The monotonically-increasing data produced by SyntheticDailyBarWriter
         # exercises two pathological cases for MaxDrawdown.  The actual
@@ -5,6 +5,7 @@ from unittest import TestCase
 
 from numpy import (
     array,
+    nan,
 )
 from numpy.testing import assert_array_equal
 from pandas import (
@@ -87,3 +88,49 @@ class FactorTestCase(TestCase):
                 self.mask,
             )
             assert_array_equal(result, expected_ranks[method])
+
+    def test_rank_missing_values(self):
+        data = array([[3., nan, 1., 1., 2.],
+                      [4., 3., 2., 1., 0.],
+                      [nan, nan, nan, nan, nan],
+                      [1., 1., 1., 1., 1.],
+                      [5., 4., nan, 2., 1.]])
+        mask = self.mask.copy()
+        mask.iloc[1, [0, 4]] = False
+        mask.iloc[3, 2] = False
+
+        # NaNs and masked-out values have a rank of NaN and don't take up a
+        # rank.
+        expected_ranks = {
+            'ordinal': array([[4., nan, 1., 2., 3.],
+                              [nan, 3., 2., 1., nan],
+                              [nan, nan, nan, nan, nan],
+                              [1., 2., nan, 3., 4.],
+                              [4., 3., nan, 2., 1.]]),
+            'average': array([[4., nan, 1.5, 1.5, 3.],
+                              [nan, 3., 2., 1., nan],
+                              [nan, nan, nan, nan, nan],
+                              [2.5, 2.5, nan, 2.5, 2.5],
+                              [4., 3., nan, 2., 1.]]),
+            'min': array([[4., nan, 1., 1., 3.],
+                          [nan, 3., 2., 1., nan],
+                          [nan, nan, nan, nan, nan],
+                          [1., 1., nan, 1., 1.],
+                          [4., 3., nan, 2., 1.]]),
+            'max': array([[4., nan, 2., 2., 3.],
+                          [nan, 3., 2., 1., nan],
+                          [nan, nan, nan, nan, nan],
+                          [4., 4., nan, 4., 4.],
+                          [4., 3., nan, 2., 1.]]),
+            'dense': array([[3., nan, 1., 1., 2.],
+                            [nan, 3., 2., 1., nan],
+                            [nan, nan, nan, nan, nan],
+                            [1., 1., nan, 1., 1.],
+                            [4., 3., nan, 2., 1.]]),
+        }
+        for method, expected_result in iteritems(expected_ranks):
+            result = self.f.rank(method=method).compute_from_arrays(
+                [data],
+                mask,
+            )
+            assert_array_equal(result, expected_result)
@@ -3,16 +3,25 @@ Tests for filter terms.
 """
 from unittest import TestCase
 
+from warnings import (
+    catch_warnings,
+    simplefilter,
+)
+
 from numpy import (
     arange,
     array,
     eye,
     float64,
+    inf,
+    isnan,
     nan,
     nanpercentile,
     ones_like,
     putmask,
+    where,
 )
+from numpy.random import RandomState
 from numpy.testing import assert_array_equal
 
 from pandas import (
@@ -21,7 +30,10 @@ from pandas import (
     Int64Index,
 )
 
-from zipline.errors import BadPercentileBounds
+from zipline.errors import (
+    BadPercentileBounds,
+    BadTopBottomN,
+)
 from zipline.modelling.factor import TestingFactor
 
 
@@ -153,6 +165,108 @@ class FilterTestCase(TestCase):
                 (min_value <= nandata) & (nandata <= max_value),
             )
 
+    def test_top_and_bottom(self):
+        data = array([[5., 1., nan, 3., 4.],
+                      [1., 2., 3., 4., 5.],
+                      [nan, nan, 2., nan, 1.],
+                      [4., 3., 2., 1., 0.],
+                      [1., 5., 2., 4., 3.]])
+        mask = self.mask.copy()
+        mask.iloc[3, 0] = False
+
+        top2 = self.f.top(2).compute_from_arrays([data], mask)
+        assert_array_equal(
+            top2,
+            array([[1, 0, 0, 0, 1],
+                   [0, 0, 0, 1, 1],
+                   [0, 0, 1, 0, 1],
+                   [0, 1, 1, 0, 0],
+                   [0, 1, 0, 1, 0]], dtype=bool),
+        )
+
+        bottom2 = self.f.bottom(2).compute_from_arrays([data], mask)
+        assert_array_equal(
+            bottom2,
+            array([[0, 1, 0, 1, 0],
+                   [1, 1, 0, 0, 0],
+                   [0, 0, 1, 0, 1],
+                   [0, 0, 0, 1, 1],
+                   [1, 0, 1, 0, 0]], dtype=bool),
+        )
+
+        # Requesting more assets than there are selects every valid value.
+        top10 = self.f.top(10).compute_from_arrays([data], mask)
+        assert_array_equal(top10, ~isnan(data) & mask.values)
+
+    def test_rank_percentile_random(self):
+        rand = RandomState(1234)
+        for _ in range(100):
+            shape = rand.randint(1, 8), rand.randint(1, 12)
+            # Draw from a few integers so that there are plenty of ties.
+            data = rand.randint(-3, 4, shape).astype(float64)
+            data[rand.uniform(size=shape) < 0.2] = nan
+            mask = rand.uniform(size=shape) < 0.8
+            lower_bound = rand.randint(0, 20) * 5.0
+            upper_bound = rand.randint(lower_bound / 5 + 1, 21) * 5.0
+
+            factor = self.f.percentile_between(lower_bound, upper_bound)
+            result = factor.compute_from_arrays([data], self.maskframe(mask))
+
+            masked = where(mask, data, nan)
+            with catch_warnings():
+                # nanpercentile warns about rows with no valid values.
+                simplefilter('ignore')
+                min_value = nanpercentile(
+                    masked,
+                    lower_bound,
+                    axis=1,
+                    keepdims=True,
+                )
+                max_value = nanpercentile(
+                    masked,
+                    upper_bound,
+                    axis=1,
+                    keepdims=True,
+                )
+            assert_array_equal(
+                result,
+                (min_value <= masked) & (masked <= max_value),
+            )
+
+    def test_top_and_bottom_with_infs(self):
+        data = array([[inf, inf, 1., nan, -inf],
+                      [-inf, -inf, -inf, 0., inf],
+                      [nan, inf, nan, nan, inf]])
+        mask = ones_like(data, dtype=bool)
+        mask[1, 1] = False
+
+        # Valid infinite values are selected rather than invalid entries,
+        # and ties are broken in favor of the first assets.
+        top2 = self.f.top(2).compute_from_arrays([data], self.maskframe(mask))
+        assert_array_equal(
+            top2,
+            array([[1, 1, 0, 0, 0],
+                   [0, 0, 0, 1, 1],
+                   [0, 1, 0, 0, 1]], dtype=bool),
+        )
+        bottom2 = self.f.bottom(2).compute_from_arrays(
+            [data],
+            self.maskframe(mask),
+        )
+        assert_array_equal(
+            bottom2,
+            array([[0, 0, 1, 0, 1],
+                   [1, 0, 1, 0, 0],
+                   [0, 1, 0, 0, 1]], dtype=bool),
+        )
+
+    def test_bad_top_bottom_n(self):
+        for N in (0, -1, 2.5, True):
+            with self.assertRaises(BadTopBottomN):
+                self.f.top(N)
+            with self.assertRaises(BadTopBottomN):
+                self.f.bottom(N)
+
     def test_sequenced_filter(self):
         first = SomeFactor() < 1
         first_input = eye(5)
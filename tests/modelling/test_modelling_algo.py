@@ -34,6 +34,7 @@ from zipline.api import (
 )
 from zipline.assets import AssetFinder
 # from zipline.data.equities import USEquityPricing
+from zipline.data.ffc.base import FFCLoader
 from zipline.data.ffc.loaders.us_equity_pricing import (
     BcolzDailyBarReader,
     DailyBarWriterFromCSVs,
@@ -70,6 +71,19 @@ def rolling_vwap(df, length):
     return Series(out, index=df.index)
 
 
+class RecordingLoader(FFCLoader):
+    """
+    Loader that records the shape of each mask it's asked to load.
+    """
+    def __init__(self, loader):
+        self.loader = loader
+        self.shapes = []
+
+    def load_adjusted_array(self, columns, mask):
+        self.shapes.append(mask.shape)
+        return self.loader.load_adjusted_array(columns, mask)
+
+
 class FFCAlgorithmTestCase(TestCase):
 
     @classmethod
@@ -152,6 +166,21 @@ class FFCAlgorithmTestCase(TestCase):
         return Panel(self.raw_data).tz_localize('UTC', axis=1)
 
     def test_handle_adjustment(self):
+        self.check_handle_adjustment(self.ffc_loader)
+
+    def test_handle_adjustment_chunked(self):
+        loader = RecordingLoader(self.ffc_loader)
+        self.check_handle_adjustment(loader, ffc_chunksize=20)
+
+        # Each load covers at most one chunk plus the extra rows needed by
+        # the longest window, rather than the rest of the simulation.
+        self.assertGreater(len(loader.shapes), 1)
+        self.assertLessEqual(
+            max(nrows for nrows, _ in loader.shapes),
+            20 + 10 - 1,
+        )
+
+    def check_handle_adjustment(self, loader, **algo_kwargs):
         AAPL, MSFT, BRK_A = assets = self.AAPL, self.MSFT, self.BRK_A
         raw_data = self.raw_data
         adjusted_data = {k: v.copy() for k, v in iteritems(raw_data)}
@@ -201,10 +230,11 @@ class FFCAlgorithmTestCase(TestCase):
             initialize=initialize,
             handle_data=handle_data,
             data_frequency='daily',
-            ffc_loader=self.ffc_loader,
+            ffc_loader=loader,
             asset_finder=self.asset_finder,
             start=self.dates[max(window_lengths)],
             end=self.dates[-1],
+            **algo_kwargs
         )
 
         algo.run(
@@ -0,0 +1,116 @@
+"""
+Tests for zipline.modelling.optimize.
+"""
+from unittest import TestCase
+
+from numpy import arange, array, float64
+
+from zipline.modelling.factor import TestingFactor
+from zipline.modelling.factor.factor import NumExprFactor, Rank
+from zipline.modelling.filter import NumExprFilter
+from zipline.modelling.optimize import optimize_terms
+
+
+class F(TestingFactor):
+    inputs = ()
+    window_length = 0
+
+
+class G(TestingFactor):
+    inputs = ()
+    window_length = 0
+
+
+class H(TestingFactor):
+    inputs = ()
+    window_length = 0
+
+
+class OptimizeTestCase(TestCase):
+
+    def setUp(self):
+        self.f = F()
+        self.g = G()
+        self.h = H()
+
+    def optimize(self, term):
+        return optimize_terms([term])[term]
+
+    def test_constant_folding(self):
+        term = NumExprFactor("x_0 * (2 * 3.5) + (1 - 1)", (self.f,))
+        optimized = self.optimize(term)
+        self.assertEqual(optimized._expr, "((x_0) * (7.0)) + (0)")
+        self.assertEqual(optimized.inputs, (self.f,))
+
+    def test_integer_division_not_folded(self):
+        term = NumExprFactor("x_0 * (1 / 2)", (self.f,))
+        optimized = self.optimize(term)
+        self.assertEqual(optimized._expr, "(x_0) * ((1) / (2))")
+
+    def test_permuted_inputs_deduplicated(self):
+        f, g = self.f, self.g
+        forward = NumExprFactor("x_0 - x_1", (f, g))
+        backward = NumExprFactor("x_1 - x_0", (g, f))
+        self.assertIsNot(forward, backward)
+
+        optimized = optimize_terms([forward, backward])
+        self.assertIs(optimized[forward], optimized[backward])
+
+        # Consumers of deduplicated terms are deduplicated as well.
+        forward_rank, backward_rank = forward.rank(), backward.rank()
+        optimized = optimize_terms([forward_rank, backward_rank])
+        self.assertIsInstance(optimized[forward_rank], Rank)
+        self.assertIs(optimized[forward_rank], optimized[backward_rank])
+        self.assertEqual(optimized[forward_rank].inputs, (optimized[forward],))
+
+    def test_inline_intermediate_expression(self):
+        f, g, h = self.f, self.g, self.h
+        inner = NumExprFactor("x_0 - x_1", (g, f))
+        outer = NumExprFactor("x_1 * x_0", (h, inner))
+
+        optimized = self.optimize(outer)
+        self.assertEqual(optimized._expr, "((x_0) - (x_1)) * (x_2)")
+        self.assertEqual(optimized.inputs, (g, f, h))
+
+        arrays = {
+            f: arange(6, dtype=float64).reshape(2, 3),
+            g: arange(6, 12, dtype=float64).reshape(2, 3),
+            h: arange(12, 18, dtype=float64).reshape(2, 3),
+        }
+        mask = array([[True] * 3] * 2)
+        expected = (arrays[g] - arrays[f]) * arrays[h]
+        result = optimized.compute_from_arrays(
+            [arrays[input_] for input_ in optimized.inputs],
+            mask,
+        )
+        self.assertTrue((result == expected).all())
+
+    def test_outputs_not_inlined(self):
+        f, g = self.f, self.g
+        inner = NumExprFactor("x_0 - x_1", (f, g))
+        outer = NumExprFactor("x_0 * (2)", (inner,))
+
+        optimized = optimize_terms([inner, outer])
+        self.assertEqual(optimized[outer].inputs, (optimized[inner],))
+
+    def test_shared_with_non_expression_not_inlined(self):
+        f, g = self.f, self.g
+        inner = NumExprFactor("x_0 - x_1", (f, g))
+        outer = NumExprFactor("x_0 + x_1", (inner, inner.rank()))
+
+        optimized = self.optimize(outer)
+        new_inner = optimized.inputs[0]
+        self.assertIsInstance(new_inner, NumExprFactor)
+        self.assertEqual(optimized.inputs[1].inputs, (new_inner,))
+
+    def test_filters_only_inlined_into_filters(self):
+        f, g = self.f, self.g
+        inner = NumExprFilter("x_0 > x_1", (f, g))
+
+        as_factor = NumExprFactor("x_0 * (2)", (inner,))
+        self.assertEqual(self.optimize(as_factor).inputs, (inner,))
+
+        as_filter = NumExprFilter("~x_0", (inner,))
+        optimized = self.optimize(as_filter)
+        self.assertEqual(optimized._expr, "~((x_0) > (x_1))")
+        self.assertEqual(optimized.inputs, (f, g))
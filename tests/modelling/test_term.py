@@ -20,7 +20,11 @@ from zipline.errors import (
     TermInputsNotSpecified,
     WindowLengthNotSpecified,
 )
-from zipline.modelling.engine import build_dependency_graph
+from zipline.modelling.engine import (
+    build_dependency_graph,
+    decref_dependencies,
+    initial_refcounts,
+)
 from zipline.modelling.factor import Factor
 from zipline.modelling.expression import NUMEXPR_MATH_FUNCS
 
@@ -147,6 +151,38 @@ class DependencyResolutionTestCase(TestCase):
         self.assertLess(indices[SomeDataSet.bar], indices[f2])
         self.assertLess(indices[SomeDataSet.buzz], indices[f2])
 
+    def test_refcounts(self):
+        """
+        Test that terms are released once all their consumers are computed,
+        and that requested outputs are never released.
+        """
+        f1 = SomeFactor([SomeDataSet.foo, SomeDataSet.bar])
+        f2 = SomeOtherFactor([SomeDataSet.bar, SomeDataSet.buzz])
+
+        graph = build_dependency_graph([f1, f2])
+        refcounts = initial_refcounts(graph, [f1, f2])
+        self.assertEqual(
+            refcounts,
+            {
+                SomeDataSet.foo: 1,
+                SomeDataSet.bar: 2,
+                SomeDataSet.buzz: 1,
+                f1: 1,
+                f2: 1,
+            },
+        )
+
+        self.assertEqual(
+            decref_dependencies(graph, f1, refcounts),
+            {SomeDataSet.foo},
+        )
+        self.assertEqual(
+            decref_dependencies(graph, f2, refcounts),
+            {SomeDataSet.bar, SomeDataSet.buzz},
+        )
+        self.assertEqual(refcounts[f1], 1)
+        self.assertEqual(refcounts[f2], 1)
+
     def test_disallow_recursive_lookback(self):
 
         with self.assertRaises(InputTermNotAtomic):
@@ -271,3 +307,7 @@ class ObjectIdentityTestCase(TestCase):
 
         with self.assertRaises(WindowLengthNotSpecified):
             SomeFactorDefaultInputs()
+
+    def test_short_repr(self):
+        self.assertEqual(SomeFactor().short_repr(), 'SomeFactor')
+        self.assertEqual(SomeDataSet.foo.short_repr(), 'SomeDataSet.foo')
@@ -20,7 +20,13 @@ from unittest import TestCase
 from nose_parameterized import parameterized
 from numpy import (
     arange,
+    array,
     datetime64,
+    float64,
+    floor,
+    intp,
+    may_share_memory,
+    nan,
     uint32,
 )
 from numpy.testing import (
@@ -42,8 +48,11 @@ from zipline.data.ffc.synthetic import (
     NullAdjustmentReader,
     SyntheticDailyBarWriter,
 )
+from zipline.data.ffc.loaders._us_equity_pricing import _coalesce_row_ranges
 from zipline.data.ffc.loaders.us_equity_pricing import (
     BcolzDailyBarReader,
+    MmapDailyBarReader,
+    MmapDailyBarWriter,
     SQLiteAdjustmentReader,
     SQLiteAdjustmentWriter,
     USEquityPricingLoader,
@@ -200,6 +209,29 @@ class BcolzDailyBarTestCase(TestCase):
             DatetimeIndex(result.attrs['calendar'], tz='UTC'),
         )
 
+    def test_write_parallel(self):
+        expected = self.writer.write(self.dest, self.trading_days, self.assets)
+        result = self.writer.write(
+            self.dir_.getpath('parallel.bcolz'),
+            self.trading_days,
+            self.assets,
+            num_processes=2,
+        )
+        for colname in expected.names:
+            assert_array_equal(result[colname][:], expected[colname][:])
+        for attr in 'first_row', 'last_row', 'calendar_offset', 'calendar':
+            self.assertEqual(result.attrs[attr], expected.attrs[attr])
+
+    def test_bad_num_processes(self):
+        for num_processes in (0, -1):
+            with self.assertRaises(ValueError):
+                self.writer.write(
+                    self.dest,
+                    self.trading_days,
+                    self.assets,
+                    num_processes=num_processes,
+                )
+
     def _check_read_results(self, columns, assets, start_date, end_date):
         table = self.writer.write(self.dest, self.trading_days, self.assets)
         reader = BcolzDailyBarReader(table)
@@ -285,6 +317,241 @@ class BcolzDailyBarTestCase(TestCase):
                 end_date=self.asset_end(asset),
             )
 
+    def test_read_unordered_assets(self):
+        """
+        Test loading a subset of assets in a different order from the one in
+        which they're stored.
+        """
+        self._check_read_results(
+            [USEquityPricing.open, USEquityPricing.volume],
+            self.assets[[5, 0, 2, 4]],
+            TEST_QUERY_START,
+            TEST_QUERY_STOP,
+        )
+
+    def test_read_threaded(self):
+        columns = USEquityPricing.columns
+        dates = self.trading_days_between(TEST_QUERY_START, TEST_QUERY_STOP)
+        table = self.writer.write(self.dest, self.trading_days, self.assets)
+        expected = BcolzDailyBarReader(table).load_raw_arrays(
+            columns,
+            dates,
+            self.assets,
+        )
+        for cache_bytes in (None, 1 << 20):
+            reader = BcolzDailyBarReader(
+                table,
+                cache_bytes=cache_bytes,
+                num_threads=3,
+            )
+            results = reader.load_raw_arrays(columns, dates, self.assets)
+            for result, expected_result in zip(results, expected):
+                assert_array_equal(result, expected_result)
+
+    def test_bad_num_threads(self):
+        for num_threads in (0, -1):
+            with self.assertRaises(ValueError):
+                BcolzDailyBarReader(self.dest, num_threads=num_threads)
+
+    def test_read_with_cache(self):
+        columns = [USEquityPricing.close, USEquityPricing.volume]
+        dates = self.trading_days_between(TEST_QUERY_START, TEST_QUERY_STOP)
+        table = self.writer.write(self.dest, self.trading_days, self.assets)
+        expected = BcolzDailyBarReader(table).load_raw_arrays(
+            columns,
+            dates,
+            self.assets,
+        )
+
+        reader = BcolzDailyBarReader(table, cache_bytes=1 << 20)
+        for _ in range(2):
+            results = reader.load_raw_arrays(columns, dates, self.assets)
+            for result, expected_result in zip(results, expected):
+                assert_array_equal(result, expected_result)
+
+        # Every chunk was decompressed by the first load, and served from
+        # the cache on the second.
+        cache = reader.cache
+        self.assertGreater(cache.misses, 0)
+        self.assertEqual(cache.hits, cache.misses)
+        self.assertGreater(cache.nbytes, 0)
+
+        # With no budget, nothing is retained.
+        reader = BcolzDailyBarReader(table, cache_bytes=0)
+        for _ in range(2):
+            reader.load_raw_arrays(columns, dates, self.assets)
+        self.assertEqual(reader.cache.hits, 0)
+        self.assertEqual(reader.cache.nbytes, 0)
+
+    def test_coalesce_row_ranges(self):
+        first_rows = array([50, 0, 10, 30, 5], dtype=intp)
+        last_rows = array([59, 4, 19, 29, 9], dtype=intp)
+
+        # Asset 3 has no rows to load, and the ranges of assets 1, 4 and 2
+        # are adjacent.
+        starts, stops, order, bounds = _coalesce_row_ranges(
+            first_rows,
+            last_rows,
+            0,
+        )
+        assert_array_equal(starts, [0, 50])
+        assert_array_equal(stops, [20, 60])
+        assert_array_equal(order, [1, 4, 2, 0])
+        assert_array_equal(bounds, [0, 3, 4])
+
+        starts, stops, order, bounds = _coalesce_row_ranges(
+            first_rows,
+            last_rows,
+            30,
+        )
+        assert_array_equal(starts, [0])
+        assert_array_equal(stops, [60])
+        assert_array_equal(bounds, [0, 4])
+
+
+class SyntheticMmapDailyBarWriter(MmapDailyBarWriter, SyntheticDailyBarWriter):
+    pass
+
+
+class MmapDailyBarTestCase(TestCase):
+
+    def setUp(self):
+        all_trading_days = TradingEnvironment.instance().trading_days
+        self.trading_days = all_trading_days[
+            all_trading_days.get_loc(TEST_CALENDAR_START):
+            all_trading_days.get_loc(TEST_CALENDAR_STOP) + 1
+        ]
+        self.assets = EQUITY_INFO.index
+        self.writer = SyntheticMmapDailyBarWriter(
+            EQUITY_INFO,
+            self.trading_days,
+        )
+
+        self.dir_ = TempDirectory()
+        self.dir_.create()
+        self.dest = self.dir_.getpath('daily_equity_pricing')
+
+    def tearDown(self):
+        self.dir_.cleanup()
+
+    def test_read(self):
+        reader = self.writer.write(self.dest, self.trading_days, self.assets)
+        columns = USEquityPricing.columns
+        for start, end in [(TEST_QUERY_START, TEST_QUERY_STOP),
+                           (TEST_CALENDAR_START, TEST_CALENDAR_STOP)]:
+            dates = self.trading_days[
+                self.trading_days.slice_indexer(start, end)
+            ]
+            for assets in (self.assets, self.assets[[5, 0, 2]]):
+                results = reader.load_raw_arrays(columns, dates, assets)
+                for column, result in zip(columns, results):
+                    assert_array_equal(
+                        result,
+                        self.writer.expected_values_2d(
+                            dates,
+                            assets,
+                            column.name,
+                        ),
+                    )
+
+    def test_zero_copy_volume(self):
+        self.writer.write(self.dest, self.trading_days, self.assets)
+        reader = MmapDailyBarReader(self.dest)
+        dates = self.trading_days[
+            self.trading_days.slice_indexer(TEST_QUERY_START, TEST_QUERY_STOP)
+        ]
+        stored_volumes = reader._column('volume')
+
+        # Assets stored next to each other are read as a view.
+        volume, = reader.load_raw_arrays(
+            [USEquityPricing.volume],
+            dates,
+            self.assets[1:4],
+        )
+        self.assertTrue(may_share_memory(volume, stored_volumes))
+
+        # Writes to a view aren't visible to other readers.
+        expected = volume.copy()
+        volume[:] = 0
+        assert_array_equal(
+            MmapDailyBarReader(self.dest).load_raw_arrays(
+                [USEquityPricing.volume],
+                dates,
+                self.assets[1:4],
+            )[0],
+            expected,
+        )
+
+        # Other assets, and prices, are copied.
+        volume, close = reader.load_raw_arrays(
+            [USEquityPricing.volume, USEquityPricing.close],
+            dates,
+            self.assets[[3, 1]],
+        )
+        self.assertFalse(may_share_memory(volume, stored_volumes))
+        self.assertEqual(close.dtype, float64)
+
+    def test_masked_load_leaves_mapping_alone(self):
+        reader = self.writer.write(self.dest, self.trading_days, self.assets)
+        dates = self.trading_days[
+            self.trading_days.slice_indexer(TEST_QUERY_START, TEST_QUERY_STOP)
+        ]
+        assets = self.assets[1:4]
+        expected = self.writer.expected_values_2d(dates, assets, 'volume')
+        stored_volumes = reader._column('volume')
+        stored = stored_volumes.copy()
+
+        loader = USEquityPricingLoader(reader, NullAdjustmentReader())
+        mask = DataFrame(True, index=dates, columns=assets)
+        mask.iloc[0, :] = False
+        volumes, = loader.load_adjusted_array([USEquityPricing.volume], mask)
+
+        expected[0, :] = 0
+        assert_array_equal(volumes.data, expected)
+        self.assertFalse(may_share_memory(volumes.data, stored_volumes))
+        assert_array_equal(stored_volumes, stored)
+
+    def test_skip_empty_assets(self):
+
+        class EmptyAssetWriter(SyntheticMmapDailyBarWriter):
+            def gen_tables(self, assets):
+                tables = super(EmptyAssetWriter, self).gen_tables(assets)
+                for asset, table in tables:
+                    if asset == empty_asset:
+                        table = table.iloc[:0]
+                    yield asset, table
+
+            def to_uint32(self, array, colname):
+                if not len(array):
+                    return array
+                return super(EmptyAssetWriter, self).to_uint32(array, colname)
+
+        empty_asset = self.assets[2]
+        reader = EmptyAssetWriter(EQUITY_INFO, self.trading_days).write(
+            self.dest,
+            self.trading_days,
+            self.assets,
+        )
+        dates = self.trading_days[
+            self.trading_days.slice_indexer(TEST_QUERY_START, TEST_QUERY_STOP)
+        ]
+        assets = self.assets.drop(empty_asset)
+        volume, = reader.load_raw_arrays(
+            [USEquityPricing.volume],
+            dates,
+            assets,
+        )
+        assert_array_equal(
+            volume,
+            self.writer.expected_values_2d(dates, assets, 'volume'),
+        )
+        with self.assertRaises(KeyError):
+            reader.load_raw_arrays(
+                [USEquityPricing.volume],
+                dates,
+                [empty_asset],
+            )
+
 
 # ADJUSTMENTS use the following scheme to indicate information about the value
 # upon inspection.
@@ -559,7 +826,7 @@ class USEquityPricingLoaderTestCase(TestCase):
 
     def apply_adjustments(self, dates, assets, baseline_values, adjustments):
         min_date, max_date = dates[[0, -1]]
-        values = baseline_values.copy()
+        values = baseline_values.astype(float64)
         for eff_date_secs, ratio, sid in adjustments.itertuples(index=False):
             eff_date = seconds_to_timestamp(eff_date_secs)
             if eff_date < min_date or eff_date > max_date:
@@ -571,7 +838,45 @@ class USEquityPricingLoaderTestCase(TestCase):
             # this will be a no-op in the case that the effective date is the
             # first entry in dates.
             values[:eff_date_loc, asset_col] *= ratio
-        return values
+            if baseline_values.dtype.kind == 'u':
+                # Adjusted integers are rounded to the nearest integer.
+                values[:eff_date_loc, asset_col] = floor(
+                    values[:eff_date_loc, asset_col] + 0.5
+                )
+        return values.astype(baseline_values.dtype)
+
+    def test_read_masked(self):
+        columns = [USEquityPricing.close, USEquityPricing.volume]
+        query_days = self.calendar_days_between(
+            TEST_QUERY_START,
+            TEST_QUERY_STOP
+        )
+        pricing_loader = USEquityPricingLoader(
+            BcolzDailyBarReader(self.bcolz_path),
+            NullAdjustmentReader(),
+        )
+        mask = DataFrame(True, index=query_days, columns=self.assets)
+        mask.iloc[2:4, 1] = False
+
+        closes, volumes = pricing_loader.load_adjusted_array(columns, mask)
+
+        expected_closes = self.bcolz_writer.expected_values_2d(
+            query_days,
+            self.assets,
+            'close',
+        )
+        expected_closes[2:4, 1] = nan
+        assert_array_equal(closes.data, expected_closes)
+
+        # Volumes are integers, so masked volumes are 0 rather than NaN.
+        expected_volumes = self.bcolz_writer.expected_values_2d(
+            query_days,
+            self.assets,
+            'volume',
+        )
+        expected_volumes[2:4, 1] = 0
+        self.assertEqual(volumes.dtype, uint32)
+        assert_array_equal(volumes.data, expected_volumes)
 
     def test_read_with_adjustments(self):
         columns = [USEquityPricing.high, USEquityPricing.volume]
@@ -630,11 +935,8 @@ class USEquityPricingLoaderTestCase(TestCase):
                     baseline,
                     adjustments,
                 )
-                # FIXME: Make AdjustedArray properly support integral types.
-                assert_array_equal(
-                    expected_adjusted_volumes,
-                    window.astype(uint32),
-                )
+                self.assertEqual(window.dtype, uint32)
+                assert_array_equal(expected_adjusted_volumes, window)
 
         # Verify that we checked up to the longest possible window.
         with self.assertRaises(WindowLengthTooLong):
@@ -3,7 +3,11 @@ import sys
 import doctest
 from unittest import TestCase
 
-from zipline.lib import adjustment
+from zipline.lib import (
+    adjustment,
+    rank,
+    rolling,
+)
 from zipline.modelling import (
     engine,
     expression,
@@ -41,6 +45,12 @@ class DoctestTestCase(TestCase):
     def test_adjustment_docs(self):
         self._check_docs(adjustment)
 
+    def test_rank_docs(self):
+        self._check_docs(rank)
+
+    def test_rolling_docs(self):
+        self._check_docs(rolling)
+
     def test_expression_docs(self):
         self._check_docs(expression)
 
@@ -97,6 +97,10 @@ from zipline.history.history_container import HistoryContainer
 
 DEFAULT_CAPITAL_BASE = float("1.0e5")
 
+# Number of trading days of FFC inputs to load at once, which bounds the
+# memory used to compute factors for long simulations.
+DEFAULT_FFC_CHUNKSIZE = 252
+
 
 class TradingAlgorithm(object):
     """
@@ -165,6 +169,11 @@ class TradingAlgorithm(object):
             identifiers : List
                 Any asset identifiers that are not provided in the
                 asset_metadata, but will be traded by this TradingAlgorithm
+            ffc_loader : FFCLoader
+                Loader used to compute factors added with add_factor.
+            ffc_chunksize : int <default: 252>
+                Maximum number of trading days of factor inputs to load at
+                once.
         """
         self.sources = []
 
@@ -211,7 +220,10 @@ class TradingAlgorithm(object):
         )
         # Pull in the environment's new AssetFinder for quick reference
         self.asset_finder = self.trading_environment.asset_finder
-        self.init_engine(kwargs.pop('ffc_loader', None))
+        self.init_engine(
+            kwargs.pop('ffc_loader', None),
+            kwargs.pop('ffc_chunksize', DEFAULT_FFC_CHUNKSIZE),
+        )
 
         # Maps from name to Term
         self._filters = {}
@@ -299,17 +311,19 @@ class TradingAlgorithm(object):
         self.initialize_args = args
         self.initialize_kwargs = kwargs
 
-    def init_engine(self, loader):
+    def init_engine(self, loader, chunksize):
         """
         Construct and save an FFCEngine from loader.
 
-        If loader is None, constructs a NoOpFFCEngine.
+        The engine loads inputs for at most `chunksize` trading days at a
+        time.  If loader is None, constructs a NoOpFFCEngine.
         """
         if loader is not None:
             self.engine = SimpleFFCEngine(
                 loader,
                 self.trading_environment.trading_days,
                 self.asset_finder,
+                chunksize=chunksize,
             )
         else:
             self.engine = NoOpFFCEngine()
@@ -1281,20 +1295,20 @@ class TradingAlgorithm(object):
             )
         )
 
-    def compute_factor_matrix(self, start_date):
+    def stream_factor_matrix(self, start_date):
         """
-        Compute a factor matrix starting at start_date.
+        Incrementally compute factor matrix rows from start_date through the
+        end of the simulation.
+
+        Returns an iterator of (date, frame) pairs.  See
+        `SimpleFFCEngine.stream_factor_matrix`.
         """
-        days = self.trading_environment.trading_days
-        start_date_loc = days.get_loc(start_date)
         sim_end = self.sim_params.last_close.normalize()
-        end_loc = min(start_date_loc + 252, days.get_loc(sim_end))
-        end_date = days[end_loc]
-        return self.engine.factor_matrix(
+        return self.engine.stream_factor_matrix(
             self._all_terms(),
             start_date,
-            end_date,
-        ), end_date
+            sim_end,
+        )
 
     def current_universe(self):
         return self._current_universe
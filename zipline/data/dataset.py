@@ -28,6 +28,7 @@ class BoundColumn(Term):
     """
     A Column of data that's been concretely bound to a particular dataset.
     """
+    assetwise = True
 
     def __new__(cls, dtype, dataset, name):
         return super(BoundColumn, cls).__new__(
@@ -68,6 +69,9 @@ class BoundColumn(Term):
         """
         return '.'.join([self.dataset.__name__, self.name])
 
+    def short_repr(self):
+        return self.qualname
+
     def __repr__(self):
         return "{qualname}::{dtype}".format(
             qualname=self.qualname,
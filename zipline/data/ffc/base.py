@@ -15,7 +15,18 @@ class FFCLoader(with_metaclass(ABCMeta)):
     ABC for classes that can load data for use with zipline.modelling pipeline.
 
     TODO: DOCUMENT THIS MORE!
+
+    Attributes
+    ----------
+    data_version : hashable, optional
+        A string, number, or tuple thereof identifying the data served by this
+        loader.  SimpleFFCEngine only reuses cached term outputs computed from
+        a loader with the same data version, so loaders whose underlying data
+        can change should change their data version when it does.  The
+        default of None disables caching of terms computed from this loader.
     """
+    data_version = None
+
     @abstractmethod
     def load_adjusted_array(self, columns, mask):
         pass
@@ -66,7 +66,7 @@ class DataFrameFFCLoader(FFCLoader):
 
     def __init__(self, column, baseline, adjustments=None):
         self.column = column
-        self.baseline = baseline.values
+        self.baseline = baseline.values.astype(column.dtype)
         self.dates = baseline.index
         self.assets = baseline.columns
 
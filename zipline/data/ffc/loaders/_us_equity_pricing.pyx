@@ -17,11 +17,14 @@ from cpython cimport (
     PySet_Add,
 )
 
+from functools import partial
+
 import bcolz
 cimport cython
 from numpy import (
     array,
     float64,
+    full,
     intp,
     uint32,
     zeros,
@@ -31,7 +34,6 @@ from numpy cimport (
     intp_t,
     ndarray,
     uint32_t,
-    uint8_t,
 )
 from numpy.math cimport NAN
 from pandas import Timestamp
@@ -392,15 +394,213 @@ cpdef _compute_row_slices(dict asset_starts_absolute,
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
+cpdef _coalesce_row_ranges(intp_t[:] first_rows,
+                           intp_t[:] last_rows,
+                           intp_t max_gap):
+    """
+    Group the row ranges of each asset into larger ranges that can each be
+    read with a single slice of a bcolz column.
+
+    Ranges are visited in order of their first row, and a range is merged
+    into the preceding group if no more than `max_gap` unrequested rows lie
+    between them.  Assets with no rows to load are omitted.
+
+    Parameters
+    ----------
+    first_rows : ndarray[intp]
+    last_rows : ndarray[intp]
+        Arrays in the format returned by _compute_row_slices.
+    max_gap : intp
+        Largest number of unrequested rows to read in order to merge two
+        ranges.
+
+    Returns
+    -------
+    starts, stops : ndarray[intp]
+        Start and (exclusive) stop rows of each group.
+    order : ndarray[intp]
+        Indices of the assets with rows to load, sorted by first row.
+    bounds : ndarray[intp]
+        The assets of group `i` are order[bounds[i]:bounds[i + 1]].
+    """
+    cdef:
+        ndarray[dtype=intp_t, ndim=1] by_first_row = array(
+            first_rows,
+        ).argsort(kind='mergesort')
+        ndarray[dtype=intp_t, ndim=1] order = by_first_row[
+            (array(last_rows) >= array(first_rows))[by_first_row]
+        ]
+        intp_t nassets = len(order)
+        ndarray[dtype=intp_t, ndim=1] starts = zeros(nassets, dtype=intp)
+        ndarray[dtype=intp_t, ndim=1] stops = zeros(nassets, dtype=intp)
+        ndarray[dtype=intp_t, ndim=1] bounds = zeros(nassets + 1, dtype=intp)
+        intp_t ngroups = 0
+        intp_t i
+        intp_t asset
+
+    for i in range(nassets):
+        asset = order[i]
+        if ngroups and first_rows[asset] - stops[ngroups - 1] <= max_gap:
+            stops[ngroups - 1] = max(stops[ngroups - 1], last_rows[asset] + 1)
+        else:
+            starts[ngroups] = first_rows[asset]
+            stops[ngroups] = last_rows[asset] + 1
+            bounds[ngroups] = i
+            ngroups += 1
+    bounds[ngroups] = nassets
+
+    return starts[:ngroups], stops[:ngroups], order, bounds[:ngroups + 1]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _scatter_volumes(uint32_t[:] raw,
+                           intp_t raw_start,
+                           intp_t[:] assets,
+                           intp_t[:] first_rows,
+                           intp_t[:] last_rows,
+                           intp_t[:] offsets,
+                           uint32_t[:, :] out) nogil:
+    """
+    Copy the rows of each of `assets` from `raw`, which holds the rows of a
+    column starting at `raw_start`, into their positions in `out`.
+    """
+    cdef:
+        intp_t i
+        intp_t asset
+        intp_t raw_idx
+        intp_t out_idx
+
+    for i in range(assets.shape[0]):
+        asset = assets[i]
+        out_idx = offsets[asset]
+        for raw_idx in range(
+            first_rows[asset] - raw_start,
+            last_rows[asset] - raw_start + 1,
+        ):
+            out[out_idx, asset] = raw[raw_idx]
+            out_idx += 1
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _scatter_prices(uint32_t[:] raw,
+                          intp_t raw_start,
+                          intp_t[:] assets,
+                          intp_t[:] first_rows,
+                          intp_t[:] last_rows,
+                          intp_t[:] offsets,
+                          float64_t[:, :] out) nogil:
+    """
+    Like _scatter_volumes, but converting prices stored as 1000 * the dollar
+    value into dollars, with zeros converted to NaN.
+    """
+    cdef:
+        intp_t i
+        intp_t asset
+        intp_t raw_idx
+        intp_t out_idx
+        uint32_t value
+
+    for i in range(assets.shape[0]):
+        asset = assets[i]
+        out_idx = offsets[asset]
+        for raw_idx in range(
+            first_rows[asset] - raw_start,
+            last_rows[asset] - raw_start + 1,
+        ):
+            value = raw[raw_idx]
+            if value == 0:
+                out[out_idx, asset] = NAN
+            else:
+                out[out_idx, asset] = value * .001
+            out_idx += 1
+
+
+def _read_column(object table,
+                 tuple shape,
+                 intp_t[:] first_rows,
+                 intp_t[:] last_rows,
+                 intp_t[:] offsets,
+                 tuple ranges,
+                 str column_name):
+    """
+    Read a single column for _read_bcolz_data.
+
+    The GIL is released while rows are copied into the output, so columns can
+    be read concurrently on multiple threads.
+    """
+    cdef:
+        object column = table[column_name]
+        ndarray[dtype=intp_t, ndim=1] starts
+        ndarray[dtype=intp_t, ndim=1] stops
+        ndarray[dtype=intp_t, ndim=1] order
+        ndarray[dtype=intp_t, ndim=1] bounds
+        ndarray raw_data
+        uint32_t[:] raw
+        intp_t[:] assets
+        intp_t raw_start
+        intp_t group
+        bint is_price = column_name in {'open', 'high', 'low', 'close'}
+        ndarray outbuf
+        uint32_t[:, :] volumes
+        float64_t[:, :] prices
+
+    starts, stops, order, bounds = ranges
+    if is_price:
+        outbuf = full(shape, NAN, dtype=float64)
+        prices = outbuf
+    else:
+        outbuf = zeros(shape, dtype=uint32)
+        volumes = outbuf
+
+    for group in range(len(starts)):
+        raw_start = starts[group]
+        raw_data = column[raw_start:stops[group]]
+        # Chunks read through a ChunkCache are read-only, and typed
+        # memoryviews can't be taken of read-only buffers.
+        if not raw_data.flags.writeable:
+            raw_data = raw_data.copy()
+        raw = raw_data
+        assets = order[bounds[group]:bounds[group + 1]]
+        with nogil:
+            if is_price:
+                _scatter_prices(
+                    raw,
+                    raw_start,
+                    assets,
+                    first_rows,
+                    last_rows,
+                    offsets,
+                    prices,
+                )
+            else:
+                _scatter_volumes(
+                    raw,
+                    raw_start,
+                    assets,
+                    first_rows,
+                    last_rows,
+                    offsets,
+                    volumes,
+                )
+    return outbuf
+
+
 cpdef _read_bcolz_data(ctable_t table,
                        tuple shape,
                        list columns,
                        intp_t[:] first_rows,
                        intp_t[:] last_rows,
-                       intp_t[:] offsets):
+                       intp_t[:] offsets,
+                       object pool=None):
     """
     Load raw bcolz data for the given columns and indices.
 
+    Only the rows between `first_rows` and `last_rows` are read, using the
+    ranges computed by _coalesce_row_ranges, so the cost of a query scales with
+    the amount of data it returns rather than with the size of the table.
+
     Parameters
     ----------
     table : bcolz.ctable
@@ -412,48 +612,41 @@ cpdef _read_bcolz_data(ctable_t table,
 
     first_rows : ndarray[intp]
     last_rows : ndarray[intp]
-    offsets : ndarray[intp
+    offsets : ndarray[intp]
         Arrays in the format returned by _compute_row_slices.
+    pool : multiprocessing.pool.ThreadPool, optional
+        If supplied, columns are read concurrently on the threads of `pool`.
 
     Returns
     -------
     results : list of ndarray
-        A 2D array of shape `shape` for each column in `columns`.
+        A 2D array of shape `shape` for each column in `columns`.  Price
+        columns are converted to float64 dollar values, with zeros and
+        missing rows converted to NaN.
     """
-    cdef:
-        int nassets
-        str column_name
-        ndarray[dtype=uint32_t, ndim=1] raw_data
-        ndarray[dtype=uint32_t, ndim=2] outbuf
-        ndarray[dtype=uint8_t, ndim=2, cast=True] where_nan
-        ndarray[dtype=float64_t, ndim=2] outbuf_as_float
-        intp_t asset
-        intp_t out_idx
-        intp_t raw_idx
-        intp_t first_row
-        intp_t last_row
-        intp_t offset
-        list results = []
-
-    nassets = shape[1]
+    cdef int nassets = shape[1]
     if not nassets== len(first_rows) == len(last_rows) == len(offsets):
         raise ValueError("Incompatible index arrays.")
 
-    for column_name in columns:
-        raw_data = table[column_name][:]
-        outbuf = zeros(shape=shape, dtype=uint32)
-        for asset in range(nassets):
-            first_row = first_rows[asset]
-            last_row = last_rows[asset]
-            offset = offsets[asset]
-            for out_idx, raw_idx in enumerate(range(first_row, last_row + 1)):
-                outbuf[out_idx + offset, asset] = raw_data[raw_idx]
-
-        if column_name in {'open', 'high', 'low', 'close'}:
-            where_nan = (outbuf == 0)
-            outbuf_as_float = outbuf.astype(float64) * .001
-            outbuf_as_float[where_nan] = NAN
-            results.append(outbuf_as_float)
-        else:
-            results.append(outbuf)
-    return results
+    if not columns:
+        return []
+
+    # Read only the rows we need.  Slicing a bcolz column decompresses every
+    # chunk the slice touches, so ranges separated by less than a chunk are
+    # read together rather than decompressing their shared chunks twice.
+    read_column = partial(
+        _read_column,
+        table,
+        shape,
+        first_rows,
+        last_rows,
+        offsets,
+        _coalesce_row_ranges(
+            first_rows,
+            last_rows,
+            table[columns[0]].chunklen,
+        ),
+    )
+    if pool is None:
+        return [read_column(column_name) for column_name in columns]
+    return pool.map(read_column, columns)
@@ -15,34 +15,46 @@ from abc import (
     ABCMeta,
     abstractmethod,
 )
+from collections import OrderedDict
 from contextlib import contextmanager
 from errno import ENOENT
-from os import remove
-from os.path import exists
-
-from bcolz import (
-    carray,
-    ctable,
-)
+from functools import partial
+import json
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+from os import makedirs, remove
+from os.path import exists, join
+from threading import Lock
+
+from bcolz import ctable
 from click import progressbar
 from numpy import (
     array,
     array_equal,
+    asarray,
+    concatenate,
+    diff,
     float64,
     floating,
     full,
     iinfo,
+    int64,
     integer,
     issubdtype,
+    memmap,
+    nan,
     uint32,
+    zeros,
 )
 from pandas import (
     DatetimeIndex,
+    Int64Index,
     read_csv,
     Timestamp,
 )
 from six import (
     iteritems,
+    itervalues,
     string_types,
     with_metaclass,
 )
@@ -65,6 +77,9 @@ US_EQUITY_PRICING_BCOLZ_COLUMNS = [
     'open', 'high', 'low', 'close', 'volume', 'day', 'id'
 ]
 DAILY_US_EQUITY_PRICING_DEFAULT_FILENAME = 'daily_us_equity_pricing.bcolz'
+US_EQUITY_PRICING_MMAP_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+MMAP_COLUMN_SUFFIX = '.uint32'
+MMAP_METADATA_FILENAME = 'metadata.json'
 SQLITE_ADJUSTMENT_COLUMNS = frozenset(['effective_date', 'ratio', 'sid'])
 SQLITE_ADJUSTMENT_COLUMN_DTYPES = {
     'effective_date': integer,
@@ -81,6 +96,17 @@ def passthrough(obj):
     yield obj
 
 
+def _convert_asset(writer, asset):
+    """
+    Read the data for `asset` from `writer` and convert it to uint32 columns.
+
+    Module-level so that BcolzDailyBarWriter.write can run it in worker
+    processes.
+    """
+    (asset_id, table), = writer.gen_tables([asset])
+    return asset_id, writer.uint32_columns(table)
+
+
 class BcolzDailyBarWriter(with_metaclass(ABCMeta)):
     """
     Class capable of writing daily OHLCV data to disk in a format that can be
@@ -94,7 +120,10 @@ class BcolzDailyBarWriter(with_metaclass(ABCMeta)):
     @abstractmethod
     def gen_tables(self, assets):
         """
-        Return an iterator of pairs of (asset_id, bcolz.ctable).
+        Return an iterator of pairs of (asset_id, table).
+
+        Each table should be a bcolz.ctable or a pandas.DataFrame with 'open',
+        'high', 'low', 'close', 'volume' and 'day' columns.
         """
         raise NotImplementedError()
 
@@ -120,7 +149,28 @@ class BcolzDailyBarWriter(with_metaclass(ABCMeta)):
         """
         raise NotImplementedError()
 
-    def write(self, filename, calendar, assets, show_progress=False):
+    def uint32_columns(self, table):
+        """
+        Convert every column of a table produced by gen_tables with
+        to_uint32.
+
+        Returns
+        -------
+        columns : dict[str -> np.array[uint32]]
+            Map from each of 'open', 'high', 'low', 'close', 'volume' and
+            'day' to its converted values.
+        """
+        return {
+            colname: self.to_uint32(asarray(table[colname][:]), colname)
+            for colname in US_EQUITY_PRICING_MMAP_COLUMNS + ['day']
+        }
+
+    def write(self,
+              filename,
+              calendar,
+              assets,
+              show_progress=False,
+              num_processes=None):
         """
         Parameters
         ----------
@@ -132,52 +182,109 @@ class BcolzDailyBarWriter(with_metaclass(ABCMeta)):
             The assets for which to write data.
         show_progress : bool
             Whether or not to show a progress bar while writing.
+        num_processes : int, optional
+            If supplied, assets are read and converted to uint32 on a pool of
+            `num_processes` worker processes, while the calling process writes
+            their results in the order of `assets`.  The writer must be
+            picklable.  The default of None reads and converts assets on the
+            calling process.
 
         Returns
         -------
         table : bcolz.ctable
             The newly-written table.
         """
-        _iterator = self.gen_tables(assets)
+        if num_processes is not None and num_processes < 1:
+            raise ValueError(
+                "num_processes must be a positive integer, got %r" % (
+                    num_processes,
+                )
+            )
+
+        if num_processes is None:
+            return self._write_with_progress(
+                filename,
+                calendar,
+                assets,
+                (
+                    (asset_id, self.uint32_columns(table))
+                    for asset_id, table in self.gen_tables(assets)
+                ),
+                show_progress,
+            )
+
+        pool = Pool(num_processes)
+        try:
+            return self._write_with_progress(
+                filename,
+                calendar,
+                assets,
+                pool.imap(
+                    partial(_convert_asset, self),
+                    assets,
+                    # Batch assets to amortize the cost of dispatching them,
+                    # while keeping every worker busy.
+                    chunksize=max(1, len(assets) // (num_processes * 4)),
+                ),
+                show_progress,
+            )
+        finally:
+            # Every result has been consumed unless writing failed, in which
+            # case the remaining ones aren't needed.
+            pool.terminate()
+            pool.join()
+
+    def _write_with_progress(self,
+                             filename,
+                             calendar,
+                             assets,
+                             iterator,
+                             show_progress):
         if show_progress:
             pbar = progressbar(
-                _iterator,
+                iterator,
                 length=len(assets),
                 item_show_func=lambda i: i if i is None else str(i[0]),
                 label="Merging asset files:",
             )
             with pbar as pbar_iterator:
                 return self._write_internal(filename, calendar, pbar_iterator)
-        return self._write_internal(filename, calendar, _iterator)
+        return self._write_internal(filename, calendar, iterator)
 
     def _write_internal(self, filename, calendar, iterator):
         """
         Internal implementation of write.
 
-        `iterator` should be an iterator yielding pairs of (asset, ctable).
+        `iterator` should be an iterator yielding pairs of (asset, columns),
+        where `columns` is a dict in the format returned by uint32_columns.
         """
         total_rows = 0
         first_row = {}
         last_row = {}
         calendar_offset = {}
 
-        # Maps column name -> output carray.
-        columns = {
-            k: carray(array([], dtype=uint32))
-            for k in US_EQUITY_PRICING_BCOLZ_COLUMNS
-        }
+        # Create the table on disk up front, and append each asset to it as
+        # it arrives, so that only one asset's data is held in memory at a
+        # time.
+        full_table = ctable(
+            columns=[
+                array([], dtype=uint32)
+                for colname in US_EQUITY_PRICING_BCOLZ_COLUMNS
+            ],
+            names=US_EQUITY_PRICING_BCOLZ_COLUMNS,
+            rootdir=filename,
+            mode='w',
+        )
 
-        for asset_id, table in iterator:
-            nrows = len(table)
-            for column_name in columns:
-                if column_name == 'id':
-                    # We know what the content of this column is, so don't
-                    # bother reading it.
-                    columns['id'].append(full((nrows,), asset_id))
-                    continue
-                columns[column_name].append(
-                    self.to_uint32(table[column_name][:], column_name)
-                )
+        for asset_id, columns in iterator:
+            nrows = len(columns['day'])
+            # We know what the content of the id column is, so don't bother
+            # reading it.
+            columns['id'] = full((nrows,), asset_id, dtype=uint32)
+            full_table.append([
+                columns[colname]
+                for colname in US_EQUITY_PRICING_BCOLZ_COLUMNS
+            ])
 
             # Bcolz doesn't support ints as keys in `attrs`, so convert
             # assets to strings for use as attr keys.
@@ -193,25 +300,11 @@ class BcolzDailyBarWriter(with_metaclass(ABCMeta)):
             # Calculate the number of trading days between the first date
             # in the stored data and the first date of **this** asset. This
             # offset used for output alignment by the reader.
-
-            # HACK: Index with a list so that we get back an array we can pass
-            # to self.to_uint32.  We could try to extract this in the loop
-            # above, but that makes the logic a lot messier.
-            asset_first_day = self.to_uint32(table['day'][[0]], 'day')[0]
             calendar_offset[asset_key] = calendar.get_loc(
-                Timestamp(asset_first_day, unit='s', tz='UTC'),
+                Timestamp(columns['day'][0], unit='s', tz='UTC'),
             )
 
-        # This writes the table to disk.
-        full_table = ctable(
-            columns=[
-                columns[colname]
-                for colname in US_EQUITY_PRICING_BCOLZ_COLUMNS
-            ],
-            names=US_EQUITY_PRICING_BCOLZ_COLUMNS,
-            rootdir=filename,
-            mode='w',
-        )
+        full_table.flush()
         full_table.attrs['first_row'] = first_row
         full_table.attrs['last_row'] = last_row
         full_table.attrs['calendar_offset'] = calendar_offset
@@ -256,8 +349,7 @@ class DailyBarWriterFromCSVs(BcolzDailyBarWriter):
             path = self._asset_map.get(asset)
             if path is None:
                 raise KeyError("No path supplied for asset %s" % asset)
-            data = read_csv(path, parse_dates=['day'], dtype=dtypes)
-            yield asset, ctable.fromdataframe(data)
+            yield asset, read_csv(path, parse_dates=['day'], dtype=dtypes)
 
     def to_uint32(self, array, colname):
         arrmax = array.max()
@@ -280,6 +372,152 @@ class DailyBarWriterFromCSVs(BcolzDailyBarWriter):
             )
 
 
+def _calendar_slice_locs(calendar, start_date, end_date):
+    """
+    Get the indices of `start_date` and `end_date` in `calendar`.
+
+    Raises
+    ------
+    NoFurtherDataError
+        If the query extends beyond the dates in `calendar`.
+    ValueError
+        If either date lies within `calendar` but isn't one of its dates.
+    """
+    try:
+        start = calendar.get_loc(start_date)
+    except KeyError:
+        if start_date < calendar[0]:
+            raise NoFurtherDataError(
+                msg=(
+                    "FFC Query requesting data starting on {query_start}, "
+                    "but first known date is {calendar_start}"
+                ).format(
+                    query_start=str(start_date),
+                    calendar_start=str(calendar[0]),
+                )
+            )
+        else:
+            raise ValueError("Query start %s not in calendar" % start_date)
+    try:
+        stop = calendar.get_loc(end_date)
+    except:
+        if end_date > calendar[-1]:
+            raise NoFurtherDataError(
+                msg=(
+                    "FFC Query requesting data up to {query_end}, "
+                    "but last known date is {calendar_end}"
+                ).format(
+                    query_end=end_date,
+                    calendar_end=calendar[-1],
+                )
+            )
+        else:
+            raise ValueError("Query end %s not in calendar" % end_date)
+    return start, stop
+
+
+class ChunkCache(object):
+    """
+    In-memory, size-bounded cache of decompressed chunks of bcolz columns.
+
+    When the total size of cached chunks exceeds `max_bytes`, the least
+    recently used chunks are discarded.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Memory budget for decompressed chunks.
+
+    Attributes
+    ----------
+    hits : int
+        Number of chunk reads served from the cache.
+    misses : int
+        Number of chunk reads that required decompressing a chunk.
+    nbytes : int
+        Total size of the chunks currently cached.
+    """
+    def __init__(self, max_bytes):
+        if max_bytes < 0:
+            raise ValueError(
+                "max_bytes must be non-negative, got %r" % max_bytes
+            )
+        self._max_bytes = max_bytes
+        self._chunks = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+
+    def read(self, name, column, start, stop):
+        """
+        Read rows [start, stop) of `column`, a bcolz.carray named `name`.
+
+        The returned array may be a view of cached data, and must not be
+        modified.
+        """
+        chunklen = column.chunklen
+        first_chunk = start // chunklen
+        chunks = [
+            self._chunk(name, column, i)
+            for i in range(first_chunk, (stop - 1) // chunklen + 1)
+        ]
+        data = chunks[0] if len(chunks) == 1 else concatenate(chunks)
+        offset = first_chunk * chunklen
+        return data[start - offset:stop - offset]
+
+    def _chunk(self, name, column, index):
+        key = (name, index)
+        with self._lock:
+            try:
+                # Re-insert the chunk to mark it as most recently used.
+                data = self._chunks[key] = self._chunks.pop(key)
+                self.hits += 1
+                return data
+            except KeyError:
+                self.misses += 1
+
+        # Decompress without holding the lock, so that other columns can be
+        # read concurrently.
+        chunklen = column.chunklen
+        data = column[index * chunklen:(index + 1) * chunklen]
+        data.flags.writeable = False
+        with self._lock:
+            if key not in self._chunks:
+                self._chunks[key] = data
+                self.nbytes += data.nbytes
+            while self.nbytes > self._max_bytes:
+                _, evicted = self._chunks.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return data
+
+    def clear(self):
+        """
+        Discard every cached chunk.
+        """
+        with self._lock:
+            self._chunks.clear()
+            self.nbytes = 0
+
+
+class _CachedColumn(object):
+    """
+    A bcolz.carray whose slices are read through a ChunkCache.
+    """
+    def __init__(self, name, column, cache):
+        self._name = name
+        self._column = column
+        self._cache = cache
+
+    @property
+    def chunklen(self):
+        return self._column.chunklen
+
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(len(self._column))
+        return self._cache.read(self._name, self._column, start, stop)
+
+
 class BcolzDailyBarReader(object):
     """
     Reader for raw pricing data written by BcolzDailyOHLCVWriter.
@@ -331,12 +569,32 @@ class BcolzDailyBarReader(object):
 
     We use calendar_offset and calendar to orient loaded blocks within a
     range of queried dates.
+
+    Parameters
+    ----------
+    table : bcolz.ctable or str
+        The table from which to read, or the path to its root directory.
+    cache_bytes : int, optional
+        If supplied, decompressed chunks of the table's columns are kept in a
+        ChunkCache with a budget of `cache_bytes`, so that repeated loads of
+        the same data don't decompress it again.  The cache is available as
+        the reader's `cache` attribute.
+    num_threads : int, optional
+        If supplied, loads of multiple columns read and decompress up to
+        `num_threads` columns concurrently.  The default of None reads one
+        column at a time on the calling thread.
     """
-    def __init__(self, table):
+    def __init__(self, table, cache_bytes=None, num_threads=None):
+        if num_threads is not None and num_threads < 1:
+            raise ValueError(
+                "num_threads must be a positive integer, got %r" % num_threads
+            )
         if isinstance(table, string_types):
             table = ctable(rootdir=table, mode='r')
 
         self._table = table
+        self.cache = None if cache_bytes is None else ChunkCache(cache_bytes)
+        self._num_threads = num_threads
         self._calendar = DatetimeIndex(table.attrs['calendar'], tz='UTC')
         self._first_rows = {
             int(asset_id): start_index
@@ -352,37 +610,7 @@ class BcolzDailyBarReader(object):
         }
 
     def _slice_locs(self, start_date, end_date):
-        try:
-            start = self._calendar.get_loc(start_date)
-        except KeyError:
-            if start_date < self._calendar[0]:
-                raise NoFurtherDataError(
-                    msg=(
-                        "FFC Query requesting data starting on {query_start}, "
-                        "but first known date is {calendar_start}"
-                    ).format(
-                        query_start=str(start_date),
-                        calendar_start=str(self._calendar[0]),
-                    )
-                )
-            else:
-                raise ValueError("Query start %s not in calendar" % start_date)
-        try:
-            stop = self._calendar.get_loc(end_date)
-        except:
-            if end_date > self._calendar[-1]:
-                raise NoFurtherDataError(
-                    msg=(
-                        "FFC Query requesting data up to {query_end}, "
-                        "but last known date is {calendar_end}"
-                    ).format(
-                        query_end=end_date,
-                        calendar_end=self._calendar[-1],
-                    )
-                )
-            else:
-                raise ValueError("Query end %s not in calendar" % end_date)
-        return start, stop
+        return _calendar_slice_locs(self._calendar, start_date, end_date)
 
     def _compute_slices(self, dates, assets):
         """
@@ -435,14 +663,204 @@ class BcolzDailyBarReader(object):
 
     def load_raw_arrays(self, columns, dates, assets):
         first_rows, last_rows, offsets = self._compute_slices(dates, assets)
-        return _read_bcolz_data(
-            self._table,
+        names = [column.name for column in columns]
+        table = self._table
+        if self.cache is not None:
+            table = {
+                name: _CachedColumn(name, table[name], self.cache)
+                for name in names
+            }
+        read = partial(
+            _read_bcolz_data,
+            table,
             (len(dates), len(assets)),
-            [column.name for column in columns],
+            names,
             first_rows,
             last_rows,
             offsets,
         )
+        if self._num_threads is None or len(names) < 2:
+            return read()
+
+        pool = ThreadPool(min(self._num_threads, len(names)))
+        try:
+            return read(pool)
+        finally:
+            pool.close()
+            pool.join()
+
+
+class MmapDailyBarWriter(BcolzDailyBarWriter):
+    """
+    Class capable of writing daily OHLCV data to disk, uncompressed, in a
+    format that can be memory-mapped by MmapDailyBarReader.
+
+    Data is obtained from `gen_tables` and `to_uint32` exactly as for
+    BcolzDailyBarWriter, so an existing writer can produce this format by
+    mixing this class in ahead of it::
+
+        class MmapDailyBarWriterFromCSVs(MmapDailyBarWriter,
+                                         DailyBarWriterFromCSVs):
+            pass
+
+    `write` creates a directory containing a raw uint32 file for each OHLCV
+    column and a metadata.json file, and returns an MmapDailyBarReader over
+    the written data.
+
+    Each column file holds an (assets x calendar) array, in which each asset's
+    values are stored in a block covering every day of the calendar, with
+    zeros on days for which the asset has no data.  Assets are written as
+    they're produced by `gen_tables`, so no more than one asset is held in
+    memory at a time.  Assets with no data at all are skipped.
+
+    See Also
+    --------
+    MmapDailyBarReader : Consumer of the data written by this class.
+    """
+
+    def _write_internal(self, filename, calendar, iterator):
+        """
+        Internal implementation of write.
+
+        `iterator` should be an iterator yielding pairs of (asset, columns),
+        where `columns` is a dict in the format returned by uint32_columns.
+        """
+        if not exists(filename):
+            makedirs(filename)
+
+        calendar_nanos = calendar.asi8
+        ndays = len(calendar)
+        assets = []
+        first_row = {}
+        last_row = {}
+        calendar_offset = {}
+
+        files = {
+            name: open(join(filename, name + MMAP_COLUMN_SUFFIX), 'wb')
+            for name in US_EQUITY_PRICING_MMAP_COLUMNS
+        }
+        try:
+            block = zeros(ndays, dtype=uint32)
+            for asset_id, columns in iterator:
+                days = columns['day']
+                if not len(days):
+                    # Skip assets with no data, which have no first row.
+                    # Reading them raises a KeyError, as for any other asset
+                    # that wasn't written.
+                    continue
+                day_nanos = days.astype(int64) * (1000 * 1000 * 1000)
+                rows = calendar_nanos.searchsorted(day_nanos)
+                if not array_equal(
+                        calendar_nanos.take(rows, mode='clip'),
+                        day_nanos):
+                    raise ValueError(
+                        "Data for asset %s contains dates that aren't in the "
+                        "calendar." % asset_id
+                    )
+
+                for name, f in iteritems(files):
+                    block[:] = 0
+                    block[rows] = columns[name]
+                    block.tofile(f)
+
+                # Mirror the attrs written by BcolzDailyBarWriter, with rows
+                # counted in the flattened column.
+                asset_key = str(asset_id)
+                asset_start = len(assets) * ndays
+                first_row[asset_key] = int(asset_start + rows[0])
+                last_row[asset_key] = int(asset_start + rows[-1])
+                calendar_offset[asset_key] = int(rows[0])
+                assets.append(int(asset_id))
+        finally:
+            for f in itervalues(files):
+                f.close()
+
+        with open(join(filename, MMAP_METADATA_FILENAME), 'w') as f:
+            json.dump(
+                {
+                    'assets': assets,
+                    'first_row': first_row,
+                    'last_row': last_row,
+                    'calendar_offset': calendar_offset,
+                    'calendar': calendar_nanos.tolist(),
+                },
+                f,
+            )
+        return MmapDailyBarReader(filename)
+
+
+class MmapDailyBarReader(object):
+    """
+    Reader for raw pricing data written by MmapDailyBarWriter.
+
+    Column files are memory-mapped rather than read, so processes reading the
+    same data share the operating system's page cache instead of each holding
+    a decompressed copy.  The mappings are copy-on-write: writes to arrays
+    returned by `load_raw_arrays` are never seen by other readers or written
+    back to disk, but they are seen by later loads from the same reader.
+    `adjusted_array` copies views before filling in masked values, so
+    USEquityPricingLoader never writes to the mappings.
+
+    Values are interpreted as by BcolzDailyBarReader.  Volumes are returned
+    as views of the mapped data whenever the requested assets are stored
+    next to each other, in order.  Prices are always converted into new
+    float64 arrays.
+
+    Parameters
+    ----------
+    path : str
+        The directory written by MmapDailyBarWriter.
+    """
+    def __init__(self, path):
+        with open(join(path, MMAP_METADATA_FILENAME)) as f:
+            metadata = json.load(f)
+
+        self._path = path
+        self._calendar = DatetimeIndex(metadata['calendar'], tz='UTC')
+        self._assets = Int64Index(metadata['assets'])
+        self._columns = {}
+
+    def _column(self, name):
+        """
+        Get the (assets x calendar) memory-mapped array for column `name`.
+        """
+        try:
+            return self._columns[name]
+        except KeyError:
+            column = self._columns[name] = memmap(
+                join(self._path, name + MMAP_COLUMN_SUFFIX),
+                dtype=uint32,
+                mode='c',
+                shape=(len(self._assets), len(self._calendar)),
+            )
+            return column
+
+    def load_raw_arrays(self, columns, dates, assets):
+        start, stop = _calendar_slice_locs(self._calendar, dates[0], dates[-1])
+        if not array_equal(
+                self._calendar[start:stop + 1].values,
+                dates.values):
+            raise ValueError("Incompatible calendars!")
+
+        indices = self._assets.get_indexer(assets)
+        if (indices == -1).any():
+            raise KeyError(
+                "No data for assets %s" % list(array(assets)[indices == -1])
+            )
+        if len(indices) and (diff(indices) == 1).all():
+            # Slicing rather than indexing gives us a view.
+            indices = slice(indices[0], indices[-1] + 1)
+
+        results = []
+        for column in columns:
+            raw = self._column(column.name)[indices, start:stop + 1].T
+            if column.name in OHLC:
+                prices = raw * .001
+                prices[raw == 0] = nan
+                results.append(prices)
+            else:
+                results.append(raw)
+        return results
 
 
 class SQLiteAdjustmentWriter(object):
@@ -613,6 +1031,10 @@ class USEquityPricingLoader(FFCLoader):
     FFCLoader for US Equity Pricing
 
     Delegates loading of baselines and adjustments.
+
+    Prices are loaded as float64 and volumes as uint32.  Entries outside of
+    the mask are NaN for prices and 0 for volumes, since there's no integer
+    NaN.  Adjusted volumes are rounded to the nearest integer.
     """
 
     def __init__(self, raw_price_loader, adjustments_loader):
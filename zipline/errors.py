@@ -366,6 +366,17 @@ class BadPercentileBounds(ZiplineError):
     )
 
 
+class BadTopBottomN(ZiplineError):
+    """
+    Raised by Factor.top and Factor.bottom when the requested number of assets
+    is invalid.
+    """
+    msg = (
+        "The number of assets passing a top or bottom filter must be a "
+        "positive integer.\nInput was N={N}."
+    )
+
+
 class UnknownRankMethod(ZiplineError):
     """
     Raised during construction of a Rank factor when supplied a bad Rank
@@ -0,0 +1,7 @@
+"""
+AdjustedArrayWindow for buffers of float32.
+"""
+from numpy cimport float32_t
+ctypedef float32_t[:, :] databuffer
+
+include "_windowtemplate.pxi"
@@ -0,0 +1,7 @@
+"""
+AdjustedArrayWindow for buffers of float64.
+"""
+from numpy cimport float64_t
+ctypedef float64_t[:, :] databuffer
+
+include "_windowtemplate.pxi"
@@ -0,0 +1,8 @@
+"""
+AdjustedArrayWindow for buffers of int64, which are also used to store
+datetime64[ns] values.
+"""
+from numpy cimport int64_t
+ctypedef int64_t[:, :] databuffer
+
+include "_windowtemplate.pxi"
@@ -0,0 +1,7 @@
+"""
+AdjustedArrayWindow for buffers of uint32.
+"""
+from numpy cimport uint32_t
+ctypedef uint32_t[:, :] databuffer
+
+include "_windowtemplate.pxi"
@@ -0,0 +1,7 @@
+"""
+AdjustedArrayWindow for buffers of uint8, which are used to store bools.
+"""
+from numpy cimport uint8_t
+ctypedef uint8_t[:, :] databuffer
+
+include "_windowtemplate.pxi"
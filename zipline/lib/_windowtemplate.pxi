@@ -0,0 +1,211 @@
+"""
+Template for AdjustedArrayWindow classes.
+
+This file is intended to be used by inclusion into Cython modules that define
+a ``databuffer`` ctypedef, a two-dimensional memoryview type over the buffers
+of the AdjustedArrays being iterated.  See _float64window.pyx for an example.
+"""
+from numpy import asarray, empty_like
+from numpy.lib.stride_tricks import as_strided
+from numpy cimport int64_t, ndarray
+
+from zipline.errors import (
+    WindowLengthNotPositive,
+    WindowLengthTooLong,
+)
+
+
+cdef _check_window_length(databuffer data, Py_ssize_t window_length):
+    if window_length < 1:
+        raise WindowLengthNotPositive(window_length=window_length)
+
+    if window_length > data.shape[0]:
+        raise WindowLengthTooLong(
+            nrows=data.shape[0],
+            window_length=window_length,
+        )
+
+
+cdef class AdjustedArrayWindow:
+    """
+    An iterator representing a moving view over an AdjustedArray.
+
+    This object initially shares the data buffer of the AdjustedArray over
+    which it's iterating, which it never writes to.  The first time an
+    adjustment needs to be applied, it makes a private copy of the rows that
+    can still appear in a window, and it mutates that copy at each later step
+    to allow us to show different data when looking back over the array.
+    Iterating over an array without adjustments therefore never copies it,
+    no matter how many iterators share the array.
+
+    The arrays yielded by this iterator are always views over either the
+    shared or the private data.
+
+    Consecutive windows can also be read as a single 3-D block with
+    `next_block`, as long as no adjustments need to be applied between them.
+    """
+
+    cdef databuffer data
+    cdef readonly object dtype
+    cdef bint owns_data
+    cdef readonly Py_ssize_t window_length
+    cdef Py_ssize_t anchor, max_anchor, next_adj, adj_pos
+    cdef object adjustments
+    cdef int64_t[:] adjustment_indices
+
+    def __cinit__(self,
+                  databuffer data,
+                  object dtype,
+                  object adjustments,
+                  Py_ssize_t window_length,
+                  Py_ssize_t offset):
+
+        _check_window_length(data, window_length)
+
+        self.data = data
+        self.dtype = dtype
+        self.owns_data = False
+        self.window_length = window_length
+
+        # anchor is the index of the row **after** the row from which we're
+        # looking back.
+        self.anchor = window_length + offset
+        self.max_anchor = data.shape[0]
+
+        # adjustments is a PackedAdjustments.  adj_pos is the position
+        # in the table of the next adjustment to apply.
+        self.adjustments = adjustments
+        self.adjustment_indices = adjustments.apply_idxs
+        self.adj_pos = 0
+        self._update_next_adj()
+
+    cdef _update_next_adj(self):
+        if self.adj_pos < self.adjustment_indices.shape[0]:
+            self.next_adj = self.adjustment_indices[self.adj_pos]
+        else:
+            self.next_adj = self.max_anchor
+
+    def __iter__(self):
+        return self
+
+    cdef _apply_adjustments(self, Py_ssize_t anchor):
+        """
+        Apply any adjustments that occured before `anchor`.  Equivalently,
+        apply any adjustments known **on or before** the date for which we're
+        calculating a window.
+        """
+        # Rows before this one will never appear in another window.
+        cdef Py_ssize_t first_live_row = anchor - self.window_length
+
+        if self.next_adj >= anchor:
+            return
+
+        if not self.owns_data:
+            self._copy_live_rows(first_live_row)
+
+        self.adj_pos = self.adjustments.apply(
+            self.data,
+            self.adj_pos,
+            anchor,
+            first_live_row,
+        )
+        self._update_next_adj()
+
+    cdef _copy_live_rows(self, Py_ssize_t first_live_row):
+        """
+        Replace our view of the shared data with a private buffer holding a
+        copy of every row from `first_live_row` onward.
+
+        Earlier rows of the private buffer are left uninitialized.  They're
+        never read, and adjustments never write to them, so for large buffers
+        their pages are typically never touched at all.
+        """
+        cdef ndarray private = empty_like(asarray(self.data))
+        private[first_live_row:] = asarray(self.data[first_live_row:])
+        self.data = private
+        self.owns_data = True
+
+    def __next__(self):
+        cdef:
+            ndarray out
+            Py_ssize_t start, anchor
+
+        anchor = self.anchor
+        if anchor > self.max_anchor:
+            raise StopIteration()
+
+        self._apply_adjustments(anchor)
+
+        start = anchor - self.window_length
+        out = asarray(self.data[start:self.anchor]).view(self.dtype)
+        out.setflags(write=False)
+
+        self.anchor += 1
+        return out
+
+    cpdef Py_ssize_t block_length(self):
+        """
+        The number of windows that can be read as a single block by
+        `next_block`.
+
+        This is the number of remaining windows before the next adjustment
+        must be applied, or 0 if the iterator is exhausted.
+        """
+        cdef Py_ssize_t anchor = self.anchor
+        if anchor > self.max_anchor:
+            return 0
+
+        self._apply_adjustments(anchor)
+        return min(self.next_adj, self.max_anchor) - anchor + 1
+
+    cpdef next_block(self, Py_ssize_t nrows):
+        """
+        Read the next `nrows` windows as a single block.
+
+        Parameters
+        ----------
+        nrows : int
+            Number of windows to read.  Must be between 1 and
+            `self.block_length()`.
+
+        Returns
+        -------
+        block : np.array
+            A read-only array of shape (nrows, window_length, ncols), where
+            block[i] is the window that would have been produced by the i'th
+            call to `next`.  The block is a strided view over our data, so it
+            must not be used after the iterator has been advanced past it.
+        """
+        cdef:
+            ndarray data
+            ndarray out
+            Py_ssize_t available = self.block_length()
+
+        if nrows < 1 or nrows > available:
+            raise ValueError(
+                "Can't read a block of %d windows; %d available." % (
+                    nrows,
+                    available,
+                )
+            )
+
+        data = asarray(
+            self.data[self.anchor - self.window_length:]
+        ).view(self.dtype)
+        out = as_strided(
+            data,
+            shape=(nrows, self.window_length, data.shape[1]),
+            strides=(data.strides[0], data.strides[0], data.strides[1]),
+        )
+        out.setflags(write=False)
+
+        self.anchor += nrows
+        return out
+
+    def __repr__(self):
+        return "%s(window_length=%d, anchor=%d, max_anchor=%d)" % (
+            type(self).__name__,
+            self.window_length,
+            self.anchor,
+            self.max_anchor,
+        )
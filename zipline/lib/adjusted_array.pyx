@@ -1,34 +1,39 @@
 """
 Class capable of yielding adjusted chunks of an ndarray.
 """
-from cpython cimport (
-    Py_EQ,
-    PyObject_RichCompare,
-)
 from numpy import (
     asarray,
     bool_,
+    datetime64,
+    dtype as dtype_,
+    float32,
     float64,
-    full,
+    int64,
     uint8,
+    uint32,
 )
-from numpy cimport (
-    float64_t,
-    ndarray,
-    uint8_t,
-)
-
-from zipline.errors import (
-    WindowLengthNotPositive,
-    WindowLengthTooLong,
-)
+from numpy cimport ndarray
 
-cdef extern from "math.h" nogil:
-    float NAN
+from zipline.lib.adjustment import PackedAdjustments
+from zipline.lib._float32window import AdjustedArrayWindow as Float32Window
+from zipline.lib._float64window import AdjustedArrayWindow as Float64Window
+from zipline.lib._int64window import AdjustedArrayWindow as Int64Window
+from zipline.lib._uint32window import AdjustedArrayWindow as UInt32Window
+from zipline.lib._uint8window import AdjustedArrayWindow as UInt8Window
 
 
 NOMASK = None
 
+# Map from the dtype of an AdjustedArray's buffer to the type of window used
+# to iterate over it.
+_WINDOW_TYPES = {
+    float32: Float32Window,
+    float64: Float64Window,
+    int64: Int64Window,
+    uint32: UInt32Window,
+    uint8: UInt8Window,
+}
+
 
 def ensure_ndarray(ndarray_or_adjusted_array):
     """
@@ -62,164 +67,163 @@ cpdef adjusted_array(ndarray data, ndarray mask, dict adjustments):
     dtypes.
 
     If mask is None, the array is assumed to contain all valid data points.
-    Otherwise mask should be an array of uint8 of the same shape
-    as data, containing 0s for valid values and 1s for invalid values.
+    Otherwise mask should be an array of bools of the same shape as data,
+    containing True for valid values and False for invalid values.  Invalid
+    values are replaced with NaN for floats, 0 for integers, False for bools,
+    and NaT for datetimes.  They're replaced in place if `data` owns its
+    memory, and in a copy otherwise, so that views of memory-mapped files or
+    of a caller's buffers are never modified.  Read-only data is always
+    copied, since windows can only be built over writable buffers.
+
+    float32 data is stored as float32 and all other floats are stored as
+    float64.  uint32 data is stored as uint32 and all
+    other integers are stored as int64.  Bools and datetimes are stored as
+    uint8 and int64, respectively, and are viewed with their original dtype
+    when read.  Data of any other dtype is converted to float64.
     """
-    if data.dtype != float64:
-        data = data.astype(float64)
-    if mask is not NOMASK:
-        if mask.dtype == bool_:
-            # Cython isn't smart enough to make this coercion even though the
-            # arrays are bools internally.
-            mask = mask.view(uint8)
-
-    return Float64AdjustedArray(data, mask, adjustments)
+    kind = data.dtype.kind
+    if kind == 'b':
+        dtype = bool_
+        buffer_dtype = uint8
+        missing_value = False
+    elif kind == 'M':
+        dtype = buffer_dtype = datetime64('NaT', 'ns').dtype
+        missing_value = datetime64('NaT', 'ns')
+    elif data.dtype == float32:
+        dtype = buffer_dtype = float32
+        missing_value = float('nan')
+    elif data.dtype == uint32:
+        dtype = buffer_dtype = uint32
+        missing_value = 0
+    elif kind in 'iu':
+        dtype = buffer_dtype = int64
+        missing_value = 0
+    else:
+        dtype = buffer_dtype = float64
+        missing_value = float('nan')
 
+    if data.dtype != dtype:
+        data = data.astype(dtype)
+    elif not data.flags.writeable:
+        data = data.copy()
 
-cdef _check_window_length(object data, int window_length):
+    if mask is not NOMASK:
+        mask_shape = (mask.shape[0], mask.shape[1])
+        data_shape = (data.shape[0], data.shape[1])
+        if mask_shape != data_shape:
+            raise ValueError(
+                "Mask shape %s != data shape %s" % (mask_shape, data_shape)
+            )
+        # Fill in missing values for the mask.
+        invalid = ~mask.astype(bool_, copy=False)
+        if invalid.any():
+            if not data.flags.owndata:
+                data = data.copy()
+            data[invalid] = missing_value
 
-    if window_length < 1:
-        raise WindowLengthNotPositive(window_length=window_length)
+    if kind == 'M':
+        buffer_dtype = int64
 
-    if window_length > data.shape[0]:
-        raise WindowLengthTooLong(
-            nrows=data.shape[0],
-            window_length=window_length,
-        )
+    return AdjustedArray(data.view(buffer_dtype), dtype, adjustments)
 
 
 cdef class AdjustedArray:
-
-    property data:
-        def __get__(self):
-            out = asarray(self._data, dtype=self.dtype)
-            out.setflags(write=False)
-            return out
-
-
-cdef class Float64AdjustedArray(AdjustedArray):
     """
-    Adjusted array of float64.
+    An array that can be iterated with a variable-length window, and which
+    can provide different views on data from different perspectives.
+
+    Parameters
+    ----------
+    data : np.array[float64 | float32 | int64 | uint32 | uint8]
+        The baseline data values.  Bools should be stored as uint8 and
+        datetimes as int64.
+    dtype : np.dtype
+        The dtype with which `data` is viewed when read.
+    adjustments : dict[int -> list[Adjustment]]
+        A dict mapping row indices to lists of adjustments to apply when we
+        reach that row.
     """
     cdef:
-        readonly float64_t[:, :] _data
-        dict adjustments
-
-    def __cinit__(self,
-                  float64_t[:, :] data not None,
-                  uint8_t[:, :] mask,  # None is equivalent to all 0s.
-                  dict adjustments):
-        cdef Py_ssize_t row, col
-
-        if mask is not NOMASK:
-            if not PyObject_RichCompare(mask.shape, data.shape, Py_EQ):
-                raise ValueError(
-                    "Mask shape %s != data shape %s" % (
-                        (mask.shape[0], mask.shape[1]),
-                        (data.shape[0], data.shape[1]),
-                    )
-                )
-            # Fill in NaNs for the mask.
-            for row in range(mask.shape[0]):
-                for col in range(mask.shape[1]):
-                    if not mask[row, col]:
-                        data[row, col] = NAN
-
+        readonly ndarray _data
+        readonly object dtype
+        object adjustments
+        object _window_type
+
+    def __cinit__(self, ndarray data not None, object dtype, dict adjustments):
+        self._window_type = _WINDOW_TYPES[data.dtype.type]
+        # Pack our adjustments once, so that every window over this array
+        # can apply them without dispatching to each Adjustment object.
+        self.adjustments = PackedAdjustments(adjustments)
+        if dtype_(dtype).kind in 'bM' and \
+                not self.adjustments.only_overwrites():
+            raise TypeError(
+                "Only overwrites can be applied to arrays of %s." % dtype
+            )
         self._data = data
-        self.adjustments = adjustments
+        self.dtype = dtype
 
-    property dtype:
+    property data:
         def __get__(self):
-            return float64
+            out = self._data.view(self.dtype)
+            out.setflags(write=False)
+            return out
 
     cpdef traverse(self, Py_ssize_t window_length, Py_ssize_t offset=0):
-        return _Float64AdjustedArrayWindow(
-            self._data.copy(),
+        """
+        Produce an iterator rolling windows rows over our data.
+        Each emitted window will have `window_length` rows.
+
+        Parameters
+        ----------
+        window_length : int
+            The number of rows in each emitted window.
+        offset : int, optional
+            Number of rows to skip before the first window.
+        """
+        return self._window_type(
+            self._data,
+            self.dtype,
             self.adjustments,
             window_length,
             offset,
         )
 
-
-cdef class _Float64AdjustedArrayWindow:
-    """
-    An iterator representing a moving view over an AdjustedArray.
-
-    This object stores a copy of the data from the AdjustedArray over which
-    it's iterating.  At each step in the iteration, it mutates its copy to
-    allow us to show different data when looking back over the array.
-
-    The arrays yielded by this iterator are always views over the underlying
-    data.
-    """
-
-    cdef float64_t[:, :] data
-    cdef readonly Py_ssize_t window_length
-    cdef Py_ssize_t anchor, max_anchor, next_adj
-    cdef dict adjustments
-    cdef list adjustment_indices
-
-    def __cinit__(self,
-                  float64_t[:, :] data,
-                  dict adjustments,
-                  Py_ssize_t window_length,
-                  Py_ssize_t offset):
-
-        _check_window_length(data, window_length)
-
-        self.data = data
-        self.window_length = window_length
-
-        # anchor is the index of the row **after** the row from which we're
-        # looking back.
-        self.anchor = window_length + offset
-        self.max_anchor = data.shape[0]
-
-        self.adjustments = adjustments
-        self.adjustment_indices = sorted(adjustments, reverse=True)
-
-        if len(self.adjustment_indices) > 0:
-            self.next_adj = self.adjustment_indices.pop()
-        else:
-            self.next_adj = self.max_anchor
-
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        cdef:
-            ndarray[float64_t, ndim=2] out
-            object adjustment
-            Py_ssize_t start, anchor
-
-        anchor = self.anchor
-        if anchor > self.max_anchor:
-            raise StopIteration()
-
-        # Apply any adjustments that occured before our current anchor.
-        # Equivalently, apply any adjustments known **on or before** the date
-        # for which we're calculating a window.
-        while self.next_adj < anchor:
-
-            for adjustment in self.adjustments[self.next_adj]:
-                adjustment.mutate(self.data)
-
-            if len(self.adjustment_indices) > 0:
-                self.next_adj = self.adjustment_indices.pop()
-            else:
-                self.next_adj = self.max_anchor
-
-        start = anchor - self.window_length
-        out = asarray(self.data[start:self.anchor])
-        out.setflags(write=False)
-
-        self.anchor += 1
+    cpdef astype(self, object dtype):
+        """
+        Convert to an AdjustedArray of another floating-point dtype.
+
+        The new array shares our adjustments, and adjustments are applied to
+        the new array's windows in its own precision.
+
+        Parameters
+        ----------
+        dtype : np.float32 | np.float64
+            The dtype of the new array.
+
+        Returns
+        -------
+        converted : AdjustedArray
+            The converted array, or `self` if we already have dtype `dtype`.
+        """
+        cdef AdjustedArray out
+        dtype = dtype_(dtype)
+        if dtype == self.dtype:
+            return self
+        if dtype not in (float32, float64) or \
+                self._data.dtype not in (float32, float64):
+            raise TypeError(
+                "Can't convert AdjustedArray of %s to %s." % (
+                    self.dtype,
+                    dtype,
+                )
+            )
+        out = AdjustedArray(self._data.astype(dtype), dtype.type, {})
+        out.adjustments = self.adjustments
         return out
 
     def __repr__(self):
-        return "%s(window_length=%d, anchor=%d, max_anchor=%d)" % (
+        return "%s(dtype=%s, shape=%s)" % (
             type(self).__name__,
-            self.window_length,
-            self.anchor,
-            self.max_anchor,
+            self.dtype,
+            (self._data.shape[0], self._data.shape[1]),
         )
@@ -1,7 +1,19 @@
 from cpython cimport Py_EQ
-
-from pandas import isnull
-from numpy cimport float64_t, uint8_t
+cimport cython
+from libc.math cimport round
+
+from pandas import (
+    isnull,
+    Timestamp,
+)
+from numpy import (
+    asarray,
+    empty,
+    float64,
+    int64,
+    uint8,
+)
+from numpy cimport float32_t, float64_t, int64_t, uint8_t, uint32_t
 # Purely for readability. There aren't C-level declarations for these types.
 ctypedef object Int64Index_t
 ctypedef object DatetimeIndex_t
@@ -95,6 +107,11 @@ cpdef _from_assets_and_dates(cls,
 cdef class Float64Adjustment:
     """
     Base class for adjustments that operate on Float64 buffers.
+
+    Subclasses implement ``mutate(data, start_row=0)``, which applies the
+    adjustment in place to rows first_row through last_row of column `col`
+    of `data`.  Rows before `start_row` are left untouched, which lets
+    callers skip rows they'll never read again.
     """
     cdef:
         readonly Py_ssize_t col, first_row, last_row
@@ -157,12 +174,12 @@ cdef class Float64Multiply(Float64Adjustment):
            [  6.,  28.,   8.]])
     """
 
-    cpdef mutate(self, float64_t[:, :] data):
+    cpdef mutate(self, float64_t[:, :] data, Py_ssize_t start_row=0):
         cdef Py_ssize_t row, col
         col = self.col
 
         # last_row + 1 because last_row should also be affected.
-        for row in range(self.first_row, self.last_row + 1):
+        for row in range(max(self.first_row, start_row), self.last_row + 1):
             data[row, col] *= self.value
 
 
@@ -188,12 +205,12 @@ cdef class Float64Overwrite(Float64Adjustment):
            [ 6.,  0.,  8.]])
     """
 
-    cpdef mutate(self, float64_t[:, :] data):
+    cpdef mutate(self, float64_t[:, :] data, Py_ssize_t start_row=0):
         cdef Py_ssize_t row, col
         col = self.col
 
         # last_row + 1 because last_row should also be affected.
-        for row in range(self.first_row, self.last_row + 1):
+        for row in range(max(self.first_row, start_row), self.last_row + 1):
             data[row, col] = self.value
 
 
@@ -219,10 +236,395 @@ cdef class Float64Add(Float64Adjustment):
            [ 6.,  8.,  8.]])
     """
 
-    cpdef mutate(self, float64_t[:, :] data):
+    cpdef mutate(self, float64_t[:, :] data, Py_ssize_t start_row=0):
         cdef Py_ssize_t row, col
         col = self.col
 
         # last_row + 1 because last_row should also be affected.
-        for row in range(self.first_row, self.last_row + 1):
+        for row in range(max(self.first_row, start_row), self.last_row + 1):
             data[row, col] += self.value
+
+
+cdef int64_t _as_int64(object value) except? -1:
+    """
+    Convert an adjustment value to an int64.  Datetime-like values are
+    converted to nanoseconds since the epoch.
+    """
+    if isinstance(value, bool):
+        return int(value)
+    try:
+        return int(value)
+    except TypeError:
+        return Timestamp(value).value
+
+
+cdef class Int64Adjustment:
+    """
+    Base class for adjustments that operate on integral buffers.
+
+    Buffers of datetime64[ns] and bool values are stored as integers, so
+    adjustments to them are also Int64Adjustments.
+    """
+    cdef:
+        readonly Py_ssize_t col, first_row, last_row
+        readonly int64_t value
+
+    def __cinit__(self,
+                  Py_ssize_t first_row,
+                  Py_ssize_t last_row,
+                  Py_ssize_t col,
+                  object value):
+        assert 0 <= first_row <= last_row
+
+        self.first_row = first_row
+        self.last_row = last_row
+        self.col = col
+        self.value = _as_int64(value)
+
+    from_assets_and_dates = classmethod(_from_assets_and_dates)
+
+    def __repr__(self):
+        return "%s(first_row=%d, last_row=%d, col=%d, value=%d)" % (
+            type(self).__name__,
+            self.first_row,
+            self.last_row,
+            self.col,
+            self.value,
+        )
+
+    def __richcmp__(self, object other, int op):
+        """
+        Rich comparison method.  Only Equality is defined.
+        """
+        if op != Py_EQ or type(self) != type(other):
+            return NotImplemented
+
+        return (
+            (self.first_row, self.last_row, self.col, self.value) == \
+            (other.first_row, other.last_row, other.col, other.value)
+        )
+
+    cpdef mutate(self, object data, Py_ssize_t start_row=0):
+        cdef object values = asarray(data)
+        if values.dtype.kind == 'M':
+            values = values.view(int64)
+
+        # last_row + 1 because last_row should also be affected.
+        values[max(self.first_row, start_row):self.last_row + 1, self.col] = \
+            self.value
+
+
+cdef class Int64Overwrite(Int64Adjustment):
+    """
+    An adjustment that overwrites with an integer.
+
+    Example
+    -------
+
+    >>> import numpy as np
+    >>> arr = np.arange(9).reshape(3, 3)
+    >>> adj = Int64Overwrite(first_row=1, last_row=2, col=1, value=-1)
+    >>> adj.mutate(arr)
+    >>> arr
+    array([[ 0,  1,  2],
+           [ 3, -1,  5],
+           [ 6, -1,  8]])
+    """
+    pass
+
+
+cdef class Datetime64Overwrite(Int64Adjustment):
+    """
+    An adjustment that overwrites with a datetime.
+
+    Values are stored as nanoseconds since the epoch.
+
+    Example
+    -------
+
+    >>> import numpy as np
+    >>> arr = np.zeros((2, 2), dtype='datetime64[ns]')
+    >>> adj = Datetime64Overwrite(
+    ...     first_row=0,
+    ...     last_row=0,
+    ...     col=1,
+    ...     value=np.datetime64('2014-01-01', 'ns'),
+    ... )
+    >>> adj.mutate(arr)
+    >>> arr[0, 1] == np.datetime64('2014-01-01', 'ns')
+    True
+    """
+    pass
+
+
+cdef class BooleanOverwrite(Int64Adjustment):
+    """
+    An adjustment that overwrites with a boolean.
+
+    Example
+    -------
+
+    >>> import numpy as np
+    >>> arr = np.zeros((2, 2), dtype=bool)
+    >>> adj = BooleanOverwrite(first_row=0, last_row=1, col=0, value=True)
+    >>> adj.mutate(arr)
+    >>> arr
+    array([[ True, False],
+           [ True, False]], dtype=bool)
+    """
+    def __cinit__(self,
+                  Py_ssize_t first_row,
+                  Py_ssize_t last_row,
+                  Py_ssize_t col,
+                  object value):
+        self.value = bool(value)
+
+
+# Codes for the kinds of adjustment stored in a PackedAdjustments.
+cdef enum:
+    _MULTIPLY = 0
+    _OVERWRITE = 1
+    _ADD = 2
+    _INT_OVERWRITE = 3
+
+
+ctypedef fused data_t:
+    float64_t
+    float32_t
+    int64_t
+    uint32_t
+    uint8_t
+
+
+cdef class PackedAdjustments:
+    """
+    A table of adjustments stored as parallel arrays, sorted by the index of
+    the row on which each adjustment is applied.
+
+    Applying adjustments from the table doesn't require calling a method on
+    each adjustment, so all the adjustments due at a given row can be
+    applied in a single pass without holding the GIL.
+
+    Float64Adjustments can be applied to buffers of any numeric type.
+    Results are rounded to the nearest integer when applied to integral
+    buffers, and applying them raises a ValueError if a result is out of the
+    buffer's range.
+    Int64Adjustments can be applied to buffers of any type.
+
+    Parameters
+    ----------
+    adjustments : dict[int -> list[Float64Adjustment or Int64Adjustment]]
+        Map from apply row index to the adjustments applied at that row, in
+        the order in which they're applied.
+
+    Example
+    -------
+
+    >>> import numpy as np
+    >>> arr = np.arange(9, dtype=float).reshape(3, 3)
+    >>> packed = PackedAdjustments({
+    ...     1: [Float64Multiply(first_row=0, last_row=0, col=1, value=4.0)],
+    ...     2: [Float64Overwrite(first_row=0, last_row=1, col=2, value=0.0)],
+    ... })
+    >>> packed.apply(arr, 0, 2, 0)
+    1
+    >>> arr
+    array([[ 0.,  4.,  2.],
+           [ 3.,  4.,  5.],
+           [ 6.,  7.,  8.]])
+    """
+    cdef:
+        readonly int64_t[:] apply_idxs
+        readonly int64_t[:] first_rows
+        readonly int64_t[:] last_rows
+        readonly int64_t[:] cols
+        readonly uint8_t[:] kinds
+        readonly float64_t[:] values
+        readonly int64_t[:] int_values
+
+    def __cinit__(self, dict adjustments not None):
+        cdef:
+            Py_ssize_t i = 0
+            Py_ssize_t apply_idx
+            object adjustment
+            Py_ssize_t size = sum(map(len, adjustments.values()))
+
+        self.apply_idxs = empty(size, dtype=int64)
+        self.first_rows = empty(size, dtype=int64)
+        self.last_rows = empty(size, dtype=int64)
+        self.cols = empty(size, dtype=int64)
+        self.kinds = empty(size, dtype=uint8)
+        self.values = empty(size, dtype=float64)
+        self.int_values = empty(size, dtype=int64)
+
+        for apply_idx in sorted(adjustments):
+            for adjustment in adjustments[apply_idx]:
+                self.values[i] = self.int_values[i] = 0
+                if isinstance(adjustment, Int64Adjustment):
+                    self.kinds[i] = _INT_OVERWRITE
+                    self.int_values[i] = adjustment.value
+                else:
+                    if isinstance(adjustment, Float64Multiply):
+                        self.kinds[i] = _MULTIPLY
+                    elif isinstance(adjustment, Float64Overwrite):
+                        self.kinds[i] = _OVERWRITE
+                    elif isinstance(adjustment, Float64Add):
+                        self.kinds[i] = _ADD
+                    else:
+                        raise TypeError(
+                            "Can't pack adjustment of type %s" %
+                            type(adjustment).__name__
+                        )
+                    self.values[i] = adjustment.value
+                self.apply_idxs[i] = apply_idx
+                self.first_rows[i] = adjustment.first_row
+                self.last_rows[i] = adjustment.last_row
+                self.cols[i] = adjustment.col
+                i += 1
+
+    def __len__(self):
+        return self.apply_idxs.shape[0]
+
+    cpdef bint only_overwrites(self):
+        """
+        Whether every adjustment in the table overwrites values rather than
+        doing arithmetic on them.
+
+        Only overwrites are meaningful for buffers of bools and datetimes.
+        """
+        cdef uint8_t kind
+        for kind in self.kinds:
+            if kind != _OVERWRITE and kind != _INT_OVERWRITE:
+                return False
+        return True
+
+    def apply(self,
+              object data,
+              Py_ssize_t start,
+              Py_ssize_t stop_idx,
+              Py_ssize_t min_row):
+        """
+        Apply adjustments to `data` in place.
+
+        Parameters
+        ----------
+        data : np.array[float64 | float32 | int64 | uint32 | uint8]
+            The buffer to adjust.  Buffers of datetimes and bools should be
+            passed as views of int64 and uint8, respectively.
+        start : int
+            Position in the table of the first adjustment to apply.
+        stop_idx : int
+            Adjustments are applied, in order, until reaching one whose apply
+            index is not before `stop_idx`.
+        min_row : int
+            Rows of `data` before `min_row` are left untouched.
+
+        Returns
+        -------
+        stop : int
+            The position in the table of the first unapplied adjustment.
+
+        Raises
+        ------
+        ValueError
+            If an adjustment of an integral buffer gives a value that isn't
+            representable in the buffer's type, such as NaN or a value that
+            would overflow.  Other results are rounded to the nearest integer,
+            with halves rounded away from zero.
+        """
+        return _apply_packed(self, data, start, stop_idx, min_row)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _apply_packed(PackedAdjustments table,
+                  data_t[:, :] data,
+                  Py_ssize_t start,
+                  Py_ssize_t stop_idx,
+                  Py_ssize_t min_row):
+    """
+    Implementation of PackedAdjustments.apply, specialized for each type of
+    buffer.
+    """
+    cdef:
+        Py_ssize_t i = start, row, first_row, last_row, col
+        Py_ssize_t size = table.apply_idxs.shape[0]
+        Py_ssize_t nrows = data.shape[0], ncols = data.shape[1]
+        uint8_t kind
+        float64_t value, result, lower = 0, upper = 0
+        data_t new_value
+        int64_t[:] apply_idxs = table.apply_idxs
+        int64_t[:] first_rows = table.first_rows
+        int64_t[:] last_rows = table.last_rows
+        int64_t[:] cols = table.cols
+        uint8_t[:] kinds = table.kinds
+        float64_t[:] values = table.values
+        int64_t[:] int_values = table.int_values
+
+    # Results of arithmetic on integral buffers must lie in [lower, upper).
+    if data_t is int64_t:
+        lower, upper = -9223372036854775808.0, 9223372036854775808.0
+    elif data_t is uint32_t:
+        upper = 4294967296.0
+    elif data_t is uint8_t:
+        upper = 256.0
+
+    with nogil:
+        while i < size and apply_idxs[i] < stop_idx:
+            first_row = max(first_rows[i], min_row)
+            # last_row + 1 because last_row should also be affected.
+            last_row = last_rows[i] + 1
+            col = cols[i]
+            kind = kinds[i]
+            value = values[i]
+            if last_row > nrows or not 0 <= col < ncols:
+                with gil:
+                    raise IndexError(
+                        "Adjustment at position %d is out of bounds for "
+                        "data of shape (%d, %d)." % (i, nrows, ncols)
+                    )
+
+            if kind == _INT_OVERWRITE:
+                new_value = <data_t>int_values[i]
+                if data_t is uint8_t:
+                    # uint8 buffers hold bools.
+                    new_value = new_value != 0
+                for row in range(first_row, last_row):
+                    data[row, col] = new_value
+            elif data_t is float64_t or data_t is float32_t:
+                if kind == _MULTIPLY:
+                    for row in range(first_row, last_row):
+                        data[row, col] = <data_t>(data[row, col] * value)
+                elif kind == _ADD:
+                    for row in range(first_row, last_row):
+                        data[row, col] = <data_t>(data[row, col] + value)
+                else:
+                    for row in range(first_row, last_row):
+                        data[row, col] = <data_t>value
+            else:
+                # Converting NaN or an out-of-range float to an integer is
+                # undefined, so check every result before storing it.
+                for row in range(first_row, last_row):
+                    if kind == _MULTIPLY:
+                        result = round(data[row, col] * value)
+                    elif kind == _ADD:
+                        result = round(data[row, col] + value)
+                    else:
+                        result = round(value)
+                    if not lower <= result < upper:
+                        with gil:
+                            raise ValueError(
+                                "Adjustment at position %d gives %r, which "
+                                "can't be stored in integral data." % (
+                                    i,
+                                    result,
+                                )
+                            )
+                    if data_t is uint8_t:
+                        # uint8 buffers hold bools.
+                        data[row, col] = result != 0
+                    else:
+                        data[row, col] = <data_t>result
+            i += 1
+
+    return i
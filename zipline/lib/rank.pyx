@@ -0,0 +1,240 @@
+"""
+Functions for ranking the rows of 2-D arrays.
+"""
+cimport cython
+from cython.parallel cimport parallel, prange
+from libc.math cimport isnan, NAN
+from libc.stdlib cimport free, malloc
+from numpy import (
+    asarray,
+    bool_,
+    empty,
+    float64,
+    uint8,
+)
+from numpy cimport float64_t, uint8_t
+
+
+cdef enum:
+    _AVERAGE = 0
+    _MIN = 1
+    _MAX = 2
+    _DENSE = 3
+    _ORDINAL = 4
+
+_METHOD_CODES = {
+    'average': _AVERAGE,
+    'min': _MIN,
+    'max': _MAX,
+    'dense': _DENSE,
+    'ordinal': _ORDINAL,
+}
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _merge_sort(float64_t[:] values,
+                      Py_ssize_t *idx,
+                      Py_ssize_t *tmp,
+                      Py_ssize_t n) nogil:
+    """
+    Stably sort the first `n` entries of `idx` by their values in `values`,
+    using `tmp` as scratch space.
+    """
+    cdef:
+        Py_ssize_t width = 1, start, mid, stop, left, right, k
+        Py_ssize_t *src = idx
+        Py_ssize_t *dst = tmp
+        Py_ssize_t *swap
+
+    while width < n:
+        start = 0
+        while start < n:
+            mid = min(start + width, n)
+            stop = min(start + 2 * width, n)
+            left, right, k = start, mid, start
+            while left < mid and right < stop:
+                # Take from the left on ties to keep the sort stable.
+                if values[src[right]] < values[src[left]]:
+                    dst[k] = src[right]
+                    right += 1
+                else:
+                    dst[k] = src[left]
+                    left += 1
+                k += 1
+            while left < mid:
+                dst[k] = src[left]
+                left += 1
+                k += 1
+            while right < stop:
+                dst[k] = src[right]
+                right += 1
+                k += 1
+            start = stop
+        swap = src
+        src = dst
+        dst = swap
+        width *= 2
+
+    if src != idx:
+        for k in range(n):
+            idx[k] = src[k]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _rank_row(float64_t[:] values,
+                    uint8_t[:] mask,
+                    float64_t[:] out,
+                    int method,
+                    Py_ssize_t *idx,
+                    Py_ssize_t *tmp) nogil:
+    """
+    Rank a single row of values into `out`.
+    """
+    cdef:
+        Py_ssize_t ncols = values.shape[0], nvalid = 0, j, k, group_end
+        float64_t rank, dense_rank = 0
+
+    for j in range(ncols):
+        if mask[j] and not isnan(values[j]):
+            idx[nvalid] = j
+            nvalid += 1
+        else:
+            out[j] = NAN
+
+    _merge_sort(values, idx, tmp, nvalid)
+
+    if method == _ORDINAL:
+        for k in range(nvalid):
+            out[idx[k]] = k + 1
+        return
+
+    k = 0
+    while k < nvalid:
+        # Find the end of the group of values tied with the k'th value.
+        group_end = k + 1
+        while group_end < nvalid and \
+                values[idx[group_end]] == values[idx[k]]:
+            group_end += 1
+
+        dense_rank += 1
+        if method == _MIN:
+            rank = k + 1
+        elif method == _MAX:
+            rank = group_end
+        elif method == _DENSE:
+            rank = dense_rank
+        else:
+            rank = (k + 1 + group_end) / 2.0
+
+        while k < group_end:
+            out[idx[k]] = rank
+            k += 1
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def rankdata_2d(object data, object mask, str method='ordinal'):
+    """
+    Compute the rank of each value within its row of a 2-D array.
+
+    Values at masked-out locations and NaN values are given a rank of NaN, and
+    don't take up a rank.  Ties are broken as in `scipy.stats.rankdata`.
+
+    Rows are ranked without holding the GIL, and in parallel when compiled
+    with OpenMP.
+
+    Parameters
+    ----------
+    data : np.array[ndim=2]
+        The values to rank.  Converted to float64 before ranking.
+    mask : np.array[bool, ndim=2] or None
+        Array of the same shape as `data` that is True for the values to
+        rank.  None is equivalent to an array of all True.
+    method : {'average', 'min', 'max', 'dense', 'ordinal'}
+        How to assign ranks to tied values.  See `scipy.stats.rankdata` for
+        the semantics of each method.
+
+    Returns
+    -------
+    ranks : np.array[float64, ndim=2]
+        The rank of each value in `data` within its row, starting at 1.
+
+    Example
+    -------
+
+    >>> import numpy as np
+    >>> data = np.array([[3.0, 1.0, np.nan, 1.0],
+    ...                  [2.0, 5.0, 4.0, 0.0]])
+    >>> mask = np.array([[True, True, True, True],
+    ...                  [True, True, False, True]])
+    >>> rankdata_2d(data, mask, 'min')
+    array([[  3.,   1.,  nan,   1.],
+           [  2.,   3.,  nan,   1.]])
+    """
+    cdef:
+        int code
+        float64_t[:, :] values
+        uint8_t[:, :] valid
+        float64_t[:, :] out
+        Py_ssize_t nrows, ncols, i
+        Py_ssize_t *idx
+        Py_ssize_t *tmp
+
+    try:
+        code = _METHOD_CODES[method]
+    except KeyError:
+        raise ValueError(
+            "Unknown rank method %r, expected one of %s." % (
+                method,
+                sorted(_METHOD_CODES),
+            )
+        )
+
+    data = asarray(data, dtype=float64)
+    if data.ndim != 2:
+        raise ValueError("Expected a 2-D array, got %d-D." % data.ndim)
+    if mask is None:
+        mask = empty(data.shape, dtype=uint8)
+        mask.fill(1)
+    else:
+        mask = asarray(mask, dtype=bool_)
+        if mask.shape != data.shape:
+            raise ValueError(
+                "Mask shape %s != data shape %s" % (mask.shape, data.shape)
+            )
+        mask = mask.view(uint8)
+
+    # Typed memoryviews can't be taken of read-only buffers, so copy them.
+    if not data.flags.writeable:
+        data = data.copy()
+    if not mask.flags.writeable:
+        mask = mask.copy()
+
+    values = data
+    valid = mask
+    nrows, ncols = data.shape
+    result = empty((nrows, ncols), dtype=float64)
+    out = result
+
+    if nrows == 0 or ncols == 0:
+        return result
+
+    with nogil, parallel():
+        # Each thread gets its own scratch space.
+        idx = <Py_ssize_t *>malloc(ncols * sizeof(Py_ssize_t))
+        tmp = <Py_ssize_t *>malloc(ncols * sizeof(Py_ssize_t))
+        if idx == NULL or tmp == NULL:
+            free(idx)
+            free(tmp)
+            with gil:
+                raise MemoryError()
+
+        for i in prange(nrows, schedule='static'):
+            _rank_row(values[i], valid[i], out[i], code, idx, tmp)
+
+        free(idx)
+        free(tmp)
+
+    return result
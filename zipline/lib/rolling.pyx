@@ -0,0 +1,568 @@
+"""
+Incremental rolling-window reductions over blocks of windows.
+
+Each function here consumes a block of consecutive windows, as produced by
+``AdjustedArrayWindow.next_block``: a 3-D array of shape
+(nrows, window_length, ncols) whose i'th entry is the window ending one row
+after the window at i - 1.  Rather than reducing every window from scratch,
+the sums behind most of these reductions are updated incrementally, by
+removing the values that leave each window and adding the ones that enter it,
+which makes the cost of each output row independent of the window length.
+
+Blocks never span an adjustment, so running state is never carried across a
+rewrite of history: each call starts from a full reduction of its first
+window.  Sums are also recomputed from scratch every `window_length` rows, to
+bound the accumulated rounding error.
+"""
+cimport cython
+from libc.math cimport isnan, INFINITY, NAN
+from libc.stdlib cimport free, malloc
+from numpy import float32, float64
+from numpy.lib.stride_tricks import as_strided
+from numpy cimport float32_t, float64_t
+
+
+ctypedef fused float_t:
+    float32_t
+    float64_t
+
+
+cdef struct _Sum:
+    # Sum of the finite values added.
+    double total
+    # Number of non-NaN values added, including infinities.
+    Py_ssize_t count
+    # Number of finite, nonzero values added.  `total` is reset to exactly 0
+    # whenever this drops to 0, so that rounding errors left over from
+    # values that have been removed don't masquerade as a sum.
+    Py_ssize_t nonzero
+    # Infinities are counted rather than added to `total`, so that they can
+    # be removed again.
+    Py_ssize_t posinf
+    Py_ssize_t neginf
+
+
+cdef struct _Drawdown:
+    # Running maximum of the values seen so far.
+    double peak
+    # The largest drop from the running maximum seen so far, and the peak and
+    # trough values between which it occurred.
+    double drawdown
+    double drawdown_peak
+    double drawdown_trough
+    bint found
+
+
+cdef inline void _reset(_Sum *s) nogil:
+    s.total = 0.0
+    s.count = 0
+    s.nonzero = 0
+    s.posinf = 0
+    s.neginf = 0
+
+
+cdef inline void _update(_Sum *s, double value, int sign) nogil:
+    """
+    Add `value` to `s` if `sign` is 1, or remove it if `sign` is -1.  NaNs
+    are ignored.
+    """
+    if isnan(value):
+        return
+    s.count += sign
+    if value == INFINITY:
+        s.posinf += sign
+    elif value == -INFINITY:
+        s.neginf += sign
+    elif value != 0:
+        s.nonzero += sign
+        if s.nonzero:
+            s.total += sign * value
+        else:
+            s.total = 0.0
+
+
+cdef inline double _total(_Sum *s) nogil:
+    """
+    The sum of the values in `s`, ignoring NaNs.
+    """
+    if s.posinf and s.neginf:
+        return NAN
+    elif s.posinf:
+        return INFINITY
+    elif s.neginf:
+        return -INFINITY
+    return s.total
+
+
+cdef inline void _update_changes(_Sum *ups,
+                                 _Sum *downs,
+                                 double change,
+                                 int sign) nogil:
+    """
+    Add or remove the positive and negative parts of `change`.
+    """
+    if isnan(change):
+        return
+    _update(ups, change if change > 0 else 0.0, sign)
+    _update(downs, change if change < 0 else 0.0, sign)
+
+
+cdef inline void _reset_drawdown(_Drawdown *d) nogil:
+    d.peak = NAN
+    d.drawdown = NAN
+    d.drawdown_peak = NAN
+    d.drawdown_trough = NAN
+    d.found = False
+
+
+cdef inline void _update_drawdown(_Drawdown *d, double value) nogil:
+    """
+    Advance `d` past `value`.  NaNs don't affect the running peak, and never
+    end a drawdown.
+    """
+    cdef double drawdown
+    if isnan(value):
+        return
+    if isnan(d.peak) or value > d.peak:
+        d.peak = value
+    drawdown = d.peak - value
+    # Only a strictly larger drawdown replaces an earlier one, so ties are
+    # resolved in favor of the first drawdown.
+    if not isnan(drawdown) and (not d.found or drawdown > d.drawdown):
+        d.drawdown = drawdown
+        d.drawdown_peak = d.peak
+        d.drawdown_trough = value
+        d.found = True
+
+
+cdef _Sum *_alloc_sums(Py_ssize_t n) except NULL:
+    cdef _Sum *sums = <_Sum *>malloc(max(n, 1) * sizeof(_Sum))
+    if sums == NULL:
+        raise MemoryError()
+    return sums
+
+
+cdef _block_rows(object block, object out):
+    """
+    Get the rows of data underlying `block` as a 2-D array of the same dtype
+    as `out`, checking that `out` has one row per window in `block`.
+
+    Integral data is converted to floats here, which is a single pass over
+    the rows rather than over every window.  Read-only rows are copied, since
+    typed memoryviews can't be taken of read-only buffers.
+    """
+    if block.ndim != 3:
+        raise ValueError("Expected a 3-D block, got %d-D." % block.ndim)
+
+    nrows, window_length, ncols = block.shape
+    if nrows > 1 and block.strides[0] != block.strides[1]:
+        raise ValueError("Expected a block of consecutive windows.")
+    if out.shape != (nrows, ncols):
+        raise ValueError(
+            "Output shape %s != expected shape %s" % (
+                out.shape,
+                (nrows, ncols),
+            )
+        )
+    if out.dtype != float32 and out.dtype != float64:
+        raise TypeError("Unsupported output dtype %s." % out.dtype)
+
+    rows = as_strided(
+        block,
+        shape=(nrows + window_length - 1, ncols),
+        strides=(block.strides[1], block.strides[2]),
+    )
+    rows = rows.astype(out.dtype, copy=False)
+    if not rows.flags.writeable:
+        rows = rows.copy()
+    return rows
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void _nanmean(float_t[:, :] data,
+                   Py_ssize_t window_length,
+                   float_t[:, :] out,
+                   _Sum *sums) nogil:
+    cdef Py_ssize_t i, j, k
+
+    for i in range(out.shape[0]):
+        for j in range(out.shape[1]):
+            if i % window_length == 0:
+                _reset(&sums[j])
+                for k in range(i, i + window_length):
+                    _update(&sums[j], data[k, j], 1)
+            else:
+                _update(&sums[j], data[i - 1, j], -1)
+                _update(&sums[j], data[i + window_length - 1, j], 1)
+
+            if sums[j].count:
+                out[i, j] = _total(&sums[j]) / sums[j].count
+            else:
+                out[i, j] = NAN
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void _weighted_mean(float_t[:, :] base,
+                         float_t[:, :] weight,
+                         Py_ssize_t window_length,
+                         float_t[:, :] out,
+                         _Sum *products,
+                         _Sum *weights) nogil:
+    cdef Py_ssize_t i, j, k, enter
+
+    for i in range(out.shape[0]):
+        for j in range(out.shape[1]):
+            if i % window_length == 0:
+                _reset(&products[j])
+                _reset(&weights[j])
+                for k in range(i, i + window_length):
+                    _update(&products[j], <double>base[k, j] * weight[k, j], 1)
+                    _update(&weights[j], weight[k, j], 1)
+            else:
+                enter = i + window_length - 1
+                _update(
+                    &products[j],
+                    <double>base[i - 1, j] * weight[i - 1, j],
+                    -1,
+                )
+                _update(&weights[j], weight[i - 1, j], -1)
+                _update(
+                    &products[j],
+                    <double>base[enter, j] * weight[enter, j],
+                    1,
+                )
+                _update(&weights[j], weight[enter, j], 1)
+
+            if weights[j].count:
+                out[i, j] = _total(&products[j]) / _total(&weights[j])
+            else:
+                out[i, j] = NAN
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void _rsi(float_t[:, :] data,
+               Py_ssize_t window_length,
+               float_t[:, :] out,
+               _Sum *ups,
+               _Sum *downs) nogil:
+    cdef:
+        Py_ssize_t i, j, k, enter
+        double mean_up, mean_down
+
+    for i in range(out.shape[0]):
+        for j in range(out.shape[1]):
+            if i % window_length == 0:
+                _reset(&ups[j])
+                _reset(&downs[j])
+                for k in range(i + 1, i + window_length):
+                    _update_changes(
+                        &ups[j],
+                        &downs[j],
+                        <double>data[k, j] - data[k - 1, j],
+                        1,
+                    )
+            else:
+                enter = i + window_length - 1
+                _update_changes(
+                    &ups[j],
+                    &downs[j],
+                    <double>data[i, j] - data[i - 1, j],
+                    -1,
+                )
+                _update_changes(
+                    &ups[j],
+                    &downs[j],
+                    <double>data[enter, j] - data[enter - 1, j],
+                    1,
+                )
+
+            # Flat prices leave both totals at exactly 0, which gives NaN
+            # rather than an index of 0 or 100.
+            if ups[j].count and (ups[j].nonzero or downs[j].nonzero):
+                mean_up = _total(&ups[j]) / ups[j].count
+                mean_down = _total(&downs[j]) / downs[j].count
+                out[i, j] = 100 - (100 / (1 + (mean_up / mean_down)))
+            else:
+                out[i, j] = NAN
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void _max_drawdown(float_t[:, :] data,
+                        Py_ssize_t window_length,
+                        float_t[:, :] out,
+                        _Drawdown *drawdowns) nogil:
+    cdef Py_ssize_t i, j, k
+
+    for i in range(out.shape[0]):
+        for j in range(out.shape[1]):
+            _reset_drawdown(&drawdowns[j])
+
+        # Walk each window a row at a time, so that we read contiguous
+        # memory when the data is C-ordered.
+        for k in range(i, i + window_length):
+            for j in range(out.shape[1]):
+                _update_drawdown(&drawdowns[j], data[k, j])
+
+        for j in range(out.shape[1]):
+            if drawdowns[j].found:
+                out[i, j] = (
+                    drawdowns[j].drawdown_peak - drawdowns[j].drawdown_trough
+                ) / drawdowns[j].drawdown_trough
+            else:
+                out[i, j] = NAN
+
+
+def rolling_nanmean(object block, object out):
+    """
+    Write the mean of each column of each window in `block` into `out`,
+    ignoring NaNs.
+
+    Parameters
+    ----------
+    block : np.array[ndim=3]
+        Block of consecutive windows of shape (nrows, window_length, ncols).
+    out : np.array[float32 or float64, ndim=2]
+        Array of shape (nrows, ncols) into which to write the means.  Columns
+        with no non-NaN values get a mean of NaN.
+
+    Example
+    -------
+
+    >>> import numpy as np
+    >>> from numpy.lib.stride_tricks import as_strided
+    >>> data = np.array([[1.0, 2.0],
+    ...                  [3.0, np.nan],
+    ...                  [5.0, 6.0],
+    ...                  [7.0, 8.0]])
+    >>> block = as_strided(data, shape=(3, 2, 2),
+    ...                    strides=(data.strides[0],) + data.strides)
+    >>> out = np.empty((3, 2))
+    >>> rolling_nanmean(block, out)
+    >>> out
+    array([[ 2.,  2.],
+           [ 4.,  6.],
+           [ 6.,  7.]])
+    """
+    cdef:
+        Py_ssize_t window_length = block.shape[1]
+        _Sum *sums
+
+    data = _block_rows(block, out)
+    sums = _alloc_sums(out.shape[1])
+    try:
+        if out.dtype == float32:
+            _nanmean_float32(data, window_length, out, sums)
+        else:
+            _nanmean_float64(data, window_length, out, sums)
+    finally:
+        free(sums)
+
+
+cdef _nanmean_float32(float32_t[:, :] data,
+                      Py_ssize_t window_length,
+                      float32_t[:, :] out,
+                      _Sum *sums):
+    with nogil:
+        _nanmean(data, window_length, out, sums)
+
+
+cdef _nanmean_float64(float64_t[:, :] data,
+                      Py_ssize_t window_length,
+                      float64_t[:, :] out,
+                      _Sum *sums):
+    with nogil:
+        _nanmean(data, window_length, out, sums)
+
+
+def rolling_weighted_mean(object base, object weight, object out):
+    """
+    Write the mean of each column of each window in `base`, weighted by the
+    corresponding values of `weight`, into `out`.
+
+    This is ``nansum(base * weight) / nansum(weight)`` for each window, so
+    weights of NaN values of `base` still count towards the total weight.
+
+    Parameters
+    ----------
+    base : np.array[ndim=3]
+        Block of consecutive windows of shape (nrows, window_length, ncols).
+    weight : np.array[ndim=3]
+        Block of windows of the same shape as `base`.
+    out : np.array[float32 or float64, ndim=2]
+        Array of shape (nrows, ncols) into which to write the means.  Columns
+        whose weights are all NaN, or whose total weight is 0, get a mean of
+        NaN.
+    """
+    cdef:
+        Py_ssize_t window_length = base.shape[1]
+        _Sum *sums
+
+    if weight.shape != base.shape:
+        raise ValueError(
+            "Weight shape %s != base shape %s" % (weight.shape, base.shape)
+        )
+
+    base_rows = _block_rows(base, out)
+    weight_rows = _block_rows(weight, out)
+    sums = _alloc_sums(2 * out.shape[1])
+    try:
+        if out.dtype == float32:
+            _weighted_mean_float32(
+                base_rows, weight_rows, window_length, out, sums,
+            )
+        else:
+            _weighted_mean_float64(
+                base_rows, weight_rows, window_length, out, sums,
+            )
+    finally:
+        free(sums)
+
+
+cdef _weighted_mean_float32(float32_t[:, :] base,
+                            float32_t[:, :] weight,
+                            Py_ssize_t window_length,
+                            float32_t[:, :] out,
+                            _Sum *sums):
+    with nogil:
+        _weighted_mean(
+            base, weight, window_length, out, sums, sums + out.shape[1],
+        )
+
+
+cdef _weighted_mean_float64(float64_t[:, :] base,
+                            float64_t[:, :] weight,
+                            Py_ssize_t window_length,
+                            float64_t[:, :] out,
+                            _Sum *sums):
+    with nogil:
+        _weighted_mean(
+            base, weight, window_length, out, sums, sums + out.shape[1],
+        )
+
+
+def rolling_rsi(object block, object out):
+    """
+    Write the relative-strength index of each column of each window in
+    `block` into `out`.
+
+    The index is computed from the means of the positive and negative parts
+    of the changes between consecutive rows of each window, ignoring NaN
+    changes.
+
+    Parameters
+    ----------
+    block : np.array[ndim=3]
+        Block of consecutive windows of shape (nrows, window_length, ncols).
+    out : np.array[float32 or float64, ndim=2]
+        Array of shape (nrows, ncols) into which to write the indices.
+        Columns with no non-NaN changes, or with no nonzero changes, get an
+        index of NaN.
+    """
+    cdef:
+        Py_ssize_t window_length = block.shape[1]
+        _Sum *sums
+
+    data = _block_rows(block, out)
+    sums = _alloc_sums(2 * out.shape[1])
+    try:
+        if out.dtype == float32:
+            _rsi_float32(data, window_length, out, sums)
+        else:
+            _rsi_float64(data, window_length, out, sums)
+    finally:
+        free(sums)
+
+
+cdef _rsi_float32(float32_t[:, :] data,
+                  Py_ssize_t window_length,
+                  float32_t[:, :] out,
+                  _Sum *sums):
+    with nogil:
+        _rsi(data, window_length, out, sums, sums + out.shape[1])
+
+
+cdef _rsi_float64(float64_t[:, :] data,
+                  Py_ssize_t window_length,
+                  float64_t[:, :] out,
+                  _Sum *sums):
+    with nogil:
+        _rsi(data, window_length, out, sums, sums + out.shape[1])
+
+
+def rolling_max_drawdown(object block, object out):
+    """
+    Write the maximum drawdown of each column of each window in `block` into
+    `out`.
+
+    The maximum drawdown of a window is the largest drop from the running
+    maximum of the window to a later value, as a fraction of the later value.
+    If several drops are equally large, the first one is used.  NaNs are
+    ignored.
+
+    Each window is reduced in a single pass that carries the running peak
+    along, rather than by rescanning the window for the peak before the
+    largest drop.  The maximum of a sliding window can't be updated in
+    constant time when values leave the window, so unlike the other
+    functions in this module, the cost of each output row is proportional
+    to the window length.
+
+    Parameters
+    ----------
+    block : np.array[ndim=3]
+        Block of consecutive windows of shape (nrows, window_length, ncols).
+    out : np.array[float32 or float64, ndim=2]
+        Array of shape (nrows, ncols) into which to write the drawdowns.
+        Columns containing only NaNs get a drawdown of NaN.
+
+    Example
+    -------
+
+    >>> import numpy as np
+    >>> data = np.array([[4.0, 1.0],
+    ...                  [2.0, 2.0],
+    ...                  [5.0, np.nan],
+    ...                  [1.0, 3.0]])
+    >>> out = np.empty((1, 2))
+    >>> rolling_max_drawdown(data[np.newaxis], out)
+    >>> out
+    array([[ 4.,  0.]])
+    """
+    cdef:
+        Py_ssize_t window_length = block.shape[1]
+        _Drawdown *drawdowns
+
+    data = _block_rows(block, out)
+    drawdowns = <_Drawdown *>malloc(max(out.shape[1], 1) * sizeof(_Drawdown))
+    if drawdowns == NULL:
+        raise MemoryError()
+    try:
+        if out.dtype == float32:
+            _max_drawdown_float32(data, window_length, out, drawdowns)
+        else:
+            _max_drawdown_float64(data, window_length, out, drawdowns)
+    finally:
+        free(drawdowns)
+
+
+cdef _max_drawdown_float32(float32_t[:, :] data,
+                           Py_ssize_t window_length,
+                           float32_t[:, :] out,
+                           _Drawdown *drawdowns):
+    with nogil:
+        _max_drawdown(data, window_length, out, drawdowns)
+
+
+cdef _max_drawdown_float64(float64_t[:, :] data,
+                           Py_ssize_t window_length,
+                           float64_t[:, :] out,
+                           _Drawdown *drawdowns):
+    with nogil:
+        _max_drawdown(data, window_length, out, drawdowns)
@@ -0,0 +1,310 @@
+"""
+Persistent on-disk cache for computed FFC term outputs.
+"""
+from errno import EEXIST
+from hashlib import sha1
+from os import (
+    listdir,
+    makedirs,
+    rename,
+    utime,
+)
+from os.path import (
+    getmtime,
+    getsize,
+    join,
+)
+from shutil import rmtree
+from tempfile import mkdtemp
+from types import CodeType
+from uuid import uuid4
+
+from numpy import (
+    array_equal,
+    asarray,
+    dtype,
+    int64,
+    load,
+    save,
+)
+from pandas import Index
+from six import (
+    binary_type,
+    integer_types,
+    string_types,
+)
+
+from zipline.modelling.term import Term
+
+
+class UncacheableTerm(Exception):
+    """
+    Raised when a term's identity can't be converted into a stable cache key.
+    """
+    pass
+
+
+def _token(obj):
+    """
+    Convert a component of a Term's static identity into a nested tuple of
+    strings whose repr is stable across processes.
+    """
+    if isinstance(obj, Term):
+        return ('term', _token(obj._identity))
+    elif isinstance(obj, (tuple, list)):
+        return tuple(_token(elem) for elem in obj)
+    elif isinstance(obj, frozenset):
+        return ('frozenset', tuple(sorted(map(_token, obj), key=repr)))
+    elif isinstance(obj, type):
+        return (
+            'type',
+            obj.__module__,
+            obj.__name__,
+            _token(getattr(obj, 'cache_version', None)),
+            _compute_token(obj),
+        )
+    elif isinstance(obj, CodeType):
+        # Constants and global names aren't part of the bytecode, so changing
+        # a literal or the function called by `compute` doesn't change
+        # co_code.  Nested functions and lambdas are code objects in
+        # co_consts.
+        return (
+            'code',
+            sha1(obj.co_code).hexdigest(),
+            _token(obj.co_consts),
+            _token(obj.co_names),
+        )
+    elif isinstance(obj, dtype):
+        return ('dtype', obj.str)
+    elif obj is None or isinstance(
+        obj,
+        string_types + integer_types + (binary_type, float, complex, bool),
+    ):
+        return repr(obj)
+    raise UncacheableTerm(obj)
+
+
+def _compute_token(cls):
+    """
+    Fingerprint the `compute` function of `cls`, so that editing a
+    CustomFactor invalidates its cached outputs.
+
+    Raises UncacheableTerm if `compute` isn't a plain Python function, or if
+    it closes over variables, whose values we can't fingerprint.
+    """
+    compute = getattr(cls, 'compute', None)
+    if compute is None:
+        return None
+    func = getattr(compute, '__func__', compute)
+    code = getattr(func, '__code__', None)
+    if code is None or func.__closure__:
+        raise UncacheableTerm(cls)
+    return (_token(code), _token(func.__defaults__))
+
+
+def term_key(term, data_version):
+    """
+    Compute a stable key for the outputs of `term` when its inputs are loaded
+    from data identified by `data_version`.
+
+    The key covers the code of each term's `compute` function, including the
+    constants and global names it uses, but not the code of the functions it
+    calls.  Set `cache_version` on a term's class, and change it, to
+    invalidate outputs cached by earlier versions of such code.
+
+    Raises
+    ------
+    UncacheableTerm
+        If the identity of `term` contains values for which we can't compute
+        a stable key.
+    """
+    return sha1(
+        repr((_token(term), _token(data_version))).encode('utf-8')
+    ).hexdigest()
+
+
+class TermOutputCache(object):
+    """
+    Persistent, size-bounded cache of computed term outputs.
+
+    Outputs are stored as .npy files so that they can be memory-mapped when
+    read back.  Each output is keyed by the identity of the term that produced
+    it and by the data version of the loader that supplied its inputs, and
+    stores the dates and assets it was computed over.  A cached output serves
+    any query for a contiguous range of its dates and a subset of its assets.
+
+    When the total size of stored outputs exceeds `max_bytes`, the least
+    recently used outputs are deleted.
+
+    Parameters
+    ----------
+    root : str
+        Directory in which to store cached outputs.  Created if it doesn't
+        already exist.
+    max_bytes : int
+        Disk budget for cached outputs.
+
+    Notes
+    -----
+    Entries are written to a temporary directory and renamed into place, so
+    multiple processes can safely share a cache directory.
+    """
+    _DATES = 'dates.npy'
+    _ASSETS = 'assets.npy'
+    _VALUES = 'values.npy'
+
+    def __init__(self, root, max_bytes):
+        if max_bytes < 0:
+            raise ValueError(
+                "max_bytes must be non-negative, got %r" % max_bytes
+            )
+        _ensure_directory(root)
+        self._root = root
+        self._max_bytes = max_bytes
+
+    def get(self, term, data_version, dates, assets):
+        """
+        Look up a cached output for `term`.
+
+        Parameters
+        ----------
+        term : zipline.modelling.term.Term
+            The term whose output we want.
+        data_version : object
+            Version of the data from which `term` was computed.
+        dates : pd.DatetimeIndex
+            Dates for which we want output.
+        assets : np.array[int64]
+            Assets for which we want output.
+
+        Returns
+        -------
+        values : np.array or None
+            A (len(dates), len(assets)) array, or None if no cached output
+            covers the requested dates and assets.  If the cached output was
+            computed over exactly `assets`, the returned array is a read-only
+            view of a memory-mapped file.
+        """
+        try:
+            key = term_key(term, data_version)
+        except UncacheableTerm:
+            return None
+
+        query_dates = dates.asi8
+        query_assets = asarray(assets, dtype=int64)
+        for path in self._entries(key):
+            try:
+                entry_dates = load(join(path, self._DATES))
+                entry_assets = load(join(path, self._ASSETS))
+            except (IOError, OSError, ValueError):
+                # The entry was evicted by another process.
+                continue
+
+            start = entry_dates.searchsorted(query_dates[0])
+            stop = start + len(query_dates)
+            if not array_equal(entry_dates[start:stop], query_dates):
+                continue
+
+            if array_equal(entry_assets, query_assets):
+                columns = None
+            else:
+                columns = Index(entry_assets).get_indexer(query_assets)
+                if (columns == -1).any():
+                    continue
+
+            try:
+                values = load(join(path, self._VALUES), mmap_mode='r')
+                _touch(path)
+            except (IOError, OSError, ValueError):
+                continue
+
+            if columns is None:
+                return values[start:stop]
+            return values[start:stop, columns]
+
+        return None
+
+    def put(self, term, data_version, dates, assets, values):
+        """
+        Store `values`, the output of `term` over `dates` and `assets`.
+
+        Terms whose identity can't be converted into a stable key, and outputs
+        larger than the cache's budget, are silently skipped.
+        """
+        try:
+            key = term_key(term, data_version)
+        except UncacheableTerm:
+            return
+        if values.nbytes > self._max_bytes:
+            return
+
+        key_dir = join(self._root, key)
+        _ensure_directory(key_dir)
+
+        # Write to a hidden temporary directory and then rename it into place
+        # so that readers never see a partially-written entry.
+        tmp = mkdtemp(prefix='.', dir=key_dir)
+        save(join(tmp, self._DATES), dates.asi8)
+        save(join(tmp, self._ASSETS), asarray(assets, dtype=int64))
+        save(join(tmp, self._VALUES), values)
+        rename(tmp, join(key_dir, uuid4().hex))
+
+        self._evict()
+
+    def _entries(self, key):
+        """
+        Paths of the stored entries for `key`, most recently used first.
+        """
+        try:
+            names = listdir(join(self._root, key))
+        except OSError:
+            return []
+
+        entries = []
+        for name in names:
+            if name.startswith('.'):
+                continue
+            path = join(self._root, key, name)
+            try:
+                entries.append((getmtime(path), path))
+            except OSError:
+                continue
+        return [path for _, path in sorted(entries, reverse=True)]
+
+    def _evict(self):
+        """
+        Delete least recently used entries until we're within our budget.
+        """
+        entries = []
+        total = 0
+        for key in listdir(self._root):
+            for path in self._entries(key):
+                try:
+                    size = sum(
+                        getsize(join(path, name)) for name in listdir(path)
+                    )
+                    entries.append((getmtime(path), size, path))
+                except OSError:
+                    continue
+                total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            rmtree(path, ignore_errors=True)
+            total -= size
+
+
+def _ensure_directory(path):
+    try:
+        makedirs(path)
+    except OSError as e:
+        if e.errno != EEXIST:
+            raise
+
+
+def _touch(path):
+    """
+    Mark `path` as recently used.
+    """
+    utime(path, None)
@@ -5,9 +5,20 @@ from abc import (
     ABCMeta,
     abstractmethod,
 )
+from collections import (
+    defaultdict,
+    deque,
+)
+from functools import partial
+from itertools import chain
+from multiprocessing.pool import ThreadPool
 from operator import and_
+import sys
+
 from six import (
     iteritems,
+    itervalues,
+    reraise,
     with_metaclass,
 )
 from six.moves import (
@@ -15,19 +26,32 @@ from six.moves import (
     zip,
     zip_longest,
 )
+from six.moves.queue import (
+    Empty,
+    Queue,
+)
 
 from networkx import (
+    ancestors,
     DiGraph,
     get_node_attributes,
     topological_sort,
 )
 from numpy import (
-    add,
-    empty_like,
+    concatenate,
+    diff,
+    dtype,
+    empty,
+    float32,
+    float64,
+    newaxis,
+    unique,
 )
 from pandas import (
     DataFrame,
     date_range,
+    DatetimeIndex,
+    Index,
     MultiIndex,
 )
 
@@ -35,6 +59,7 @@ from zipline.lib.adjusted_array import ensure_ndarray
 from zipline.errors import NoFurtherDataError
 from zipline.modelling.factor import Factor
 from zipline.modelling.filter import Filter
+from zipline.modelling.optimize import optimize_terms
 
 
 # TODO: Move this somewhere else.
@@ -115,6 +140,289 @@ def _add_to_graph(term,
     parents.remove(term)
 
 
+def _graph_from_ordered_terms(ordered_terms, extra_row_counts):
+    """
+    Build the dependency graph of `ordered_terms`, a list of terms that
+    includes the inputs of each of its terms, with the numbers of extra rows
+    given by `extra_row_counts`.
+    """
+    graph = DiGraph()
+    for term in ordered_terms:
+        graph.add_node(term, extra_rows=extra_row_counts[term])
+    for term in ordered_terms:
+        for subterm in term.inputs:
+            graph.add_edge(subterm, term)
+    return graph
+
+
+def initial_refcounts(graph, outputs):
+    """
+    Compute the number of outstanding references to each term in `graph`.
+
+    Each term is referenced once by every term that consumes it, and once
+    more if it's one of the requested `outputs`.  Terms in `outputs` can
+    therefore never reach a refcount of zero.
+
+    Parameters
+    ----------
+    graph : networkx.DiGraph
+        Dependency graph produced by `build_dependency_graph`.
+    outputs : iterable[zipline.modelling.term.Term]
+        Top-level terms whose results must be retained.
+
+    Returns
+    -------
+    refcounts : dict[Term -> int]
+    """
+    refcounts = dict(graph.out_degree())
+    for term in outputs:
+        refcounts[term] += 1
+    return refcounts
+
+
+def decref_dependencies(graph, term, refcounts):
+    """
+    Decrement the refcounts of the inputs of `term`, which has just been
+    computed.
+
+    Returns
+    -------
+    garbage : set[Term]
+        Inputs whose refcount dropped to zero, and which can therefore be
+        released.
+    """
+    garbage = set()
+    for input_ in graph.predecessors(term):
+        refcounts[input_] -= 1
+        if refcounts[input_] == 0:
+            garbage.add(input_)
+    return garbage
+
+
+def _run_task(task, func, report):
+    """
+    Entry point for tasks run on SimpleFFCEngine's thread pool.
+
+    Calls `func` and passes a tuple of (task, result, exc_info) to `report`.
+    Exactly one of `result` and `exc_info` is None.
+    """
+    try:
+        result = func()
+    except Exception:
+        report((task, None, sys.exc_info()))
+    else:
+        report((task, result, None))
+
+
+def shared_window_groups(windowed_terms):
+    """
+    Partition `windowed_terms` into groups of terms that can share window
+    iterators.
+
+    Two terms can share an iterator if they read the same input with the same
+    window length.  Groups are closed under sharing, so a term sharing an
+    input with any member of a group belongs to that group.
+
+    Parameters
+    ----------
+    windowed_terms : list[zipline.modelling.term.Term]
+        Windowed terms, in the order in which they'll be computed.
+
+    Returns
+    -------
+    groups : dict[Term -> tuple[Term]]
+        Map from each term belonging to a group of more than one term to its
+        group.  Each group is ordered like `windowed_terms`.
+    """
+    parents = {term: term for term in windowed_terms}
+
+    def find(term):
+        while parents[term] is not term:
+            term = parents[term]
+        return term
+
+    first_readers = {}
+    for term in windowed_terms:
+        for input_ in term.inputs:
+            key = (input_, term.window_length)
+            other = first_readers.setdefault(key, term)
+            parents[find(other)] = find(term)
+
+    members = defaultdict(list)
+    for term in windowed_terms:
+        members[find(term)].append(term)
+
+    groups = {}
+    for group in members.values():
+        if len(group) > 1:
+            group = tuple(group)
+            groups.update((term, group) for term in group)
+    return groups
+
+
+def screened_terms(graph, outputs):
+    """
+    Find the terms in `graph` that only need to be computed for assets
+    passing the screens among `outputs`.
+
+    Every Filter in `outputs` is a screen: output rows are only produced for
+    the date/asset pairs that pass all of them.  A term that isn't needed to
+    compute a screen can be computed for just the assets that pass the
+    screens on at least one date, as long as its value for each asset only
+    depends on that asset's inputs, and the same is true of every term that
+    consumes it.
+
+    Parameters
+    ----------
+    graph : networkx.DiGraph
+        Dependency graph produced by `build_dependency_graph`.
+    outputs : iterable[zipline.modelling.term.Term]
+        Top-level terms whose results are requested.
+
+    Returns
+    -------
+    screened : set[Term]
+        The terms that can be computed for the screened assets.  This is empty
+        if there are no screens, or if no non-atomic term can be screened.
+    """
+    screens = [term for term in outputs if isinstance(term, Filter)]
+    screen_inputs = set(screens)
+    for screen in screens:
+        screen_inputs.update(ancestors(graph, screen))
+
+    screened = set()
+    if not screens:
+        return screened
+
+    for term in reversed(topological_sort(graph)):
+        if term in screen_inputs or not term.assetwise:
+            continue
+        if all(consumer in screened for consumer in graph.successors(term)):
+            screened.add(term)
+
+    if all(term.atomic for term in screened):
+        return set()
+    return screened
+
+
+def shared_windows(terms, workspace, extra_row_counts):
+    """
+    Build window iterators over the inputs of windowed `terms`, creating a
+    single iterator for each distinct (input, window_length) pair.
+
+    Returns a list containing, for each term, a list of the iterators over
+    its inputs.
+    """
+    iterators = {}
+    windows = []
+    for term in terms:
+        term_windows = []
+        for input_ in term.inputs:
+            key = (input_, term.window_length)
+            try:
+                window = iterators[key]
+            except KeyError:
+                window = iterators[key] = workspace[input_].traverse(
+                    term.window_length,
+                    offset=extra_row_counts[input_] - term.extra_input_rows,
+                )
+            term_windows.append(window)
+        windows.append(term_windows)
+    return windows
+
+
+def compute_in_lockstep(terms, windows, mask):
+    """
+    Compute windowed `terms` over `mask`, advancing shared window iterators
+    for all of them together.
+
+    The rows of `mask` are split into blocks, each of which ends before the
+    next adjustment to any of the iterators.  The data under an iterator
+    doesn't change within a block, so every term reading an iterator can
+    read the same block of windows, and each adjustment is applied once.
+
+    Parameters
+    ----------
+    terms : tuple[zipline.modelling.term.Term]
+        Terms to compute.
+    windows : list[list[AdjustedArrayWindow]]
+        Output of `shared_windows` for `terms`.
+    mask : pd.DataFrame
+        Lifetimes matrix for the rows to compute.
+
+    Returns
+    -------
+    results : list[np.array]
+        The result of each term in `terms`.
+    """
+    iterators = list(set(chain.from_iterable(windows)))
+    outputs = [[] for _ in terms]
+    start, nrows = 0, len(mask)
+    while start < nrows:
+        length = min(
+            [nrows - start] + [window.block_length() for window in iterators]
+        )
+        if length < 1:
+            raise ValueError("Window iterators exhausted before mask.")
+        blocks = {
+            window: window.next_block(length) for window in iterators
+        }
+        block_mask = mask.iloc[start:start + length]
+        for term, term_windows, output in zip(terms, windows, outputs):
+            output.append(
+                term.compute_from_windows(
+                    [_BlockWindow(blocks[window]) for window in term_windows],
+                    block_mask,
+                )
+            )
+        start += length
+    return [concatenate(output) for output in outputs]
+
+
+class _BlockWindow(object):
+    """
+    Window iterator over a block of windows read from a shared iterator.
+
+    Supports the same block-reading methods as the iterator from which the
+    block was read.
+    """
+    __slots__ = ['_block', '_idx']
+
+    def __init__(self, block):
+        self._block = block
+        self._idx = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        idx = self._idx
+        if idx >= len(self._block):
+            raise StopIteration()
+        self._idx = idx + 1
+        return self._block[idx]
+    next = __next__  # Python 2 compatibility.
+
+    @property
+    def dtype(self):
+        return self._block.dtype
+
+    def block_length(self):
+        return len(self._block) - self._idx
+
+    def next_block(self, nrows):
+        idx = self._idx
+        if nrows < 1 or nrows > len(self._block) - idx:
+            raise ValueError(
+                "Can't read a block of %d windows; %d available." % (
+                    nrows,
+                    len(self._block) - idx,
+                )
+            )
+        self._idx = idx + nrows
+        return self._block[idx:idx + nrows]
+
+
 class FFCEngine(with_metaclass(ABCMeta)):
 
     @abstractmethod
@@ -143,6 +451,29 @@ class FFCEngine(with_metaclass(ABCMeta)):
         """
         raise NotImplementedError("factor_matrix")
 
+    @abstractmethod
+    def stream_factor_matrix(self, terms, start_date, end_date):
+        """
+        Incrementally compute values for `terms` between `start_date` and
+        `end_date`, one day at a time.
+
+        Parameters
+        ----------
+        terms : dict
+            Map from str -> zipline.modelling.term.Term.
+        start_date : datetime
+            The first date to compute.
+        end_date : datetime
+            The last date to compute.
+
+        Returns
+        -------
+        rows : iterator[(pd.Timestamp, pd.DataFrame)]
+            Iterator of (date, frame) pairs, where each frame holds the rows
+            of the factor matrix for `date`, indexed by asset.
+        """
+        raise NotImplementedError("stream_factor_matrix")
+
 
 class NoOpFFCEngine(FFCEngine):
     """
@@ -157,6 +488,11 @@ class NoOpFFCEngine(FFCEngine):
             columns=sorted(terms.keys())
         )
 
+    def stream_factor_matrix(self, terms, start, end):
+        columns = sorted(terms.keys())
+        for date in date_range(start=start, end=end, freq='D'):
+            yield date, DataFrame(index=Index([]), columns=columns)
+
 
 class SimpleFFCEngine(object):
     """
@@ -172,18 +508,79 @@ class SimpleFFCEngine(object):
     asset_finder : zipline.assets.AssetFinder
         An AssetFinder instance.  We depend on the AssetFinder to determine
         which assets are in the top-level universe at any point in time.
+    chunksize : int, optional
+        Maximum number of trading days to compute at once.  If supplied,
+        `factor_matrix` splits its requested date range into windows of at
+        most `chunksize` days and computes each window independently, so that
+        peak memory usage scales with `chunksize` rather than with the length
+        of the full query.  The default of None computes the full range in a
+        single chunk.
+    num_threads : int, optional
+        Number of worker threads to use when computing terms.  If supplied,
+        terms are computed on a thread pool as soon as all of their inputs are
+        available, which lets independent branches of the dependency graph run
+        concurrently.  Terms computed this way must be thread-safe.  Loader
+        calls are always made on the calling thread.  The default of None
+        computes terms one at a time on the calling thread.
+    cache : zipline.modelling.cache.TermOutputCache, optional
+        Persistent cache of computed term outputs.  If supplied, and if
+        `loader` has a `data_version` other than None, outputs of non-atomic
+        terms are read from the cache when possible and written to it after
+        being computed.  Inputs needed only by cached terms are neither
+        loaded nor computed.
+    precision : np.float64 | np.float32, optional
+        Precision in which to compute floating-point terms.  With float32,
+        float64 inputs are converted to float32 as soon as they're loaded,
+        and adjusted, windowed and computed in float32, which halves the
+        memory and bandwidth they use.  Inputs of terms that set
+        `needs_float64` are kept in float64, and those terms are always
+        computed in float64.  The default is float64.
+    profiler : zipline.modelling.profile.TermProfiler, optional
+        If supplied, records the time and memory spent computing each term by
+        `factor_matrix` and `factor_arrays`.
     """
     __slots__ = [
         '_loader',
         '_calendar',
         '_finder',
+        '_chunksize',
+        '_num_threads',
+        '_cache',
+        '_precision',
+        '_profiler',
         '__weakref__',
     ]
 
-    def __init__(self, loader, calendar, asset_finder):
+    def __init__(self,
+                 loader,
+                 calendar,
+                 asset_finder,
+                 chunksize=None,
+                 num_threads=None,
+                 cache=None,
+                 precision=float64,
+                 profiler=None):
+        if chunksize is not None and chunksize < 1:
+            raise ValueError(
+                "chunksize must be a positive integer, got %r" % chunksize
+            )
+        if num_threads is not None and num_threads < 1:
+            raise ValueError(
+                "num_threads must be a positive integer, got %r" % num_threads
+            )
+        precision = dtype(precision)
+        if precision not in (float32, float64):
+            raise ValueError(
+                "precision must be float32 or float64, got %s" % precision
+            )
         self._loader = loader
         self._calendar = calendar
         self._finder = asset_finder
+        self._chunksize = chunksize
+        self._num_threads = num_threads
+        self._cache = cache
+        self._precision = precision
+        self._profiler = profiler
 
     def factor_matrix(self, terms, start_date, end_date):
         """
@@ -211,35 +608,149 @@ class SimpleFFCEngine(object):
 
         2. Compute each term in the dependency order determined in (0), caching
         the results in a a dictionary to that they can be fed into future
-        terms.
+        terms.  Cached results are released once every term that consumes
+        them has been computed.
 
-        3. For each date, determine the number of assets passing **all**
-        filters. The sum, N, of all these values is the total number of rows in
-        our output frame, so we pre-allocate an output array of length N for
-        each factor in `terms`.
+        3. Compute a mask of the date/asset pairs passing **all** filters.
+        Each True entry in this mask corresponds to a row in our output frame.
 
-        4. Fill in the arrays allocated in (3) by copying computed values from
-        our output cache into the corresponding rows.
+        4. Extract the entries of each factor in `terms` selected by the mask
+        computed in (3), along with integer codes for the date and asset of
+        each selected entry.
 
         5. Stick the values computed in (4) into a DataFrame and return it.
+        The codes computed in (4) are used directly as the labels of the
+        frame's MultiIndex, so we never have to re-discover the unique dates
+        and assets of the output.
 
         Step 0 is performed in `build_dependency_graph`.
         Step 1 is performed in `self.build_lifetimes_matrix`.
         Step 2 is performed in `self.compute_chunk`.
-        Steps 3, 4, and 5 are performed in self._format_factor_matrix.
+        Steps 3 and 4 are performed in `self._format_factor_matrix`.
+
+        Filters in `terms` act as screens on the output.  Terms needed only
+        for assets that pass the screens, as determined by `screened_terms`,
+        are computed after the screens, and only for the assets that pass
+        them on at least one date.
+
+        If the engine was constructed with a `chunksize`, steps 1 through 4 are
+        run separately for each window of at most `chunksize` trading days
+        between `start_date` and `end_date`, and the results are concatenated.
+        Each window reloads only the extra rows needed by its windowed terms,
+        so peak memory is bounded by the size of a single window.
 
         See Also
         --------
         FFCEngine.factor_matrix
+        SimpleFFCEngine.factor_arrays
         """
-        if end_date <= start_date:
+        dates, assets, date_codes, asset_codes, factors = \
+            self._compute_factor_rows(terms, start_date, end_date)
+
+        return DataFrame(
+            factors,
+            index=MultiIndex(
+                levels=[DatetimeIndex(dates, tz='UTC'), assets],
+                labels=[date_codes, asset_codes],
+                verify_integrity=False,
+            ),
+        )
+
+    def factor_arrays(self, terms, start_date, end_date):
+        """
+        Compute the same data as `factor_matrix`, returned as flat arrays
+        rather than as a DataFrame.
+
+        This skips building the MultiIndex of the output frame, which is a
+        significant fraction of the cost of `factor_matrix` for large queries.
+
+        Parameters
+        ----------
+        terms : dict[str -> zipline.modelling.term.Term]
+            Dict mapping term names to instances.  The supplied names are used
+            as keys in the returned `factors` dict.
+        start_date : pd.Timestamp
+            Start date of the computed matrix.
+        end_date : pd.Timestamp
+            End date of the computed matrix.
+
+        Returns
+        -------
+        dates : np.array[datetime64[ns]]
+            The (UTC) date of each output row.
+        assets : np.array[int64]
+            The asset of each output row.
+        factors : dict[str -> np.array]
+            Map from factor name to an array containing the value of that
+            factor for each output row.
+
+        See Also
+        --------
+        SimpleFFCEngine.factor_matrix
+        """
+        dates, assets, date_codes, asset_codes, factors = \
+            self._compute_factor_rows(terms, start_date, end_date)
+        return dates[date_codes], assets[asset_codes], factors
+
+    def stream_factor_matrix(self, terms, start_date, end_date):
+        """
+        Incrementally compute a factor matrix, one trading day at a time.
+
+        Atomic inputs are loaded once, and each windowed term keeps its
+        trailing windows across days, so the history needed to warm up the
+        windows is only loaded and traversed once.  After that, advancing
+        the stream by a day computes a single row of each term.
+
+        Parameters
+        ----------
+        terms : dict[str -> zipline.modelling.term.Term]
+            Dict mapping term names to instances.  The supplied names are used
+            as column names in the yielded frames.
+        start_date : pd.Timestamp
+            First date to compute.
+        end_date : pd.Timestamp
+            Last date to compute.  Unlike `factor_matrix`, this may equal
+            `start_date`.
+
+        Yields
+        ------
+        date : pd.Timestamp
+            A trading day between `start_date` and `end_date`.
+        frame : pd.DataFrame
+            The rows of the factor matrix for `date`, indexed by asset.  This
+            contains the same data as
+            `factor_matrix(terms, start_date, end_date).loc[date]`.
+
+        Notes
+        -----
+        If the engine was constructed with a `chunksize`, inputs are loaded
+        separately for each window of at most `chunksize` days, which bounds
+        memory usage at the cost of warming up the windowed terms once per
+        window.  Terms are always computed on the calling thread, and the
+        engine's cache is not consulted.
+
+        See Also
+        --------
+        SimpleFFCEngine.factor_matrix
+        """
+        if end_date < start_date:
             raise ValueError(
-                "start_date must be before end_date \n"
+                "start_date must not be after end_date \n"
                 "start_date=%s, end_date=%s" % (start_date, end_date)
             )
 
+        terms = self._optimize(terms)
         graph = build_dependency_graph(terms.values())
-        ordered_terms = topological_sort(graph)
+        for chunk_start, chunk_end in self._chunk_bounds(start_date, end_date):
+            rows = self._stream_chunk(terms, graph, chunk_start, chunk_end)
+            for row in rows:
+                yield row
+
+    def _stream_chunk(self, terms, graph, start_date, end_date):
+        """
+        Yield the output rows for the dates between `start_date` and
+        `end_date`, both inclusive, computing one day at a time.
+        """
         extra_row_counts = get_node_attributes(graph, 'extra_rows')
         max_extra_rows = max(extra_row_counts.values())
 
@@ -249,16 +760,200 @@ class SimpleFFCEngine(object):
             max_extra_rows,
         )
         lifetimes_between_dates = lifetimes[max_extra_rows:]
-
         dates = lifetimes_between_dates.index.values
         assets = lifetimes_between_dates.columns.values
 
-        raw_outputs = self.compute_chunk(
-            ordered_terms,
-            extra_row_counts,
-            lifetimes,
+        ordered_terms = topological_sort(graph)
+
+        # Load every atomic term once for the whole chunk.
+        workspace = {}
+        for task in self._plan_tasks(ordered_terms, extra_row_counts):
+            term = task[0]
+            if not term.atomic:
+                continue
+            workspace.update(
+                zip(
+                    task,
+                    self._load_atomic(
+                        graph,
+                        task,
+                        lifetimes.iloc[
+                            max_extra_rows - extra_row_counts[term]:
+                        ],
+                    ),
+                )
+            )
+
+        # Windowed terms draw from the same iterators for the whole chunk, and
+        # terms reading the same input with the same window length share an
+        # iterator.  Every other term only depends on values computed for the
+        # same day.
+        computed_terms = [term for term in ordered_terms if not term.atomic]
+        windowed_terms = [term for term in computed_terms if term.windowed]
+        windows = dict(
+            zip(
+                windowed_terms,
+                shared_windows(windowed_terms, workspace, extra_row_counts),
+            )
+        )
+        iterators = set(chain.from_iterable(windows.values()))
+
+        factor_names = [
+            name for name, term in iteritems(terms) if isinstance(term, Factor)
+        ]
+        for idx, date in enumerate(lifetimes_between_dates.index):
+            mask = lifetimes_between_dates.iloc[idx:idx + 1]
+            current = {window: next(window) for window in iterators}
+            row = {}
+            for term in computed_terms:
+                if term.windowed:
+                    row[term] = term.compute_from_windows(
+                        [
+                            _BlockWindow(current[window][newaxis])
+                            for window in windows[term]
+                        ],
+                        mask,
+                    )
+                else:
+                    row[term] = term.compute_from_arrays(
+                        [row[input_] for input_ in term.inputs],
+                        mask,
+                    )
+
+            raw_filters = [mask.values]
+            raw_factors = []
+            for name, term in iteritems(terms):
+                if isinstance(term, Factor):
+                    raw_factors.append(row[term])
+                elif isinstance(term, Filter):
+                    raw_filters.append(row[term])
+
+            _, assets_used, _, asset_codes, factors = \
+                self._format_factor_matrix(
+                    dates[idx:idx + 1],
+                    assets,
+                    raw_filters,
+                    raw_factors,
+                    factor_names,
+                )
+            yield date, DataFrame(
+                factors,
+                index=Index(assets_used[asset_codes]),
+                columns=factor_names,
+            )
+
+    def _compute_factor_rows(self, terms, start_date, end_date):
+        """
+        Shared implementation of `factor_matrix` and `factor_arrays`.
+
+        Returns
+        -------
+        dates : np.array[datetime64[ns]]
+            Sorted unique dates appearing in the output.
+        assets : np.array[int64]
+            Sorted unique assets appearing in the output.
+        date_codes : np.array[intp]
+            Index into `dates` of the date of each output row.
+        asset_codes : np.array[intp]
+            Index into `assets` of the asset of each output row.
+        factors : dict[str -> np.array]
+            Map from factor name to the value of that factor for each output
+            row.
+        """
+        if end_date <= start_date:
+            raise ValueError(
+                "start_date must be before end_date \n"
+                "start_date=%s, end_date=%s" % (start_date, end_date)
+            )
+
+        terms = self._optimize(terms)
+        graph = build_dependency_graph(terms.values())
+
+        chunks = [
+            self._factor_matrix_chunk(
+                terms,
+                graph,
+                chunk_start,
+                chunk_end,
+            )
+            for chunk_start, chunk_end in self._chunk_bounds(
+                start_date,
+                end_date,
+            )
+        ]
+        return _concat_chunks(
+            chunks,
+            [name for name, term in iteritems(terms)
+             if isinstance(term, Factor)],
+        )
+
+    def _optimize(self, terms):
+        """
+        Replace the terms in the dict `terms` with equivalent terms from a
+        cheaper dependency graph.
+
+        See Also
+        --------
+        zipline.modelling.optimize.optimize_terms
+        """
+        optimized = optimize_terms(itervalues(terms))
+        return {name: optimized[term] for name, term in iteritems(terms)}
+
+    def _chunk_bounds(self, start_date, end_date):
+        """
+        Split the trading days between `start_date` and `end_date` into
+        contiguous windows of at most `self._chunksize` days.
+
+        Returns a list of (chunk_start, chunk_end) pairs of dates, both
+        inclusive.
+        """
+        chunksize = self._chunksize
+        if chunksize is None:
+            return [(start_date, end_date)]
+
+        start_idx, end_idx = self._calendar.slice_locs(start_date, end_date)
+        days = self._calendar[start_idx:end_idx]
+        return [
+            (days[idx], days[min(idx + chunksize, len(days)) - 1])
+            for idx in range(0, len(days), chunksize)
+        ]
+
+    def _factor_matrix_chunk(self, terms, graph, start_date, end_date):
+        """
+        Compute output rows for the dates between `start_date` and
+        `end_date`, both inclusive.
+
+        Unlike `factor_matrix`, `start_date` may equal `end_date` here, which
+        happens when the last chunk of a chunked query contains a single day.
+
+        Returns the output of `_format_factor_matrix`.
+        """
+        extra_row_counts = get_node_attributes(graph, 'extra_rows')
+        max_extra_rows = max(extra_row_counts.values())
+
+        lifetimes = self.build_lifetimes_matrix(
+            start_date,
+            end_date,
+            max_extra_rows,
         )
 
+        screened = screened_terms(graph, terms.values())
+        if screened:
+            raw_outputs, passed = self._compute_screened_chunk(
+                graph,
+                lifetimes,
+                terms.values(),
+                screened,
+            )
+            # Assets that never pass the screens don't appear in the output.
+            lifetimes = lifetimes.loc[:, passed]
+        else:
+            raw_outputs = self.compute_chunk(graph, lifetimes, terms.values())
+
+        lifetimes_between_dates = lifetimes[max_extra_rows:]
+        dates = lifetimes_between_dates.index.values
+        assets = lifetimes_between_dates.columns.values
+
         # We only need filters and factors to compute the final output matrix.
         raw_filters = [lifetimes_between_dates.values]
         raw_factors = []
@@ -280,6 +975,114 @@ class SimpleFFCEngine(object):
             factor_names,
         )
 
+    def _compute_screened_chunk(self, graph, lifetimes, outputs, screened):
+        """
+        Compute `outputs`, computing the terms in `screened` only for the
+        assets that pass the screens among `outputs` on at least one date.
+
+        Screens, and every other term that needs all assets, are computed
+        first.  The remaining terms are then computed over the assets that
+        passed, loading their atomic inputs for just those assets.
+
+        Parameters
+        ----------
+        graph : networkx.DiGraph
+            Dependency graph produced by `build_dependency_graph`.
+        lifetimes : pd.DataFrame
+            Lifetimes matrix defining the dates and assets to compute.
+        outputs : iterable[zipline.modelling.term.Term]
+            Terms whose results should be retained.
+        screened : set[Term]
+            Terms to compute for the screened assets, as returned by
+            `screened_terms`.
+
+        Returns
+        -------
+        raw_outputs : dict[Term -> np.array]
+            Map from each term in `outputs` to its result for the assets that
+            passed.
+        passed : np.array[bool]
+            Mask of the columns of `lifetimes` that passed.
+        """
+        extra_row_counts = get_node_attributes(graph, 'extra_rows')
+        max_extra_rows = max(extra_row_counts.values())
+        outputs = set(outputs)
+
+        # Unscreened results read by screened terms are sliced and handed
+        # over.  Atomic terms are reloaded for the screened assets instead.
+        unscreened = graph.subgraph(
+            [term for term in graph if term not in screened]
+        )
+        handed_over = {
+            term for term in unscreened
+            if not term.atomic
+            and any(c in screened for c in graph.successors(term))
+        }
+        results = self._compute_subgraph(
+            unscreened,
+            lifetimes,
+            max_extra_rows,
+            outputs.intersection(unscreened) | handed_over,
+        )
+
+        screen_mask = reduce(
+            and_,
+            [lifetimes.values[max_extra_rows:]] + [
+                results[term][extra_row_counts[term]:]
+                for term in outputs if isinstance(term, Filter)
+            ],
+        )
+        passed = screen_mask.any(axis=0)
+
+        raw_outputs = {
+            term: results[term][:, passed]
+            for term in outputs.intersection(unscreened)
+        }
+        screened_outputs = outputs.intersection(screened)
+        if not passed.any():
+            # Nothing passed, so there's nothing left to compute.
+            nrows = len(lifetimes) - max_extra_rows
+            raw_outputs.update(
+                (term, empty((nrows + extra_row_counts[term], 0), term.dtype))
+                for term in screened_outputs
+            )
+            return raw_outputs, passed
+
+        nodes = set(screened) | handed_over
+        for term in screened:
+            nodes.update(i for i in term.inputs if i.atomic)
+        subgraph = graph.subgraph(nodes)
+        subgraph.remove_edges_from(subgraph.in_edges(list(handed_over)))
+        raw_outputs.update(
+            self._compute_subgraph(
+                subgraph,
+                lifetimes.loc[:, passed],
+                max_extra_rows,
+                screened_outputs,
+                {term: results[term][:, passed] for term in handed_over},
+            )
+        )
+        return raw_outputs, passed
+
+    def _compute_subgraph(self,
+                          subgraph,
+                          lifetimes,
+                          max_extra_rows,
+                          outputs,
+                          workspace=None):
+        """
+        Run `compute_chunk` on a subgraph of a graph needing `max_extra_rows`
+        extra rows, for which `lifetimes` was built.
+        """
+        extra_row_counts = get_node_attributes(subgraph, 'extra_rows')
+        offset = max_extra_rows - max(extra_row_counts.values())
+        return self.compute_chunk(
+            subgraph,
+            lifetimes.iloc[offset:],
+            outputs,
+            workspace,
+        )
+
     def build_lifetimes_matrix(self, start_date, end_date, extra_rows):
         """
         Compute a lifetimes matrix from our AssetFinder, then drop columns that
@@ -335,6 +1138,28 @@ class SimpleFFCEngine(object):
         existed = lifetimes.iloc[extra_rows:].any()
         return lifetimes.loc[:, existed]
 
+    def _load_atomic(self, graph, terms, mask):
+        """
+        Load AdjustedArrays for the atomic `terms` over `mask`, converting
+        them to our precision.
+
+        Arrays read by any term that needs float64 are left as they were
+        loaded.
+        """
+        arrays = self._loader.load_adjusted_array(list(terms), mask)
+        precision = self._precision
+        if precision == float64:
+            return arrays
+
+        out = []
+        for term, array in zip(terms, arrays):
+            if array.dtype == float64 and not any(
+                consumer.needs_float64 for consumer in graph.successors(term)
+            ):
+                array = array.astype(precision)
+            out.append(array)
+        return out
+
     def _inputs_for_term(self, term, workspace, extra_row_counts):
         """
         Compute inputs for the given term.
@@ -364,42 +1189,352 @@ class SimpleFFCEngine(object):
                 for input_ in term.inputs
             ]
 
-    def compute_chunk(self, ordered_terms, extra_row_counts, base_mask):
+    @staticmethod
+    def _plan_tasks(ordered_terms, extra_row_counts):
+        """
+        Partition `ordered_terms` into tasks, each of which is executed as a
+        single unit of work.
+
+        Atomic terms are grouped by dataset and by number of extra rows.
+        Every term in such a group can be fetched with a single call to
+        `FFCLoader.load_adjusted_array`, which lets loaders share work like
+        reading raw data and querying adjustments between the columns of a
+        dataset.
+
+        Windowed terms that read the same input with the same window length
+        are grouped as described in `shared_window_groups`, and are computed
+        together so that they can share window iterators.
+
+        Every other term is computed by its own task.
+
+        Returns
+        -------
+        tasks : list[tuple[Term]]
+            Tasks in an order in which they can be executed serially.
+        """
+        load_groups = defaultdict(list)
+        for term in ordered_terms:
+            if term.atomic:
+                load_groups[term.dataset, extra_row_counts[term]].append(term)
+
+        window_groups = shared_window_groups(
+            [term for term in ordered_terms if term.windowed]
+        )
+
+        tasks = []
+
+        def add_loads(terms):
+            # Load every atomic term sharing a dataset and extra row count
+            # with one of `terms`.  Terms loaded by an earlier member of
+            # their group already belong to a task.
+            for term in terms:
+                group = load_groups.pop(
+                    (term.dataset, extra_row_counts[term]),
+                    None,
+                )
+                if group is not None:
+                    tasks.append(tuple(group))
+
+        for term in ordered_terms:
+            if term.atomic:
+                add_loads([term])
+            elif term in window_groups:
+                group = window_groups[term]
+                if group[0] is term:
+                    # Later members of the group may read inputs that come
+                    # after this term in `ordered_terms`.  Windowed terms
+                    # only read atomic terms, so it's always safe to load
+                    # those early.
+                    add_loads(chain.from_iterable(t.inputs for t in group))
+                    tasks.append(group)
+            else:
+                tasks.append((term,))
+        return tasks
+
+    def compute_chunk(self, graph, base_mask, outputs, workspace=None):
         """
         Compute the FFC terms in the graph based on the assets and dates
         defined by base_mask.
 
+        Intermediate results are released as soon as every term consuming
+        them has been computed, so only the terms in `outputs` are guaranteed
+        to be present in the result.
+
+        Parameters
+        ----------
+        graph : networkx.DiGraph
+            Dependency graph produced by `build_dependency_graph`.
+        base_mask : pd.DataFrame
+            Lifetimes matrix defining the dates and assets to compute.
+        outputs : iterable[zipline.modelling.term.Term]
+            Terms whose results should be retained.
+        workspace : dict[Term -> np.array], optional
+            Results that have already been computed for terms in `graph`.
+            These terms must have no inputs in `graph`.
+
         Returns a dictionary mapping terms to computed arrays.
+
+        Notes
+        -----
+        The signature used by earlier versions,
+        ``compute_chunk(ordered_terms, extra_row_counts, base_mask)``, is
+        still accepted when its arguments are passed positionally.  Every term
+        in `ordered_terms` is then retained in the result, as before.
         """
+        if not isinstance(graph, DiGraph):
+            # We were called as
+            # compute_chunk(ordered_terms, extra_row_counts, base_mask).
+            ordered_terms, extra_row_counts, base_mask = (
+                graph,
+                base_mask,
+                outputs,
+            )
+            return self.compute_chunk(
+                _graph_from_ordered_terms(ordered_terms, extra_row_counts),
+                base_mask,
+                ordered_terms,
+            )
+
         loader = self._loader
+        extra_row_counts = get_node_attributes(graph, 'extra_rows')
         max_extra_rows = max(extra_row_counts.values())
-        workspace = {term: None for term in ordered_terms}
 
-        for term in ordered_terms:
-            base_mask_for_term = base_mask.iloc[
-                max_extra_rows - extra_row_counts[term]:
-            ]
+        def mask_for_term(term):
+            return base_mask.iloc[max_extra_rows - extra_row_counts[term]:]
+
+        cache = self._cache
+        data_version = getattr(loader, 'data_version', None)
+        use_cache = cache is not None and data_version is not None
+        if self._precision != float64:
+            # Outputs computed at other precisions aren't interchangeable.
+            data_version = (data_version, self._precision.name)
+        workspace = {} if workspace is None else dict(workspace)
+        if use_cache:
+            graph, workspace = self._load_cached_terms(
+                graph,
+                outputs,
+                mask_for_term,
+                data_version,
+                workspace,
+            )
+
+        ordered_terms = [
+            term for term in topological_sort(graph) if term not in workspace
+        ]
+        refcounts = initial_refcounts(graph, outputs)
+
+        def prepare(task):
+            """
+            Build a callable computing a list of results for the terms in
+            `task`.
+
+            All reads from `workspace` happen here rather than in the returned
+            callable, so that the callable can be run on a worker thread.
+            """
+            term = task[0]
+            base_mask_for_term = mask_for_term(term)
             if term.atomic:
-                # FUTURE OPTIMIZATION: Scan the resolution order for terms in
-                # the same dataset and load them here as well.
-                to_load = [term]
-                loaded = loader.load_adjusted_array(
-                    to_load,
+                return partial(
+                    self._load_atomic,
+                    graph,
+                    task,
                     base_mask_for_term,
                 )
-                for loaded_term, adj_array in zip_longest(to_load, loaded):
-                    workspace[loaded_term] = adj_array
-            else:
-                if term.windowed:
-                    compute = term.compute_from_windows
-                else:
-                    compute = term.compute_from_arrays
-                workspace[term] = compute(
-                    self._inputs_for_term(term, workspace, extra_row_counts),
+
+            if len(task) > 1:
+                return partial(
+                    compute_in_lockstep,
+                    task,
+                    shared_windows(task, workspace, extra_row_counts),
                     base_mask_for_term,
                 )
+
+            if term.windowed:
+                compute = term.compute_from_windows
+            else:
+                compute = term.compute_from_arrays
+            inputs = self._inputs_for_term(term, workspace, extra_row_counts)
+            return lambda: [compute(inputs, base_mask_for_term)]
+
+        def finish(task, results):
+            """
+            Store the results of `task` and free any inputs that have no
+            remaining consumers.
+            """
+            for term, result in zip_longest(task, results):
+                workspace[term] = result
+                if use_cache and not term.atomic:
+                    mask = mask_for_term(term)
+                    cache.put(
+                        term,
+                        data_version,
+                        mask.index,
+                        mask.columns.values,
+                        result,
+                    )
+            for term in task:
+                for garbage in decref_dependencies(graph, term, refcounts):
+                    del workspace[garbage]
+
+        if self._profiler is not None:
+            prepare, finish = self._profiler.instrument(
+                prepare,
+                finish,
+                workspace,
+                extra_row_counts,
+            )
+
+        tasks = self._plan_tasks(ordered_terms, extra_row_counts)
+        if self._num_threads is None:
+            for task in tasks:
+                finish(task, prepare(task)())
+        else:
+            self._execute_in_pool(tasks, graph, prepare, finish)
         return workspace
 
+    def _load_cached_terms(self,
+                           graph,
+                           outputs,
+                           mask_for_term,
+                           data_version,
+                           workspace):
+        """
+        Look up cached outputs for the terms needed to compute `outputs`.
+
+        Inputs of a term whose output is cached don't need to be loaded or
+        computed, so we don't look them up either unless they're also needed
+        by some other term.
+
+        Parameters
+        ----------
+        graph : networkx.DiGraph
+            Dependency graph produced by `build_dependency_graph`.
+        outputs : iterable[zipline.modelling.term.Term]
+            Terms whose results are requested.
+        mask_for_term : callable
+            Function from a term to the mask over which it's computed.
+        data_version : object
+            Data version of our loader.
+        workspace : dict[Term -> np.array]
+            Results that have already been computed.  These aren't looked up.
+
+        Returns
+        -------
+        graph : networkx.DiGraph
+            A copy of `graph` containing only the terms that are still needed.
+            Cached terms have no inputs in the new graph.
+        workspace : dict[Term -> np.array]
+            Map from terms to their cached or already-computed outputs.
+        """
+        cache = self._cache
+        workspace = dict(workspace)
+        needed = set()
+        stack = list(outputs)
+        while stack:
+            term = stack.pop()
+            if term in needed:
+                continue
+            needed.add(term)
+            if term in workspace:
+                continue
+
+            if not term.atomic:
+                mask = mask_for_term(term)
+                cached = cache.get(
+                    term,
+                    data_version,
+                    mask.index,
+                    mask.columns.values,
+                )
+                if cached is not None:
+                    workspace[term] = cached
+                    continue
+            stack.extend(graph.predecessors(term))
+
+        pruned = graph.subgraph(needed)
+        pruned.remove_edges_from(pruned.in_edges(list(workspace)))
+        return pruned, workspace
+
+    def _execute_in_pool(self, tasks, graph, prepare, finish):
+        """
+        Execute `tasks` on a pool of worker threads, starting each task as soon
+        as all of its inputs are available.
+
+        Calls to our loader are made on the calling thread, both because
+        loaders aren't required to be thread-safe (sqlite3 connections, for
+        example, can only be used by the thread that created them) and so
+        that loads can overlap with computations running on the pool.
+        """
+        # Count the inputs each task is still waiting on, and record which
+        # tasks are waiting on each term.  Inputs that aren't produced by any
+        # task are already available.
+        produced = set(chain.from_iterable(tasks))
+        waiting_on = {}
+        consumers = defaultdict(list)
+        for task in tasks:
+            inputs = set(
+                chain.from_iterable(graph.predecessors(t) for t in task)
+            ).intersection(produced).difference(task)
+            waiting_on[task] = len(inputs)
+            for input_ in inputs:
+                consumers[input_].append(task)
+
+        def complete(task, results):
+            """
+            Finish `task`, returning the tasks that became ready as a result.
+            """
+            finish(task, results)
+            newly_ready = []
+            for term in task:
+                for consumer in consumers[term]:
+                    waiting_on[consumer] -= 1
+                    if waiting_on[consumer] == 0:
+                        newly_ready.append(consumer)
+            return newly_ready
+
+        ready = [task for task in tasks if waiting_on[task] == 0]
+        ready_loads = deque()
+        finished = Queue()
+        in_flight = 0
+
+        pool = ThreadPool(self._num_threads)
+        try:
+            while ready or ready_loads or in_flight:
+                for task in ready:
+                    if task[0].atomic:
+                        ready_loads.append(task)
+                    else:
+                        pool.apply_async(
+                            _run_task,
+                            (task, prepare(task), finished.put),
+                        )
+                        in_flight += 1
+                ready = []
+
+                # Run at most one load before checking on our workers, so that
+                # finished computations are collected and their consumers
+                # dispatched as early as possible.
+                if ready_loads:
+                    task = ready_loads.popleft()
+                    ready.extend(complete(task, prepare(task)()))
+                    block = False
+                else:
+                    block = True
+
+                while in_flight:
+                    try:
+                        task, results, exc_info = finished.get(block)
+                    except Empty:
+                        break
+                    in_flight -= 1
+                    if exc_info is not None:
+                        reraise(*exc_info)
+                    ready.extend(complete(task, results))
+                    block = False
+        finally:
+            pool.close()
+            pool.join()
+
     def _format_factor_matrix(self,
                               dates,
                               assets,
@@ -407,7 +1542,7 @@ class SimpleFFCEngine(object):
                               factor_data,
                               factor_names):
         """
-        Convert raw computed filters/factors into a DataFrame for public APIs.
+        Extract the rows of raw computed factors that passed all filters.
 
         Parameters
         ----------
@@ -424,19 +1559,23 @@ class SimpleFFCEngine(object):
 
         Returns
         -------
-        factor_matrix : pd.DataFrame
-            A DataFrame with the following indices:
-
-            index : two-tiered MultiIndex of (date, asset).  For each date, we
-                return a row for each asset that passed all filters on that
-                date.
-            columns : keys from `factor_data`
-
-        Each date/asset/factor triple contains the computed value of the given
-        factor on the given date for the given asset.
+        dates : np.array[datetime64]
+            The entries of `dates` on which at least one asset passed all
+            filters.
+        assets : np.array[int64]
+            The entries of `assets` that passed all filters on at least one
+            date.
+        date_codes : np.array[intp]
+            Index into the returned `dates` for each output row.
+        asset_codes : np.array[intp]
+            Index into the returned `assets` for each output row.
+        factors : dict[str -> np.array]
+            Map from factor name to the value of that factor for each output
+            row.
+
+        Output rows are sorted by date, then by the position of their asset in
+        `assets`.
         """
-        # FUTURE OPTIMIZATION: Cythonize all of this.
-
         # Boolean mask of values that passed all filters.
         unioned = reduce(and_, filter_data)
 
@@ -445,43 +1584,59 @@ class SimpleFFCEngine(object):
         # frame.
         nonzero_xs, nonzero_ys = unioned.nonzero()
 
-        raw_dates_index = empty_like(nonzero_xs, dtype='datetime64[ns]')
-        raw_assets_index = empty_like(nonzero_xs, dtype=int)
-        factor_outputs = [
-            empty_like(nonzero_xs, dtype=factor.dtype)
-            for factor in factor_data
-        ]
-
-        # This is tricky.
-
-        # unioned.sum(axis=1) gives us an array of the same size as `dates`
-        # containing, for each date, the number of assets that passed our
-        # filters on that date.
-
-        # Running this through add.accumulate gives us an array containing, for
-        # each date, the running total of the number of assets that passed our
-        # filters on or before that date.
-
-        # This means that (bounds[i - 1], bounds[i]) gives us the slice bounds
-        # of rows in our output DataFrame corresponding to each date.
-        dt_start = 0
-        bounds = add.accumulate(unioned.sum(axis=1))
-        for dt_idx, dt_end in enumerate(bounds):
-
-            row_bounds = slice(dt_start, dt_end)
-            column_indices = nonzero_ys[row_bounds]
+        # Boolean indexing visits entries in the same (row-major) order as
+        # nonzero, so each of these lines up with nonzero_xs/nonzero_ys.
+        factors = {
+            name: computed[unioned]
+            for name, computed in zip(factor_names, factor_data)
+        }
+
+        # Drop dates and assets that never passed our filters, renumbering
+        # the surviving entries so that codes index the compressed arrays.
+        dates_used = unioned.any(axis=1)
+        assets_used = unioned.any(axis=0)
+        date_codes = (dates_used.cumsum() - 1)[nonzero_xs]
+        asset_codes = (assets_used.cumsum() - 1)[nonzero_ys]
+
+        return (
+            dates[dates_used],
+            assets[assets_used],
+            date_codes,
+            asset_codes,
+            factors,
+        )
 
-            raw_dates_index[row_bounds] = dates[dt_idx]
-            raw_assets_index[row_bounds] = assets[column_indices]
-            for computed, output in zip(factor_data, factor_outputs):
-                output[row_bounds] = computed[dt_idx, column_indices]
 
-            # Upper bound of current row becomes lower bound for next row.
-            dt_start = dt_end
+def _concat_chunks(chunks, factor_names):
+    """
+    Concatenate the outputs of `SimpleFFCEngine._format_factor_matrix` for
+    consecutive, non-overlapping date ranges.
 
-        return DataFrame(
-            dict(zip(factor_names, factor_outputs)),
-            index=MultiIndex.from_arrays(
-                [raw_dates_index, raw_assets_index],
-            )
-        ).tz_localize('UTC', level=0)
+    Returns a tuple in the same format as a single chunk, with assets sorted by
+    asset id.
+    """
+    if len(chunks) == 1:
+        dates, assets, date_codes, asset_codes, factors = chunks[0]
+        if (diff(assets) > 0).all():
+            return chunks[0]
+
+    all_assets = unique(concatenate([chunk[1] for chunk in chunks]))
+
+    date_offset = 0
+    all_date_codes = []
+    all_asset_codes = []
+    for dates, assets, date_codes, asset_codes, _ in chunks:
+        all_date_codes.append(date_codes + date_offset)
+        all_asset_codes.append(all_assets.searchsorted(assets)[asset_codes])
+        date_offset += len(dates)
+
+    return (
+        concatenate([chunk[0] for chunk in chunks]),
+        all_assets,
+        concatenate(all_date_codes),
+        concatenate(all_asset_codes),
+        {
+            name: concatenate([chunk[4][name] for chunk in chunks])
+            for name in factor_names
+        },
+    )
@@ -169,6 +169,7 @@ class NumericalExpression(Term):
        A tuple of factors to use as inputs.
     """
     window_length = 0
+    assetwise = True
 
     def __new__(cls, expr, binds):
 
@@ -232,8 +233,10 @@ class NumericalExpression(Term):
         """
         Compute our stored expression string with numexpr.
         """
-        out = empty(mask.shape, dtype=self.dtype)
-        # This writes directly into our output buffer.
+        out = empty(mask.shape, dtype=self._output_dtype(arrays))
+        # This writes directly into our output buffer.  numexpr treats float
+        # constants as doubles, so results computed from float32 inputs must
+        # be allowed to be cast back down to float32.
         numexpr.evaluate(
             self._expr,
             local_dict={
@@ -242,6 +245,7 @@ class NumericalExpression(Term):
             },
             global_dict={},
             out=out,
+            casting='same_kind',
         )
         return out
 
@@ -2,10 +2,12 @@ from .factor import (
     Factor,
     TestingFactor,
     CustomFactor,
+    CustomBlockFactor,
 )
 
 __all__ = [
     'Factor',
     'TestingFactor',
     'CustomFactor',
+    'CustomBlockFactor',
 ]
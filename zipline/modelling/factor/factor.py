@@ -2,18 +2,15 @@
 factor.py
 """
 from operator import attrgetter
-from numpy import (
-    apply_along_axis,
-    float64,
-    nan,
-)
-from scipy.stats import rankdata
+from numpy import float64
 
 from zipline.errors import (
     UnknownRankMethod,
     UnsupportedDataType,
 )
+from zipline.lib.rank import rankdata_2d
 from zipline.modelling.term import (
+    CustomBlockTermMixin,
     CustomTermMixin,
     RequiredWindowLengthMixin,
     SingleInputMixin,
@@ -34,6 +31,7 @@ from zipline.modelling.expression import (
 from zipline.modelling.filter import (
     NumExprFilter,
     PercentileFilter,
+    TopBottomFilter,
 )
 from zipline.utils.control_flow import nullctx
 
@@ -243,11 +241,13 @@ class Factor(Term):
         description of the valid inputs to `method`.
 
         Missing or non-existent data on a given day will cause an asset to be
-        given a rank of NaN for that day.
+        given a rank of NaN for that day.  Assets with NaN ranks don't take up
+        a rank.
 
         See Also
         --------
-        scipy.stats.rankdata : Underlying ranking algorithm.
+        scipy.stats.rankdata : Definition of the ranking methods.
+        zipline.lib.rank.rankdata_2d : Underlying ranking algorithm.
         zipline.modelling.factor.Rank : Class implementing core functionality.
         """
         return Rank(self, method=method)
@@ -278,6 +278,48 @@ class Factor(Term):
             max_percentile=max_percentile,
         )
 
+    def top(self, N):
+        """
+        Construct a new Filter representing the N assets with the largest
+        values of this Factor on each day.
+
+        Parameters
+        ----------
+        N : int
+            The number of assets passing the filter on each day.
+
+        Returns
+        -------
+        out : zipline.modelling.filter.TopBottomFilter
+            A new filter that will compute the specified top-N mask.
+
+        See Also
+        --------
+        zipline.modelling.filter.TopBottomFilter
+        """
+        return TopBottomFilter(self, N=N, largest=True)
+
+    def bottom(self, N):
+        """
+        Construct a new Filter representing the N assets with the smallest
+        values of this Factor on each day.
+
+        Parameters
+        ----------
+        N : int
+            The number of assets passing the filter on each day.
+
+        Returns
+        -------
+        out : zipline.modelling.filter.TopBottomFilter
+            A new filter that will compute the specified bottom-N mask.
+
+        See Also
+        --------
+        zipline.modelling.filter.TopBottomFilter
+        """
+        return TopBottomFilter(self, N=N, largest=False)
+
 
 class NumExprFactor(NumericalExpression, Factor):
     """
@@ -315,7 +357,8 @@ class Rank(SingleInputMixin, Factor):
 
     See Also
     --------
-    scipy.stats.rankdata : Underlying ranking algorithm.
+    scipy.stats.rankdata : Definition of the ranking methods.
+    zipline.lib.rank.rankdata_2d : Underlying ranking algorithm.
     zipline.factor.Factor.rank : Method-style interface to same functionality.
 
     Notes
@@ -360,24 +403,10 @@ class Rank(SingleInputMixin, Factor):
         """
         For each row in the input, compute a like-shaped array of per-row
         ranks.
+
+        Masked-out and NaN inputs are given a rank of NaN.
         """
-        # FUTURE OPTIMIZATION:
-        # Write a less general `apply_to_rows` method in
-        # Cython that doesn't do all the extra work that apply_over_axis does.
-
-        # FUTURE OPTIMIZATION:
-        # Look at bottleneck.nanrankdata, which is ~30% faster than numpy here,
-        # and does what we want with NaNs, but doesn't support `method`.
-        result = apply_along_axis(
-            rankdata,
-            1,
-            arrays[0],
-            method=self._method,
-        )
-        # rankdata will sort nan values into last place, but we want our nans
-        # to propagate, so explicitly re-apply
-        result[~mask.values] = nan
-        return result
+        return rankdata_2d(arrays[0], mask.values, self._method)
 
     def __repr__(self):
         return "{type}({input_}, method='{method}')".format(
@@ -405,6 +434,33 @@ class CustomFactor(RequiredWindowLengthMixin, CustomTermMixin, Factor):
         return super(CustomFactor, self)._validate()
 
 
+class CustomBlockFactor(RequiredWindowLengthMixin,
+                        CustomBlockTermMixin,
+                        Factor):
+    """
+    Base class for user-defined Factors that compute many dates at once.
+
+    Subclasses implement ``compute(self, dates, assets, out, *inputs)``,
+    where each input is a read-only array of shape
+    (len(dates), window_length, len(assets)) whose i'th entry is the window
+    of data for dates[i], with adjustments already applied.  `compute` should
+    write the value for dates[i] into out[i].  This lets computations be
+    vectorized across dates as well as across assets.
+
+    Inputs are strided views over shared buffers, so they must not be
+    retained after `compute` returns.
+
+    We currently only support CustomBlockFactors of type float64.
+    """
+    dtype = float64
+    ctx = nullctx()
+
+    def _validate(self):
+        if self.dtype != float64:
+            raise UnsupportedDataType(self.dtype)
+        return super(CustomBlockFactor, self)._validate()
+
+
 class TestingFactor(TestingTermMixin, Factor):
     """
     Base class for testing engines that asserts all inputs are correctly
@@ -2,29 +2,18 @@
 Technical Analysis Factors
 --------------------------
 """
-from bottleneck import (
-    nanargmax,
-    nanmax,
-    nanmean,
-    nansum,
-)
-from numpy import (
-    clip,
-    diff,
-    fmax,
-    inf,
-    isnan,
-    NINF,
-)
-from numexpr import evaluate
-
 from zipline.data.equities import USEquityPricing
+from zipline.lib.rolling import (
+    rolling_max_drawdown,
+    rolling_nanmean,
+    rolling_rsi,
+    rolling_weighted_mean,
+)
 from zipline.modelling.term import SingleInputMixin
-from zipline.utils.control_flow import ignore_nanwarnings
-from .factor import CustomFactor
+from .factor import CustomBlockFactor
 
 
-class RSI(CustomFactor, SingleInputMixin):
+class RSI(CustomBlockFactor, SingleInputMixin):
     """
     Factor computing rolling relative-strength index on a DataSet.
 
@@ -33,38 +22,33 @@ class RSI(CustomFactor, SingleInputMixin):
     """
     window_length = 14
     inputs = (USEquityPricing.close,)
+    assetwise = True
 
-    def compute(self, today, assets, out, closes):
-        diffs = diff(closes)
-        ups = nanmean(clip(diffs, 0, inf), axis=0)
-        downs = nanmean(clip(diffs, -inf, 0), axis=0)
-        return evaluate(
-            "100 - (100 / (1 + (ups / downs)))",
-            locals_dict={'ups': ups, 'downs': downs},
-            globals_dict={},
-            out=out,
-        )
+    def compute(self, dates, assets, out, closes):
+        rolling_rsi(closes, out)
 
 
-class SimpleMovingAverage(CustomFactor, SingleInputMixin):
+class SimpleMovingAverage(CustomBlockFactor, SingleInputMixin):
     """
     Factor computing moving averages on a DataSet.
+
+    Means are updated incrementally from one date to the next, so the cost of
+    each output row doesn't depend on the window length.
     """
-    # numpy's nan functions throw warnings when passed an array containing only
-    # nans, but they still returns the desired value (nan), so we ignore the
-    # warning.
-    ctx = ignore_nanwarnings()
+    assetwise = True
 
-    def compute(self, today, assets, out, data):
-        out[:] = nanmean(data, axis=0)
+    def compute(self, dates, assets, out, data):
+        rolling_nanmean(data, out)
 
 
-class WeightedAverageValue(CustomFactor):
+class WeightedAverageValue(CustomBlockFactor):
     """
     Helper for VWAP-like computations.
     """
-    def compute(self, today, assets, out, base, weight):
-        out[:] = nansum(base * weight, axis=0) / nansum(weight, axis=0)
+    assetwise = True
+
+    def compute(self, dates, assets, out, base, weight):
+        rolling_weighted_mean(base, weight, out)
 
 
 class VWAP(WeightedAverageValue):
@@ -74,18 +58,11 @@ class VWAP(WeightedAverageValue):
     inputs = (USEquityPricing.close, USEquityPricing.volume)
 
 
-class MaxDrawdown(CustomFactor, SingleInputMixin):
+class MaxDrawdown(CustomBlockFactor, SingleInputMixin):
     """
     Max Drawdown over a window
     """
-    ctx = ignore_nanwarnings()
-
-    def compute(self, today, assets, out, data):
-        drawdowns = fmax.accumulate(data, axis=0) - data
-        drawdowns[isnan(drawdowns)] = NINF
-        drawdown_ends = nanargmax(drawdowns, axis=0)
+    assetwise = True
 
-        # TODO: Accelerate this loop in Cython or Numba.
-        for i, end in enumerate(drawdown_ends):
-            peak = nanmax(data[:end + 1, i])
-            out[i] = (peak - data[end, i]) / data[end, i]
+    def compute(self, dates, assets, out, data):
+        rolling_max_drawdown(data, out)
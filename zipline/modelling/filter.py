@@ -4,14 +4,21 @@ filter.py
 from numpy import (
     bool_,
     float64,
-    nan,
-    nanpercentile,
+    inf,
+    isnan,
+    newaxis,
+    partition,
+    unique,
+    where,
+    zeros,
 )
 from itertools import chain
+from numbers import Integral
 from operator import attrgetter
 
 from zipline.errors import (
     BadPercentileBounds,
+    BadTopBottomN,
 )
 from zipline.modelling.term import (
     SingleInputMixin,
@@ -185,29 +192,129 @@ class PercentileFilter(SingleInputMixin, Filter):
         """
         For each row in the input, compute a mask of all values falling between
         the given percentiles.
+
+        Percentiles are interpolated linearly between data points, as in
+        `np.nanpercentile`.  Both bounds are found with a single partition of
+        each row's valid values.
         """
-        # TODO: Review whether there's a better way of handling small numbers
-        # of columns.
-        data = arrays[0].astype(float64)
-        data[~mask.values] = nan
-
-        # FIXME: np.nanpercentile **should** support computing multiple bounds
-        # at once, but there's a bug in the logic for multiple bounds in numpy
-        # 1.9.2.  It will be fixed in 1.10.
-        # c.f. https://github.com/numpy/numpy/pull/5981
-        lower_bounds = nanpercentile(
-            data,
-            self._min_percentile,
-            axis=1,
-            keepdims=True,
+        data = arrays[0]
+        valid = mask.values & ~isnan(data)
+        out = zeros(data.shape, dtype=bool_)
+        min_q = self._min_percentile / 100.0
+        max_q = self._max_percentile / 100.0
+        for idx in range(data.shape[0]):
+            row_valid = valid[idx]
+            values = data[idx][row_valid]
+            nvalues = len(values)
+            if not nvalues:
+                continue
+
+            positions = (min_q * (nvalues - 1), max_q * (nvalues - 1))
+            below = [int(pos) for pos in positions]
+            above = [min(b + 1, nvalues - 1) for b in below]
+            partitioned = values.astype(float64)
+            partitioned.partition(unique(below + above))
+
+            # Interpolate as a + (b - a) * t, which is exact when a == b, so
+            # that values tied at a bound are always selected.
+            lower, upper = (
+                partitioned[b] + (partitioned[a] - partitioned[b]) * (pos - b)
+                for pos, b, a in zip(positions, below, above)
+            )
+            out[idx, row_valid] = (lower <= values) & (values <= upper)
+        return out
+
+
+class TopBottomFilter(SingleInputMixin, Filter):
+    """
+    A Filter representing the N assets with the largest or smallest values of
+    a Factor on each day.
+
+    Parameters
+    ----------
+    factor : zipline.modelling.factor.Factor
+        The factor whose values are compared.
+    N : int
+        The number of assets that pass the filter on each day.  Fewer assets
+        pass on days with fewer than N non-NaN values.
+    largest : bool
+        Whether to select the assets with the largest values, rather than the
+        smallest.
+
+    Notes
+    -----
+    Ties at the boundary are broken in favor of the assets that come first
+    in the input.
+
+    Most users should call Factor.top or Factor.bottom rather than directly
+    construct an instance of this class.
+    """
+    window_length = 0
+
+    def __new__(cls, factor, N, largest):
+        return super(TopBottomFilter, cls).__new__(
+            cls,
+            inputs=(factor,),
+            N=N,
+            largest=largest,
+        )
+
+    def _init(self, N, largest, *args, **kwargs):
+        self._N = N
+        self._largest = largest
+        return super(TopBottomFilter, self)._init(*args, **kwargs)
+
+    @classmethod
+    def static_identity(cls, N, largest, *args, **kwargs):
+        return (
+            super(TopBottomFilter, cls).static_identity(*args, **kwargs),
+            N,
+            largest,
         )
-        upper_bounds = nanpercentile(
-            data,
-            self._max_percentile,
-            axis=1,
-            keepdims=True,
+
+    def _validate(self):
+        """
+        Ensure that N is a positive integer.
+        """
+        N = self._N
+        if not isinstance(N, Integral) or isinstance(N, bool) or N < 1:
+            raise BadTopBottomN(N=N)
+        return super(TopBottomFilter, self)._validate()
+
+    def compute_from_arrays(self, arrays, mask):
+        """
+        Select the N largest or smallest valid values in each row with a
+        single partition of the input, rather than a full sort.
+        """
+        data = arrays[0]
+        valid = mask.values & ~isnan(data)
+        if self._N >= data.shape[1]:
+            return valid
+
+        # Find the N'th smallest key in each row, with invalid entries sorted
+        # to the end.  Valid values can tie with the key given to invalid
+        # entries, so rather than taking the first N entries of the
+        # partition, select the valid entries below the N'th key, and then
+        # the first valid entries equal to it until there are N.
+        if self._largest:
+            keys = where(valid, -data.astype(float64), inf)
+        else:
+            keys = where(valid, data.astype(float64), inf)
+        kth = partition(keys, self._N - 1, axis=1)[:, self._N - 1, newaxis]
+
+        out = valid & (keys < kth)
+        ties = valid & (keys == kth)
+        remaining = self._N - out.sum(axis=1)
+        out |= ties & (ties.cumsum(axis=1) <= remaining[:, newaxis])
+        return out
+
+    def __repr__(self):
+        return "{type}({input_}, N={N}, largest={largest})".format(
+            type=type(self).__name__,
+            input_=self.inputs[0],
+            N=self._N,
+            largest=self._largest,
         )
-        return (lower_bounds <= data) & (data <= upper_bounds)
 
 
 class SequencedFilter(Filter):
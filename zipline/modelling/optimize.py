@@ -0,0 +1,310 @@
+"""
+Rewriting of FFC term graphs into cheaper equivalent graphs.
+"""
+import ast
+from numbers import Number
+
+from networkx import topological_sort
+
+from zipline.modelling.expression import NumericalExpression
+from zipline.modelling.filter import NumExprFilter
+
+
+# Map from AST operator types to the symbols used in numexpr expressions.
+_BINOP_SYMBOLS = {
+    ast.Add: '+',
+    ast.Sub: '-',
+    ast.Mult: '*',
+    ast.Div: '/',
+    ast.Mod: '%',
+    ast.Pow: '**',
+    ast.BitAnd: '&',
+    ast.BitOr: '|',
+}
+_UNARYOP_SYMBOLS = {
+    ast.USub: '-',
+    ast.Invert: '~',
+}
+_COMPARISON_SYMBOLS = {
+    ast.Lt: '<',
+    ast.LtE: '<=',
+    ast.Eq: '==',
+    ast.NotEq: '!=',
+    ast.GtE: '>=',
+    ast.Gt: '>',
+}
+
+
+def _constant_value(node):
+    """
+    The value of `node` if it's a numeric literal, otherwise None.
+    """
+    value = getattr(node, 'value', None)
+    if value is None:
+        # Python 2 and Python < 3.8 represent numbers as ast.Num.
+        value = getattr(node, 'n', None)
+    if isinstance(value, Number) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def _fold(node):
+    """
+    Fold arithmetic on numeric literals in the expression rooted at `node`.
+
+    Returns a string in numexpr syntax for the folded expression.  Only
+    folds whose result doesn't depend on numexpr's integer semantics are
+    performed: division and exponentiation are folded only when an operand
+    is a float.
+    """
+    if isinstance(node, ast.Expression):
+        return _fold(node.body)
+    if isinstance(node, ast.Name):
+        return node.id
+
+    value = _constant_value(node)
+    if value is not None:
+        return repr(value)
+
+    if isinstance(node, ast.BinOp):
+        left, right = _fold(node.left), _fold(node.right)
+        op = _BINOP_SYMBOLS[type(node.op)]
+        folded = _fold_binop(op, left, right)
+        if folded is not None:
+            return folded
+        return "(%s) %s (%s)" % (left, op, right)
+    if isinstance(node, ast.UnaryOp):
+        operand = _fold(node.operand)
+        op = _UNARYOP_SYMBOLS[type(node.op)]
+        literal = _literal(operand)
+        if op == '-' and literal is not None:
+            return repr(-literal)
+        return "%s(%s)" % (op, operand)
+    if isinstance(node, ast.Compare) and len(node.ops) == 1:
+        return "(%s) %s (%s)" % (
+            _fold(node.left),
+            _COMPARISON_SYMBOLS[type(node.ops[0])],
+            _fold(node.comparators[0]),
+        )
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) \
+            and not node.keywords:
+        return "%s(%s)" % (
+            node.func.id,
+            ', '.join(_fold(arg) for arg in node.args),
+        )
+    raise _Unsupported(node)
+
+
+def _literal(expr):
+    """
+    The value of `expr` if it's a numeric literal, otherwise None.
+    """
+    try:
+        return _constant_value(ast.parse(expr, mode='eval').body)
+    except SyntaxError:
+        return None
+
+
+def _fold_binop(op, left, right):
+    """
+    Fold `left op right` if both sides are numeric literals.
+    """
+    lvalue, rvalue = _literal(left), _literal(right)
+    if lvalue is None or rvalue is None:
+        return None
+    has_float = isinstance(lvalue, float) or isinstance(rvalue, float)
+    if op == '+':
+        return repr(lvalue + rvalue)
+    elif op == '-':
+        return repr(lvalue - rvalue)
+    elif op == '*':
+        return repr(lvalue * rvalue)
+    elif op == '/' and has_float and rvalue != 0:
+        return repr(lvalue / rvalue)
+    elif op == '**' and has_float and lvalue > 0:
+        return repr(lvalue ** rvalue)
+    return None
+
+
+class _Unsupported(Exception):
+    """
+    Raised when an expression uses syntax that we don't know how to rewrite.
+    """
+    pass
+
+
+class _Rename(ast.NodeTransformer):
+    """
+    Replace variable names in an expression AST with the ASTs of other
+    expressions.
+    """
+    def __init__(self, replacements):
+        self._replacements = replacements
+
+    def visit_Name(self, node):
+        try:
+            return self._replacements[node.id]
+        except KeyError:
+            return node
+
+
+def _inline_inputs(term, inputs, inlinable, replacements):
+    """
+    Build the expression and inputs for `term`, reading from `inputs`, with
+    every input in `inlinable` replaced by its own expression.  The inputs of
+    inlined terms are looked up in `replacements`.
+
+    Returns an expression AST whose variables are the new inputs themselves,
+    keyed by the names in the returned dict.
+    """
+    names = {}
+
+    def name_for(input_):
+        try:
+            return names[input_]
+        except KeyError:
+            name = names[input_] = "v_%d" % len(names)
+            return name
+
+    def expression_ast(expr, expr_inputs):
+        tree = ast.parse(expr, mode='eval')
+        variables = {}
+        for idx, input_ in enumerate(expr_inputs):
+            if input_ in inlinable:
+                variables["x_%d" % idx] = expression_ast(
+                    input_._expr,
+                    [replacements[i] for i in input_.inputs],
+                ).body
+            else:
+                variables["x_%d" % idx] = ast.Name(
+                    id=name_for(input_),
+                    ctx=ast.Load(),
+                )
+        return _Rename(variables).visit(tree)
+
+    tree = expression_ast(term._expr, inputs)
+    return tree, {name: input_ for input_, name in names.items()}
+
+
+def _canonicalize(expr, bindings):
+    """
+    Rename the variables in `expr` to x_0, x_1, ... in order of first
+    appearance, dropping unused bindings.
+
+    Returns the new expression and the new inputs tuple.
+    """
+    tree = ast.parse(expr, mode='eval')
+    first_offsets = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in bindings:
+            first_offsets[node.id] = min(
+                node.col_offset,
+                first_offsets.get(node.id, node.col_offset),
+            )
+    order = sorted(first_offsets, key=first_offsets.get)
+    replacements = {
+        name: ast.Name(id="x_%d" % idx, ctx=ast.Load())
+        for idx, name in enumerate(order)
+    }
+    new_expr = _fold(_Rename(replacements).visit(tree))
+    return new_expr, tuple(bindings[name] for name in order)
+
+
+def optimize_terms(terms):
+    """
+    Rewrite the graph of `terms` and their dependencies into an equivalent
+    graph that is cheaper to compute.
+
+    Three rewrites are performed:
+
+    - Arithmetic on constants in NumericalExpressions is folded.
+    - NumericalExpressions whose only consumers are other NumericalExpressions
+      are inlined into their consumers, so that chains of expressions are
+      computed with a single call to numexpr and a single output buffer.
+      Expressions that appear in `terms` are never inlined.
+    - Variables in NumericalExpressions are numbered in a canonical order,
+      so that expressions that differ only in the order of their inputs
+      become the same term.  Because terms are memoized, every term whose
+      inputs become identical is then also deduplicated.
+
+    Parameters
+    ----------
+    terms : iterable[zipline.modelling.term.Term]
+        The terms to optimize.
+
+    Returns
+    -------
+    optimized : dict[Term -> Term]
+        Map from each term in `terms` to an equivalent optimized term.
+    """
+    # Avoid a circular import: the engine builds graphs of our outputs.
+    from zipline.modelling.engine import build_dependency_graph
+
+    terms = list(terms)
+    graph = build_dependency_graph(terms)
+    outputs = set(terms)
+
+    rewritable = {
+        term for term in graph
+        if isinstance(term, NumericalExpression) and _can_parse(term._expr)
+    }
+
+    def can_inline(term):
+        if term in outputs or term not in rewritable:
+            return False
+        consumers = graph.successors(term)
+        if not all(c in rewritable for c in consumers):
+            return False
+        if isinstance(term, NumExprFilter):
+            # Filters apply their mask, which is only equivalent to applying
+            # the mask of the consuming expression if it's also a filter.
+            return all(isinstance(c, NumExprFilter) for c in consumers)
+        return all(isinstance(c, NumericalExpression) for c in consumers)
+
+    inlinable = {term for term in graph if can_inline(term)}
+
+    replacements = {}
+    for term in topological_sort(graph):
+        if term in inlinable:
+            # Inlined terms are rewritten as part of their consumers.
+            replacements[term] = term
+            continue
+
+        inputs = tuple(replacements[input_] for input_ in term.inputs)
+        if term in rewritable:
+            replacements[term] = _rewrite_expression(
+                term,
+                inputs,
+                inlinable,
+                replacements,
+            )
+        else:
+            replacements[term] = term._with_inputs(inputs)
+
+    return {term: replacements[term] for term in terms}
+
+
+def _can_parse(expr):
+    """
+    Whether we know how to rewrite the numexpr expression `expr`.
+    """
+    try:
+        _fold(ast.parse(expr, mode='eval'))
+    except (_Unsupported, KeyError, SyntaxError):
+        return False
+    return True
+
+
+def _rewrite_expression(term, inputs, inlinable, replacements):
+    """
+    Fold, inline and canonicalize the expression of `term`, which reads from
+    `inputs`.
+    """
+    tree, bindings = _inline_inputs(term, inputs, inlinable, replacements)
+    new_expr, new_inputs = _canonicalize(_fold(tree), bindings)
+    if not new_inputs:
+        # Expressions of constants alone aren't valid terms.
+        return term._with_inputs(inputs)
+    if (new_expr, new_inputs) == (term._expr, term.inputs):
+        return term
+    return type(term)(new_expr, new_inputs)
@@ -0,0 +1,253 @@
+"""
+Instrumentation of the time and memory used to compute FFC terms.
+"""
+import json
+from threading import current_thread, Lock
+from timeit import default_timer
+
+from pandas import DataFrame
+from six import itervalues
+from six.moves import zip
+
+try:
+    from time import thread_time as _cpu_time
+except ImportError:  # Python < 3.7
+    # There's no per-thread CPU clock, and time.clock measures CPU time of
+    # the whole process on POSIX, so fall back to wall time.
+    _cpu_time = default_timer
+
+
+def nbytes(result):
+    """
+    Number of bytes used by the data of `result`, which is either an ndarray
+    or an AdjustedArray.
+    """
+    try:
+        return result.nbytes
+    except AttributeError:
+        return result.data.nbytes
+
+
+class TermProfiler(object):
+    """
+    Records the time and memory spent computing each term of an FFC query.
+
+    Pass an instance to `SimpleFFCEngine` as its `profiler` to record every
+    term computed by `factor_matrix` and `factor_arrays`.  Records accumulate
+    across queries until `reset` is called.
+
+    Terms computed together in one task, such as columns fetched by a single
+    loader call or windowed terms computed in lockstep, share the task's time
+    equally.  The terms recorded are the ones the engine actually computed,
+    after optimization, so expressions that were inlined into their
+    consumers don't appear on their own.
+
+    CPU time is measured per thread on Python 3.7 and later.  Earlier versions
+    have no per-thread CPU clock, so `cpu_time` reports wall time instead.
+    """
+    _columns = [
+        'term',
+        'kind',
+        'thread',
+        'start',
+        'end',
+        'wall_time',
+        'cpu_time',
+        'extra_rows',
+        'output_bytes',
+        'workspace_bytes',
+    ]
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Discard every record.
+        """
+        with self._lock:
+            self._epoch = default_timer()
+            self._records = []
+            self._timings = {}
+
+    def instrument(self, prepare, finish, workspace, extra_row_counts):
+        """
+        Wrap the `prepare` and `finish` callbacks used by
+        `SimpleFFCEngine.compute_chunk` to record every task they execute.
+
+        Timing happens in the callable built by `prepare`, so that it's
+        measured on the thread executing the task.  Memory is measured in
+        `finish`, just before inputs that are no longer needed are freed.
+        """
+        def timed_prepare(task):
+            func = prepare(task)
+
+            def timed():
+                thread = current_thread().name
+                start, cpu_start = default_timer(), _cpu_time()
+                results = func()
+                cpu_end, end = _cpu_time(), default_timer()
+                with self._lock:
+                    self._timings[id(task)] = (
+                        thread,
+                        start - self._epoch,
+                        end - self._epoch,
+                        cpu_end - cpu_start,
+                    )
+                return results
+            return timed
+
+        def timed_finish(task, results):
+            with self._lock:
+                thread, start, end, cpu_time = self._timings.pop(id(task))
+            output_bytes = [nbytes(result) for result in results]
+            workspace_bytes = sum(output_bytes) + sum(
+                nbytes(result) for result in itervalues(workspace)
+            )
+            finish(task, results)
+
+            share = 1.0 / len(task)
+            with self._lock:
+                for term, result_bytes in zip(task, output_bytes):
+                    self._records.append((
+                        term,
+                        'load' if term.atomic else 'compute',
+                        thread,
+                        start,
+                        end,
+                        (end - start) * share,
+                        cpu_time * share,
+                        extra_row_counts[term],
+                        result_bytes,
+                        workspace_bytes,
+                    ))
+
+        return timed_prepare, timed_finish
+
+    def timeline(self):
+        """
+        Every recorded task execution, in the order in which they finished.
+
+        Returns
+        -------
+        timeline : pd.DataFrame
+            Frame with one row per term per execution.  `start` and `end` are
+            in seconds since the profiler was created or last reset,
+            `wall_time` and `cpu_time` are this term's share of the task's
+            time, and `workspace_bytes` is the total size of computed results
+            held by the engine once the task's results were stored.
+        """
+        return DataFrame.from_records(self._snapshot(), columns=self._columns)
+
+    def _snapshot(self):
+        with self._lock:
+            return list(self._records)
+
+    def report(self):
+        """
+        Summarize the cost of each recorded term.
+
+        Returns
+        -------
+        report : pd.DataFrame
+            Frame indexed by term, sorted by decreasing wall time, with
+            columns:
+
+            - wall_time, cpu_time: Total seconds spent on the term.
+            - load_time, compute_time: Wall time spent in loaders and in
+              computing the term from its inputs.  One of these is always
+              zero.
+            - executions: Number of times the term was computed, usually
+              once per chunk.
+            - extra_rows: Extra rows computed for the term's consumers.
+            - output_bytes: Largest output computed for the term.
+            - peak_workspace_bytes: Largest total size of results held by the
+              engine after the term was computed.
+        """
+        rows = {}
+        order = []
+        for record in self._snapshot():
+            (term, kind, _, _, _, wall_time, cpu_time,
+             extra_rows, output_bytes, workspace_bytes) = record
+            try:
+                row = rows[term]
+            except KeyError:
+                order.append(term)
+                row = rows[term] = {
+                    'wall_time': 0.0,
+                    'cpu_time': 0.0,
+                    'load_time': 0.0,
+                    'compute_time': 0.0,
+                    'executions': 0,
+                    'extra_rows': 0,
+                    'output_bytes': 0,
+                    'peak_workspace_bytes': 0,
+                }
+            row['wall_time'] += wall_time
+            row['cpu_time'] += cpu_time
+            row[kind + '_time'] += wall_time
+            row['executions'] += 1
+            row['extra_rows'] = max(row['extra_rows'], extra_rows)
+            row['output_bytes'] = max(row['output_bytes'], output_bytes)
+            row['peak_workspace_bytes'] = max(
+                row['peak_workspace_bytes'],
+                workspace_bytes,
+            )
+
+        order.sort(key=lambda term: rows[term]['wall_time'], reverse=True)
+        return DataFrame(
+            [rows[term] for term in order],
+            index=order,
+            columns=[
+                'wall_time',
+                'cpu_time',
+                'load_time',
+                'compute_time',
+                'executions',
+                'extra_rows',
+                'output_bytes',
+                'peak_workspace_bytes',
+            ],
+        )
+
+    def write_timeline(self, filename):
+        """
+        Write the recorded timeline to `filename` in the Trace Event Format
+        read by chrome://tracing, with one row of events per thread.
+        """
+        events = []
+        for record in self._snapshot():
+            (term, kind, thread, start, end, wall_time, cpu_time,
+             extra_rows, output_bytes, workspace_bytes) = record
+            events.append({
+                'name': term.short_repr(),
+                'cat': kind,
+                'ph': 'X',
+                'pid': 0,
+                'tid': thread,
+                'ts': start * 1e6,
+                'dur': (end - start) * 1e6,
+                'args': {
+                    'cpu_time': cpu_time,
+                    'extra_rows': int(extra_rows),
+                    'output_bytes': int(output_bytes),
+                    'workspace_bytes': int(workspace_bytes),
+                },
+            })
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': events}, f)
+
+    def write_graph(self, filename, formats=('svg',)):
+        """
+        Write the dependency graph of the recorded terms as a dot graph, with
+        each node annotated by its cost.
+
+        See Also
+        --------
+        zipline.modelling.visualize.write_term_graph
+        """
+        # Import lazily: visualize depends on logbook and the dot program.
+        from zipline.modelling.visualize import write_term_graph
+        report = self.report()
+        write_term_graph(list(report.index), filename, formats, report=report)
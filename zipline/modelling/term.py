@@ -3,9 +3,11 @@ Base class for Filters, Factors and Classifiers
 """
 from numpy import (
     empty,
+    float32,
     float64,
     full,
     nan,
+    newaxis,
 )
 from weakref import WeakValueDictionary
 
@@ -30,6 +32,21 @@ class Term(object):
     domain = None
     dtype = float64
 
+    # Whether this term must be computed in float64 even when it's run by an
+    # engine using float32 precision.
+    needs_float64 = False
+
+    # Whether this term's value for each asset depends only on the values of
+    # its inputs for the same asset.  Engines may compute such terms for just
+    # the assets that pass a screen.
+    assetwise = False
+
+    # Included in the keys of persistent caches of this term's outputs.
+    # Change it to invalidate outputs cached by earlier versions of a term
+    # whose behavior has changed in ways that its `compute` function's code
+    # doesn't show, e.g. by editing a helper function that `compute` calls.
+    cache_version = None
+
     _term_cache = WeakValueDictionary()
 
     def __new__(cls,
@@ -82,6 +99,12 @@ class Term(object):
                     dtype=dtype,
                     *args, **kwargs
                 )
+            # Keep our identity around so that it can be used to build keys
+            # for persistent caches of our outputs.
+            new_instance._identity = identity
+            # Keep our subclass-specific constructor arguments so that we can
+            # build an equivalent term with different inputs.
+            new_instance._constructor_args = (args, kwargs)
             return new_instance
 
     def __init__(self, *args, **kwargs):
@@ -124,6 +147,43 @@ class Term(object):
         """
         return (cls, inputs, window_length, domain, dtype)
 
+    def _with_inputs(self, inputs):
+        """
+        Return a term equivalent to `self`, except that it reads from
+        `inputs`.
+
+        This is used by the graph optimizer to replace inputs with equivalent,
+        cheaper terms.
+        """
+        inputs = tuple(inputs)
+        if inputs == self.inputs:
+            return self
+        args, kwargs = self._constructor_args
+        return Term.__new__(
+            type(self),
+            inputs,
+            self.window_length,
+            self.domain,
+            self.dtype,
+            *args, **kwargs
+        )
+
+    def _output_dtype(self, inputs):
+        """
+        The dtype of the array in which we compute our output from `inputs`,
+        which may be arrays or window iterators.
+
+        Float64 terms are computed in float32 if none of their inputs are
+        float64 and at least one of them is float32, unless they declare that
+        they need float64.  Every other term is computed in `self.dtype`.
+        """
+        if self.dtype != float64 or self.needs_float64:
+            return self.dtype
+        dtypes = [getattr(input_, 'dtype', None) for input_ in inputs]
+        if float32 in dtypes and float64 not in dtypes:
+            return float32
+        return self.dtype
+
     def _validate(self):
         """
         Assert that this term is well-formed.  This should be called exactly
@@ -186,6 +246,13 @@ class Term(object):
         """
         raise NotImplementedError()
 
+    def short_repr(self):
+        """
+        A short description of this term, used to label it in graphs and
+        profiles.
+        """
+        return type(self).__name__
+
     def __repr__(self):
         return (
             "{type}({inputs}, window_length={window_length})"
@@ -243,7 +310,7 @@ class CustomTermMixin(object):
         # TODO: Make mask available to user's `compute`.
         compute = self.compute
         dates, assets = mask.index, mask.columns
-        out = full(mask.shape, nan, dtype=self.dtype)
+        out = full(mask.shape, nan, dtype=self._output_dtype(windows))
         with self.ctx:
             # TODO: Consider pre-filtering columns that are all-nan at each
             # time-step?
@@ -258,6 +325,77 @@ class CustomTermMixin(object):
         return out
 
 
+class CustomBlockTermMixin(object):
+    """
+    Mixin for user-defined rolling-window Terms that compute many dates with
+    a single call.
+
+    Implements `compute_from_windows` in terms of a user-defined `compute`
+    function, which receives a block of consecutive windows for each input
+    as a 3-D array of shape (dates x window_length x assets), and which
+    writes a 2-D (dates x assets) block of output.
+
+    Blocks are read directly from the buffers of the input windows, so they
+    are never copied.  A block ends wherever an adjustment must be applied to
+    any input, so `compute` may be called several times per chunk.
+
+    Used by CustomBlockFactor.
+    """
+
+    def compute(self, dates, assets, out, *arrays):
+        """
+        Override this method with a function that writes a value into each
+        row of `out`.
+        """
+        raise NotImplementedError()
+
+    def compute_from_windows(self, windows, mask):
+        """
+        Call the user's `compute` function on each block of windows with a
+        pre-built output array.
+        """
+        compute = self.compute
+        dates, assets = mask.index, mask.columns
+        out = full(mask.shape, nan, dtype=self._output_dtype(windows))
+        with self.ctx:
+            start = 0
+            while start < len(dates):
+                stop = start + self._block_length(windows, len(dates) - start)
+                compute(
+                    dates[start:stop],
+                    assets,
+                    out[start:stop],
+                    *(self._next_block(w, stop - start) for w in windows)
+                )
+                start = stop
+        out[~mask.values] = nan
+        return out
+
+    @staticmethod
+    def _block_length(windows, max_rows):
+        """
+        The number of rows that can be read from every window in `windows`
+        without applying an adjustment, up to `max_rows`.
+
+        Windows that don't support block reads are read a row at a time.
+        """
+        length = max_rows
+        for window in windows:
+            block_length = getattr(window, 'block_length', None)
+            if block_length is None:
+                return 1
+            length = min(length, block_length())
+        return max(length, 1)
+
+    @staticmethod
+    def _next_block(window, nrows):
+        try:
+            next_block = window.next_block
+        except AttributeError:
+            return next(window)[newaxis]
+        return next_block(nrows)
+
+
 class TestingTermMixin(object):
     """
     Mixin for Term subclasses testing engines that asserts all inputs are
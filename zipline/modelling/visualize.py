@@ -75,14 +75,20 @@ def leaves(g):
     return set(n for n, d in iteritems(g.out_degree()) if d == 0)
 
 
-def write_term_graph(terms, filename, formats=('svg',)):
+def write_term_graph(terms, filename, formats=('svg',), report=None):
     """
     Write the dependency graph of `terms` as a dot graph.
 
     If `png` (default True), write a .png file using the system `dot` program.
     If `pdf` (default False), write a .pdf file using the system `dot` program.
+
+    If `report` is supplied, it should be a frame produced by
+    `zipline.modelling.profile.TermProfiler.report`, and each node found in it
+    is labelled with its cost, with a border whose width is proportional to
+    its share of the total wall time.
     """
     g = build_dependency_graph(terms)
+    add_node = partial(_add_term_node, report=report)
     dotfile = filename + '.dot'
 
     graph_attrs = {'rankdir': 'BT', 'splines': 'ortho'}
@@ -95,19 +101,19 @@ def write_term_graph(terms, filename, formats=('svg',)):
             with cluster(f, 'Outputs', **cluster_attrs):
                 outputs = leaves(g)
                 for term in outputs:
-                    add_term_node(f, term)
+                    add_node(f, term)
 
             # Write inputs cluster.
             with cluster(f, 'Inputs', **cluster_attrs):
                 inputs = roots(g)
                 for term in inputs:
-                    add_term_node(f, term)
+                    add_node(f, term)
 
             # Write intermediate results.
             for term in topological_sort(g):
                 if term in inputs or term in outputs:
                     continue
-                add_term_node(f, term)
+                add_node(f, term)
 
             # Write edges
             for source, dest in g.edges():
@@ -133,6 +139,24 @@ def add_term_node(f, term):
     declare_node(f, id(term), attrs_for_node(term))
 
 
+def _add_term_node(f, term, report):
+    if report is None or term not in report.index:
+        return add_term_node(f, term)
+    cost = report.loc[term]
+    total = report['wall_time'].sum()
+    share = cost['wall_time'] / total if total else 0.0
+    label = '"{term}\\n{ms:.1f} ms, {mb:.1f} MB"'.format(
+        term=term.short_repr(),
+        ms=cost['wall_time'] * 1e3,
+        mb=cost['output_bytes'] / 2.0 ** 20,
+    )
+    declare_node(
+        f,
+        id(term),
+        attrs_for_node(term, label=label, penwidth='%.2f' % (1 + 9 * share)),
+    )
+
+
 def declare_node(f, name, attributes):
     writeln(f, "{0} {1};".format(name, format_attrs(attributes)))
 
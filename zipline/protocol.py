@@ -495,17 +495,26 @@ class BarData(object):
     def __init__(self, data=None):
         self._data = data or {}
         self._contains_override = None
-        self._factor_matrix = None
-        self._factor_matrix_expires = pd.Timestamp(0, tz='UTC')
+        self._factor_stream = None
+        self._factor_date = pd.Timestamp(0, tz='UTC')
+        self._factor_row = None
 
     @property
     def factors(self):
         algo = get_algo_instance()
         today = normalize_date(algo.get_datetime())
-        if today > self._factor_matrix_expires:
-            self._factor_matrix, self._factor_matrix_expires = \
-                algo.compute_factor_matrix(today)
-        return self._factor_matrix.loc[today]
+        if today != self._factor_date:
+            # Rows are computed incrementally as the simulation advances, so
+            # each new day costs a single row of computation.  We only need
+            # to start a new stream if we're asked for an earlier date.
+            if self._factor_stream is None or today < self._factor_date:
+                self._factor_stream = algo.stream_factor_matrix(today)
+            for self._factor_date, self._factor_row in self._factor_stream:
+                if self._factor_date >= today:
+                    break
+            if self._factor_date != today:
+                raise KeyError(today)
+        return self._factor_row
 
     def __contains__(self, name):
         if self._contains_override: